@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import HeadRows, StratifiedSample, TopRows, make_table_sampler
+
+
+def _feed(sampler, df, chunksize):
+    for start in range(0, len(df), chunksize):
+        sampler.update(df.iloc[start : start + chunksize])
+    return sampler.result(df.columns.tolist())
+
+
+def _frame(n=1000):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame(
+        {
+            "kategoria": rng.choice(["AGD", "RTV", "Meble"], n, p=[0.6, 0.3, 0.1]),
+            "sprzedaz": rng.integers(0, 10_000, n),
+        }
+    )
+
+
+# 1. head / tail / top po kawałkach dają to samo co na całej ramce
+def test_head_tail_top_chunked_match_full():
+    df = _frame()
+    cols = df.columns.tolist()
+    head = _feed(make_table_sampler({"rows": 15}, cols, 20), df, 77)
+    assert head.equals(df.head(15))
+    tail = _feed(make_table_sampler({"mode": "tail"}, cols, 20), df, 77)
+    assert tail.equals(df.tail(20))
+    top = _feed(
+        make_table_sampler({"mode": "top", "column": "sprzedaz"}, cols, 20), df, 77
+    )
+    assert top["sprzedaz"].tolist() == df["sprzedaz"].nlargest(20).tolist()
+    bottom = _feed(
+        make_table_sampler(
+            {"mode": "top", "column": "sprzedaz", "order": "asc"}, cols, 20
+        ),
+        df,
+        77,
+    )
+    assert bottom["sprzedaz"].tolist() == df["sprzedaz"].nsmallest(20).tolist()
+
+
+# 2. Próba losowa: n różnych wierszy w kolejności z pliku, powtarzalna dla seed
+def test_random_sample_is_reproducible_subset():
+    df = _frame()
+    cols = df.columns.tolist()
+    a = _feed(make_table_sampler({"mode": "sample", "seed": 3}, cols, 20), df, 64)
+    b = _feed(make_table_sampler({"mode": "sample", "seed": 3}, cols, 20), df, 64)
+    assert len(a) == 20
+    assert a.index.is_unique and a.index.is_monotonic_increasing
+    assert a.equals(b)
+    assert a.equals(df.loc[a.index])
+
+
+# 3. Próba warstwowa: liczba wierszy proporcjonalna do liczności warstw
+def test_stratified_sample_allocation():
+    df = _frame()
+    sampler = make_table_sampler(
+        {"mode": "stratified", "column": "kategoria", "rows": 10},
+        df.columns.tolist(),
+        20,
+    )
+    result = _feed(sampler, df, 100)
+    assert len(result) == 10
+    counts = result["kategoria"].value_counts()
+    expected = df["kategoria"].value_counts() * 10 / len(df)
+    for value, share in expected.items():
+        assert abs(counts.get(value, 0) - share) < 1
+
+
+# 4. Błędna konfiguracja wraca do 'head'
+def test_invalid_table_mode_falls_back_to_head():
+    df = _frame(30)
+    sampler = make_table_sampler({"mode": "top", "column": "brak"}, list(df), 5)
+    assert _feed(sampler, df, 10).equals(df.head(5))
+
+
+# 5. Błędne `rows` wraca do domyślnej liczby wierszy
+@pytest.mark.parametrize("rows", [0, -1, "dużo", 2.5, None])
+def test_invalid_table_rows_fall_back_to_default(rows):
+    df = _frame(30)
+    for mode in ("head", "sample", "stratified"):
+        sampler = make_table_sampler(
+            {"mode": mode, "column": "kategoria", "rows": rows}, list(df), 5
+        )
+        assert len(_feed(sampler, df, 10)) == 5
+
+
+# 6. Pusta próba warstwowa to pusta tabela z kolumnami
+def test_empty_stratified_sample():
+    df = _frame(30)
+    sampler = StratifiedSample(0, "kategoria")
+    result = _feed(sampler, df, 10)
+    assert result.empty and result.columns.tolist() == list(df)
+
+
+# 7. Łączenie agregatów różnego typu lub ustawień zgłasza czytelny błąd
+def test_merge_rejects_mismatched_aggregates():
+    with pytest.raises(TypeError, match="TopRows"):
+        TopRows(5, "wiek").merge(HeadRows(5))
+    with pytest.raises(ValueError, match="column"):
+        TopRows(5, "wiek").merge(TopRows(5, "miasto"))
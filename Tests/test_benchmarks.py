@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from pipeline import generate_csv  # noqa: E402
+
+
+# 1. Generator danych: zadana liczba wierszy, kolumn i różnych wartości, kodowanie cp1250
+def test_generate_csv_controls_shape_and_encoding():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = generate_csv(
+            os.path.join(tmpdir, "dane.csv"),
+            rows=1200,
+            numeric=2,
+            text=1,
+            cardinality=20,
+            encoding="cp1250",
+        )
+        df = pd.read_csv(path, encoding="cp1250")
+        assert df.columns.tolist() == ["lp", "wartosc_0", "wartosc_1", "miasto_0"]
+        assert len(df) == 1200 and df["miasto_0"].nunique() == 20
+        assert "Łódź" in set(df["miasto_0"])
+
+
+# 2. Benchmark mierzy wszystkie etapy i zapisuje wynik w JSON
+def test_pipeline_benchmark_writes_json():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = os.path.join(tmpdir, "bench.json")
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join(ROOT, "benchmarks", "pipeline.py"),
+                "--rows",
+                "500",
+                "--output",
+                out,
+            ],
+            cwd=tmpdir,
+            check=True,
+            capture_output=True,
+        )
+        with open(out, encoding="utf-8") as fh:
+            result = json.load(fh)
+        stages = result["results"][0]["stages"]
+        assert list(stages) == [
+            "load",
+            "summary",
+            "chart_bar",
+            "chart_line",
+            "chart_pie",
+            "chart_pie_special",
+            "table",
+            "pdf",
+        ]
+        assert all(s["seconds"] >= 0 and s["peak_mb"] >= 0 for s in stages.values())
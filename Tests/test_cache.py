@@ -0,0 +1,172 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from cache import (
+    cache_path,
+    fetch_chart,
+    load_json,
+    load_chart_manifest,
+    load_parsed_cache,
+    save_chart_manifest,
+    store_chart,
+    store_encoding,
+    store_parsed_cache,
+)
+from csv_utils import load_csv
+
+pytest.importorskip("pyarrow")
+
+
+def _write_csv(tmpdir, name, rows=3):
+    path = os.path.join(tmpdir, name)
+    pd.DataFrame(
+        {
+            "miasto": (["Warszawa", None, "Gdańsk"] * rows)[:rows],
+            "wiek": range(rows),
+        }
+    ).to_csv(path, index=False)
+    return path
+
+
+# 1. Drugie wczytanie pliku nie parsuje już CSV
+def test_load_csv_uses_parsed_cache(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = _write_csv(tmpdir, "dane.csv")
+        config = {"cache": True, "cache_dir": os.path.join(tmpdir, "cache")}
+        first = load_csv(path, config)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("read_csv nie powinno być wywołane")
+
+        monkeypatch.setattr("csv_utils.pd.read_csv", fail)
+        cached = load_csv(path, config)
+        assert cached.equals(first)
+        assert cached["miasto"].isna().sum() == 1
+        assert isinstance(cached["miasto"].iloc[1], float)
+
+        # --rebuild-cache ignoruje istniejący wpis
+        assert load_parsed_cache(path, {**config, "rebuild_cache": True}) is None
+
+
+# 2. Zmiana zawartości pliku unieważnia wpis
+def test_parsed_cache_invalidated_by_content_change():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = _write_csv(tmpdir, "dane.csv")
+        config = {"cache": True, "cache_dir": os.path.join(tmpdir, "cache")}
+        load_csv(path, config)
+        _write_csv(tmpdir, "dane.csv", rows=5)
+        assert load_parsed_cache(path, config) is None
+        assert len(load_csv(path, config)) == 5
+
+
+# 3. Przekroczenie limitu rozmiaru usuwa najdawniej używane wpisy
+def test_parsed_cache_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = {
+            "cache": True,
+            "cache_dir": os.path.join(tmpdir, "cache"),
+            "cache_max_mb": 0.004,
+        }
+        paths = [_write_csv(tmpdir, f"p{i}.csv", rows=i + 3) for i in range(3)]
+        for p in paths:
+            store_parsed_cache(p, pd.read_csv(p), "utf-8", config)
+        assert load_parsed_cache(paths[-1], config) is not None
+        assert load_parsed_cache(paths[0], config) is None
+
+
+# 4. Cache jest domyślnie wyłączony; Feather zapisany bez kompresji (memory_map bez dekompresji)
+def test_cache_is_opt_in_and_uncompressed():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = _write_csv(tmpdir, "dane.csv", rows=3000)
+        cache_dir = os.path.join(tmpdir, "cache")
+        load_csv(path, {"cache_dir": cache_dir})
+        assert not os.path.exists(cache_dir)
+
+        config = {"cache": True, "cache_dir": cache_dir}
+        df = load_csv(path, config)
+        (name,) = [
+            n for n in os.listdir(cache_path(config, "data")) if n.endswith(".feather")
+        ]
+        compressed = os.path.join(tmpdir, "lz4.feather")
+        df.to_feather(compressed)
+        size = os.path.getsize(cache_path(config, "data", name))
+        assert size > 2 * os.path.getsize(compressed)
+
+
+def _store_charts(cache_dir, png, start):
+    config = {"cache": True, "cache_dir": cache_dir}
+    for i in range(start, start + 20):
+        manifest = load_chart_manifest(config)
+        store_chart(manifest, f"k{i}", png, config)
+        save_chart_manifest(manifest, config)
+
+
+# 5. Równoległe procesy nie gubią sobie wpisów manifestu
+def test_concurrent_manifest_updates_are_not_lost():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        png = os.path.join(tmpdir, "wykres.png")
+        with open(png, "wb") as fh:
+            fh.write(b"png")
+        cache_dir = os.path.join(tmpdir, "cache")
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(
+                executor.map(
+                    _store_charts, [cache_dir] * 4, [png] * 4, range(0, 80, 20)
+                )
+            )
+        manifest = load_chart_manifest({"cache_dir": cache_dir})
+        assert sorted(manifest) == sorted(f"k{i}" for i in range(80))
+
+
+# 6. PNG usunięty przez inny proces po wpisie w manifeście to zwykłe chybienie
+def test_fetch_chart_missing_png_is_a_miss():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = {"cache": True, "cache_dir": os.path.join(tmpdir, "cache")}
+        png = os.path.join(tmpdir, "wykres.png")
+        with open(png, "wb") as fh:
+            fh.write(b"png")
+        manifest = {}
+        store_chart(manifest, "k", png, config)
+        os.remove(cache_path(config, "charts", "k.png"))
+        assert not fetch_chart(manifest, "k", os.path.join(tmpdir, "kopia.png"), config)
+
+
+# 7. encodings.json: wpisy usuniętych i zmienionych plików znikają, rozmiar ograniczony LRU
+def test_encoding_cache_is_pruned_and_capped():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = {"cache": True, "cache_dir": os.path.join(tmpdir, "cache")}
+        paths = [_write_csv(tmpdir, f"p{i}.csv") for i in range(4)]
+        for p in paths:
+            store_encoding(p, "utf-8", None, config)
+        os.remove(paths[0])
+        _write_csv(tmpdir, "p1.csv", rows=7)
+        store_encoding(paths[2], "cp1250", None, config)
+        index = load_json(cache_path(config, "encodings.json"), {})
+        assert sorted(index) == sorted(os.path.abspath(p) for p in paths[2:])
+
+        # limit na jeden wpis: zostaje ostatnio zapisany
+        limit_mb = 1.5 * index[os.path.abspath(paths[2])]["bytes"] / 2**20
+        store_encoding(
+            paths[3], "utf-8", None, {**config, "encoding_cache_max_mb": limit_mb}
+        )
+        index = load_json(cache_path(config, "encodings.json"), {})
+        assert list(index) == [os.path.abspath(paths[3])]
+
+
+# 8. Wpis sparsowany z innym `encoding` (lub parserem) nie jest używany
+def test_parsed_cache_respects_encoding():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "miasta.csv")
+        pd.DataFrame({"miasto": ["Łódź", "Kraków"]}).to_csv(path, index=False)
+        config = {"cache": True, "cache_dir": os.path.join(tmpdir, "cache")}
+        wrong = load_csv(path, {**config, "encoding": "latin-1"})
+        assert wrong["miasto"].tolist() != ["Łódź", "Kraków"]
+        assert load_csv(path, config)["miasto"].tolist() == ["Łódź", "Kraków"]
+        assert load_parsed_cache(path, config) is not None
+        assert load_parsed_cache(path, {**config, "encoding": "latin-1"}) is None
+        engine = {**config, "optimize_dtypes": {"engine": "pyarrow"}}
+        assert load_parsed_cache(path, engine) is None
@@ -0,0 +1,210 @@
+import os
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+
+from charts import PARALLEL_MIN_CHARTS, chart_workers, generate_charts
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def _summary():
+    df = pd.DataFrame(
+        {
+            "Produkt": ["Laptop", "Pralka", "Tablet", "Laptop"],
+            "Sprzedaż": [15, 8, 14, 3],
+            "Kategoria": ["Elektronika", "AGD", "Elektronika", "Elektronika"],
+        }
+    )
+    return {"filename": "dane.csv", "dataframe": df}
+
+
+def _config(tmpdir, **extra):
+    return {
+        "interactive_charts": False,
+        "charts_dir": tmpdir,
+        "cache": True,
+        "cache_dir": os.path.join(tmpdir, "cache"),
+        "charts": [
+            {"type": "bar", "columns": ["Kategoria"]},
+            {"type": "line", "columns": ["Produkt", "Sprzedaż"]},
+            {"type": "pie", "columns": ["Kategoria"]},
+            {"type": "pie_special", "column": "Produkt", "values": ["Laptop"]},
+        ],
+        **extra,
+    }
+
+
+# 1. Wykresy z configu rysowane w puli procesów, w kolejności z configu
+def test_generate_charts_in_process_pool():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = generate_charts(_summary(), _config(tmpdir, chart_workers=2))
+        assert [os.path.basename(p) for p in paths] == [
+            "chart_0_Kategoria_bar.png",
+            "chart_1_Sprzedaż_line.png",
+            "chart_2_Kategoria_pie.png",
+            "chart_udzial_Produkt.png",
+        ]
+        assert all(os.path.getsize(p) > 0 for p in paths)
+
+
+# 2. Rysowanie nie korzysta z pyplot (bezpieczne bez ekranu)
+def test_charts_do_not_import_pyplot():
+    code = (
+        "import sys, tempfile, pandas as pd\n"
+        "from charts import render_chart\n"
+        "d = tempfile.mkdtemp()\n"
+        "render_chart({'kind': 'bar', 'labels': ['a'], 'values': [1],"
+        " 'title': 't', 'path': d + '/x.png'})\n"
+        "assert 'matplotlib.pyplot' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+# 3. Liczności wartości liczone raz na kolumnę i współdzielone przez wykresy
+def test_value_counts_shared_between_charts(monkeypatch):
+    import charts
+
+    calls = []
+    original = charts.value_counts
+
+    def counting(series):
+        calls.append(series.name)
+        return original(series)
+
+    monkeypatch.setattr(charts, "value_counts", counting)
+    summary = _summary()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = _config(tmpdir, chart_workers=1)
+        config["charts"].append({"type": "bar", "columns": ["Produkt"]})
+        generate_charts(summary, config)
+    assert sorted(calls) == ["Kategoria", "Produkt"]
+    assert summary["value_counts"]["Kategoria"].to_dict() == {
+        "Elektronika": 3,
+        "AGD": 1,
+    }
+
+
+# 4. Plan wykresów usuwa duplikaty (typ, kolumny, wartości)
+def test_plan_charts_deduplicates():
+    from charts import plan_charts
+
+    config = {
+        "charts": [
+            {"type": "pie_special", "column": "Produkt", "values": ["Laptop"]},
+            {"type": "bar", "columns": ["Kategoria"]},
+            {"type": "pie_special", "column": "Produkt", "values": ["Laptop"]},
+            {"type": "pie_special", "column": "Produkt", "values": ["Pralka"]},
+            {"type": "bar", "columns": ["Kategoria"]},
+        ]
+    }
+    plan = plan_charts(config)
+    assert [(s["type"], s["index"]) for s in plan] == [
+        ("pie_special", 0),
+        ("bar", 1),
+        ("pie_special", 3),
+    ]
+    assert [s["type"] for s in plan_charts(config, ["bar"])] == ["bar"]
+
+
+# 5. Niezmienione wykresy są kopiowane z cache zamiast rysowane ponownie
+def test_chart_cache_reuses_unchanged_charts(monkeypatch):
+    import charts
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = _config(tmpdir, chart_workers=1)
+        first = generate_charts(_summary(), config)
+        for p in first:
+            os.remove(p)
+
+        def fail(job):
+            raise AssertionError(f"{job['path']} nie powinien być rysowany")
+
+        monkeypatch.setattr(charts, "render_chart", fail)
+        again = generate_charts(_summary(), config)
+        assert again == first
+        assert all(os.path.exists(p) for p in again)
+
+        # zmiana danych w jednej kolumnie unieważnia tylko zależne wykresy
+        drawn = []
+        monkeypatch.setattr(charts, "render_chart", lambda job: drawn.append(job))
+        summary = _summary()
+        summary["dataframe"].loc[0, "Kategoria"] = "AGD"
+        generate_charts(summary, config)
+        assert sorted(os.path.basename(j["path"]) for j in drawn) == [
+            "chart_0_Kategoria_bar.png",
+            "chart_2_Kategoria_pie.png",
+        ]
+
+
+# 6. Wykres liniowy: redukcja punktów do max_points z zachowaniem min/max kubełków
+def test_line_chart_downsampling():
+    import numpy as np
+    from charts import build_chart_job, plan_charts
+
+    rng = np.random.default_rng(0)
+    n = 100_000
+    df = pd.DataFrame(
+        {
+            "czas": np.arange(n),
+            "wartosc": np.cumsum(rng.normal(size=n)),
+            "etykieta": [f"p{i}" for i in range(n)],
+        }
+    )
+    summary = {"filename": "dane.csv", "dataframe": df}
+    charts = [
+        {"type": "line", "columns": ["czas", "wartosc"], "max_points": 400},
+        {"type": "line", "columns": ["etykieta", "wartosc"]},
+        {"type": "line", "columns": ["czas", "wartosc"], "max_points": 0},
+    ]
+    limited, categorical, full = [
+        build_chart_job(plan_charts({"charts": [c]})[0], summary, "charts")
+        for c in charts
+    ]
+
+    assert 100 < len(limited["x"]) <= 400
+    assert np.all(np.diff(limited["x"]) > 0)
+    # w każdym ze 100 kubełków (po 1000 punktów) zostaje minimum i maksimum
+    buckets = df["wartosc"].groupby(df["czas"] // 1000)
+    kept = pd.Series(limited["y"]).groupby(limited["x"] // 1000)
+    assert (kept.min() == buckets.min()).all() and (kept.max() == buckets.max()).all()
+
+    # oś kategoryczna: pozycje punktów w pełnych danych
+    assert len(categorical["x"]) <= 4 * 640
+    assert categorical["x"][-1] == "p99999" and categorical["positions"][-1] == n - 1
+
+    assert len(full["x"]) == n
+
+    # błędne max_points -> domyślne; tekstowa oś Y nie przerywa pozostałych wykresów
+    from charts import DEFAULT_LINE_POINTS, render_plan
+
+    bad = plan_charts(
+        {
+            "charts": [
+                {"type": "line", "columns": ["czas", "wartosc"], "max_points": -10}
+            ]
+        }
+    )
+    assert bad[0]["max_points"] == DEFAULT_LINE_POINTS
+    with tempfile.TemporaryDirectory() as tmpdir:
+        small = {"filename": "dane.csv", "dataframe": df.head(100)}
+        config = {
+            "charts_dir": tmpdir,
+            "chart_workers": 1,
+            "cache": False,
+            "charts": [
+                {"type": "line", "columns": ["czas", "etykieta"], "max_points": 8},
+                {"type": "line", "columns": ["czas", "wartosc"]},
+            ],
+        }
+        paths = render_plan(plan_charts(config), small, config)
+        assert os.path.basename(paths[-1]) == "chart_1_wartosc_line.png"
+
+
+# 7. Bez `chart_workers` kilka wykresów rysuje bieżący proces (pula dopiero od progu)
+def test_chart_workers_default_is_serial_for_few_charts():
+    assert chart_workers({}, 4) == 1
+    assert chart_workers({}, PARALLEL_MIN_CHARTS) >= 1
+    assert chart_workers({"chart_workers": 3}, 4) == 3
+    assert chart_workers({"chart_workers": 8}, 2) == 2
@@ -1,6 +1,7 @@
 import os
 import tempfile
 import pandas as pd
+import numpy as np
 import pytest
 
 from csv_utils import (
@@ -9,6 +10,7 @@ from csv_utils import (
     interactive_sort,
     discover_csv_files,
     interactive_choose_file,
+    detect_encoding,
 )
 
 
@@ -101,3 +103,349 @@ def test_empty_filter(monkeypatch):
 
 
 # (Kolejne testy rozbudujesz wg. potrzeb!)
+
+
+# 7. Wykrywanie kodowania bez wielokrotnego parsowania pliku
+def test_detect_encoding_cp1250_and_late_invalid_utf8():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cp1250.csv")
+        pd.DataFrame({"miasto": ["Łódź", "Gdańsk"]}).to_csv(
+            path, index=False, encoding="cp1250"
+        )
+        assert detect_encoding(path, ["utf-8", "cp1250"]) == "cp1250"
+
+        # Błędny bajt UTF-8 daleko za próbką też musi zostać wykryty
+        late = os.path.join(tmpdir, "late.csv")
+        with open(late, "wb") as fh:
+            fh.write(b"a\n" + b"x\n" * 5000 + "Łódź\n".encode("cp1250"))
+        assert detect_encoding(late, ["utf-8", "cp1250"], sample_bytes=64) == "cp1250"
+
+
+# 8. Wykryte kodowanie jest zapamiętywane (ścieżka + mtime + rozmiar)
+def test_encoding_cache_skips_detection(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "dane.csv")
+        pd.DataFrame({"miasto": ["Kraków"], "wiek": [30]}).to_csv(
+            path, index=False, encoding="cp1250"
+        )
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache": True,
+            "cache_dir": os.path.join(tmpdir, "cache"),
+        }
+        assert process_csv_file(path, config)["row_count"] == 1
+
+        def fail(*args, **kwargs):
+            raise AssertionError("detect_encoding nie powinno być wywołane")
+
+        monkeypatch.setattr("csv_utils.detect_encoding", fail)
+        summary = process_csv_file(path, config)
+        assert list(summary["dataframe"]["miasto"]) == ["Kraków"]
+
+
+# 9. Tryb strumieniowy daje to samo podsumowanie co wczytanie całego pliku
+def test_streaming_summary_matches_in_memory():
+    df = pd.DataFrame(
+        {
+            "miasto": ["Warszawa", "Kraków", "Gdańsk", "Łódź", "Poznań"] * 9,
+            "wiek": list(range(45)),
+            "wynik": [1.5, None, 2.5, 3.0, -1.0] * 9,
+        }
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "duzy.csv")
+        df.to_csv(csv_path, index=False)
+        base = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache_dir": os.path.join(tmpdir, "cache"),
+        }
+        full = process_csv_file(csv_path, base)
+        streamed = process_csv_file(
+            csv_path, {**base, "streaming": True, "chunksize": 7}
+        )
+        assert streamed["row_count"] == full["row_count"] == 45
+        assert streamed["columns"] == full["columns"]
+        assert streamed["column_types"] == full["column_types"]
+        assert streamed["numerical_summary"].keys() == full["numerical_summary"].keys()
+        for col, stats in full["numerical_summary"].items():
+            for key, value in stats.items():
+                assert streamed["numerical_summary"][col][key] == pytest.approx(value)
+        assert len(streamed["dataframe"]) == 20
+        assert streamed["dataframe"].equals(full["dataframe"].head(20))
+
+
+# 10. Tryb przyrostowy parsuje tylko dopisane wiersze, a skrócony plik liczy od nowa
+def test_incremental_summary_appends_and_rebuilds(monkeypatch):
+    import csv_utils
+
+    def frame(start, n):
+        return pd.DataFrame(
+            {
+                "miasto": (["Warszawa", "Kraków", "Gdańsk"] * n)[:n],
+                "wiek": range(start, start + n),
+            }
+        )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "log.csv")
+        frame(0, 30).to_csv(csv_path, index=False)
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "incremental": True,
+            "chunksize": 8,
+            "cache_dir": os.path.join(tmpdir, "cache"),
+            "table": {"mode": "tail", "rows": 5},
+            "charts": [{"type": "bar", "columns": ["miasto"]}],
+        }
+        process_csv_file(csv_path, config)
+
+        # dopisanie wierszy + niedokończony ostatni wiersz
+        with open(csv_path, "a", encoding="utf-8") as fh:
+            fh.write(frame(30, 12).to_csv(index=False, header=False))
+            fh.write("Łódź,42")
+        ranges = []
+        original = csv_utils._feed_range
+        monkeypatch.setattr(
+            csv_utils,
+            "_feed_range",
+            lambda path, start, end, *a: ranges.append(start)
+            or original(path, start, end, *a),
+        )
+        summary = process_csv_file(csv_path, config)
+        assert 0 not in ranges
+        streamed = process_csv_file(
+            csv_path, {**config, "incremental": False, "streaming": True}
+        )
+        assert summary["row_count"] == streamed["row_count"] == 43
+        assert summary["numerical_summary"] == streamed["numerical_summary"]
+        assert summary["table"].equals(streamed["table"])
+        assert summary["value_counts"]["miasto"].equals(
+            streamed["value_counts"]["miasto"]
+        )
+
+        # dokończenie wiersza liczy go raz; skrócenie pliku wymusza pełne przeliczenie
+        with open(csv_path, "a", encoding="utf-8") as fh:
+            fh.write("\n")
+        assert process_csv_file(csv_path, config)["row_count"] == 43
+        frame(0, 10).to_csv(csv_path, index=False)
+        ranges.clear()
+        summary = process_csv_file(csv_path, config)
+        assert summary["row_count"] == 10
+        assert summary["numerical_summary"]["wiek"]["max"] == 9
+
+
+# 11. Optymalizacja typów: mniej pamięci, te same statystyki
+def test_optimize_dtypes_keeps_summary():
+    n = 600
+    df = pd.DataFrame(
+        {
+            "miasto": (["Warszawa", "Kraków", "Gdańsk"] * n)[:n],
+            "id": [f"osoba-{i}" for i in range(n)],
+            "wiek": [i % 90 for i in range(n)],
+            "wynik": [0.5 * i for i in range(n)],
+            "kurs": [1 / (i + 3) for i in range(n)],
+        }
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "demografia.csv")
+        df.to_csv(csv_path, index=False)
+        base = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache": False,
+        }
+        plain = process_csv_file(csv_path, base)
+        small = process_csv_file(
+            csv_path, {**base, "optimize_dtypes": {"engine": "pyarrow"}}
+        )
+        types = small["column_types"]
+        assert types["miasto"] == "category"
+        assert types["id"] == "object"
+        assert types["wiek"] == "int8"
+        assert types["wynik"] == "float32"
+        assert types["kurs"] == "float64"
+        assert (
+            small["dataframe"].memory_usage(deep=True).sum()
+            < plain["dataframe"].memory_usage(deep=True).sum() / 2
+        )
+        for col, stats in plain["numerical_summary"].items():
+            for key, value in stats.items():
+                assert small["numerical_summary"][col][key] == pytest.approx(value)
+
+
+# 12. Projekcja kolumn: wczytywane są tylko kolumny używane w configu
+def test_column_projection_reads_only_needed_columns(monkeypatch):
+    df = pd.DataFrame({f"k{i}": range(5) for i in range(10)})
+    df["miasto"] = ["Warszawa", "Kraków", "Gdańsk", "Łódź", "Poznań"]
+    config = {
+        "interactive_filter": False,
+        "interactive_sort": False,
+        "interactive_charts": False,
+        "table": {"columns": ["miasto", "k1"]},
+        "charts": [{"type": "line", "columns": ["k2", "k3"]}],
+    }
+    read = []
+    original = pd.read_csv
+
+    def spy(*args, **kwargs):
+        read.append(kwargs.get("usecols"))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr("csv_utils.pd.read_csv", spy)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "szeroki.csv")
+        df.to_csv(csv_path, index=False)
+        for extra in ({}, {"streaming": True}):
+            cfg = {**config, **extra, "cache_dir": os.path.join(tmpdir, "cache")}
+            read.clear()
+            summary = process_csv_file(csv_path, cfg)
+            assert ["k1", "k2", "k3", "miasto"] in read
+            assert summary["columns"] == df.columns.tolist()
+            assert summary["table"].columns.tolist() == ["miasto", "k1"]
+            assert summary["dataframe"].columns.tolist() == ["k1", "k2", "k3", "miasto"]
+
+        # pełne wczytanie nie korzysta z niepełnego wpisu cache
+        full = process_csv_file(
+            csv_path,
+            {**config, "table": {}, "cache_dir": os.path.join(tmpdir, "cache")},
+        )
+        assert full["dataframe"].columns.tolist() == df.columns.tolist()
+
+
+# 13. Sortowanie z configu: top-k dla samej tabeli, pełne przy wykresie liniowym
+def test_config_sort_uses_top_k(monkeypatch):
+    df = pd.DataFrame({"produkt": [f"p{i}" for i in range(500)]})
+    df["sprzedaz"] = [(i * 37) % 101 for i in range(500)]
+    sorted_lengths = []
+    original = pd.DataFrame.sort_values
+
+    def spy(self, *args, **kwargs):
+        sorted_lengths.append(len(self))
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "sort_values", spy)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "sprzedaz.csv")
+        df.to_csv(csv_path, index=False)
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache": False,
+            "sort": {"column": "sprzedaz", "order": "desc"},
+        }
+        expected = df.sort_values("sprzedaz", ascending=False, kind="stable")
+        for extra in ({}, {"streaming": True, "chunksize": 64}):
+            sorted_lengths.clear()
+            summary = process_csv_file(csv_path, {**config, **extra})
+            assert summary["table"].equals(expected.head(20))
+            assert max(sorted_lengths) < len(df)
+
+        tail = process_csv_file(csv_path, {**config, "table": {"mode": "tail"}})
+        assert tail["table"].equals(expected.tail(20))
+
+        summary = process_csv_file(
+            csv_path,
+            {
+                **config,
+                "charts": [{"type": "line", "columns": ["produkt", "sprzedaz"]}],
+            },
+        )
+        assert summary["dataframe"].equals(expected)
+
+
+# 14. group_by: ten sam wynik w pamięci, strumieniowo i jak w pandas groupby
+def test_group_by_matches_pandas():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "region": rng.choice(["Mazowsze", "Pomorze", "Śląsk", None], 2000),
+            "kategoria": rng.choice(["AGD", "RTV"], 2000),
+            "sprzedaz": rng.normal(100, 20, 2000).round(2),
+        }
+    )
+    df.loc[::7, "sprzedaz"] = np.nan
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "sprzedaz.csv")
+        df.to_csv(csv_path, index=False)
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache": False,
+            "group_by": [
+                {
+                    "by": ["region", "kategoria"],
+                    "values": "sprzedaz",
+                    "aggs": ["sum", "mean", "count", "min", "max", "median", "p90"],
+                }
+            ],
+        }
+        grouped = df.groupby(["region", "kategoria"])["sprzedaz"]
+        expected = pd.DataFrame(
+            {
+                "sum": grouped.sum(),
+                "mean": grouped.mean(),
+                "count": grouped.count(),
+                "min": grouped.min(),
+                "max": grouped.max(),
+                "median": grouped.median(),
+                "p90": grouped.quantile(0.9),
+            }
+        ).round(2)
+        for extra in ({}, {"streaming": True, "chunksize": 128}):
+            summary = process_csv_file(csv_path, {**config, **extra})
+            caption, table = summary["group_by"][0]
+            assert caption == "sprzedaz wg region, kategoria"
+            table = table.set_index(["region", "kategoria"])
+            table.columns = [c.split(" ")[1] for c in table.columns]
+            pd.testing.assert_frame_equal(
+                table, expected, check_dtype=False, check_names=False
+            )
+
+        config["group_by"][0]["aggs"] = ["suma"]
+        with pytest.raises(ValueError):
+            process_csv_file(csv_path, config)
+
+
+# 15. Błędne `table.rows` przy sortowaniu: ostrzeżenie i domyślne 20 wierszy (jak bez sortowania)
+@pytest.mark.parametrize("rows", ["abc", 0, -3, 2.5])
+def test_sorted_table_invalid_rows_fall_back_to_default(rows, capsys):
+    df = pd.DataFrame({"produkt": [f"p{i}" for i in range(50)], "sprzedaz": range(50)})
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "sprzedaz.csv")
+        df.to_csv(csv_path, index=False)
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "sort": {"column": "sprzedaz", "order": "desc"},
+            "table": {"rows": rows},
+        }
+        for extra in ({}, {"streaming": True, "chunksize": 16}):
+            summary = process_csv_file(csv_path, {**config, **extra})
+            assert summary["table"]["sprzedaz"].tolist() == list(range(49, 29, -1))
+            assert (
+                "[WARN] Nieprawidłowa liczba wierszy tabeli" in capsys.readouterr().out
+            )
+
+
+# 16. Błędne `rows` grupowania: ostrzeżenie i domyślne 50 grup w tabeli
+@pytest.mark.parametrize("rows", ["abc", 0, -3, 2.5, None])
+def test_group_by_invalid_rows_fall_back_to_default(rows, capsys):
+    df = pd.DataFrame({"klient": [f"k{i:03d}" for i in range(80)], "kwota": range(80)})
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "sprzedaz.csv")
+        df.to_csv(csv_path, index=False)
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "group_by": [{"by": "klient", "values": "kwota", "rows": rows}],
+        }
+        for extra in ({}, {"streaming": True, "chunksize": 16}):
+            summary = process_csv_file(csv_path, {**config, **extra})
+            assert len(summary["group_by"][0][1]) == 50
+            assert (
+                "[WARN] Nieprawidłowa liczba wierszy grupowania #0"
+                in capsys.readouterr().out
+            )
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import pandas as pd
+import pytest
+
+from csv_utils import process_csv_file
+from filters import apply_filters, validate_filters
+
+
+def _frame():
+    return pd.DataFrame(
+        {
+            "miasto": ["Warszawa", "Kraków", None, "Gdańsk", "Wrocław", "Kraków"],
+            "wiek": [21, 35, 40, None, 18, 52],
+        }
+    )
+
+
+# 1. Operatory porównań, in, between, regex i braki danych
+@pytest.mark.parametrize(
+    "flt, expected",
+    [
+        ({"column": "wiek", "op": ">", "value": 30}, [1, 2, 5]),
+        ({"column": "wiek", "op": "<=", "value": "21"}, [0, 4]),
+        ({"column": "miasto", "value": "Kraków"}, [1, 5]),
+        ({"column": "miasto", "op": "in", "value": ["Gdańsk", "Wrocław"]}, [3, 4]),
+        ({"column": "miasto", "op": "not_in", "value": ["Kraków"]}, [0, 2, 3, 4]),
+        ({"column": "wiek", "op": "between", "value": [21, 40]}, [0, 1, 2]),
+        ({"column": "miasto", "op": "regex", "value": "^W"}, [0, 4]),
+        ({"column": "wiek", "op": "is_null"}, [3]),
+        ({"column": "miasto", "op": "not_null"}, [0, 1, 3, 4, 5]),
+    ],
+)
+def test_filter_operators(flt, expected):
+    assert apply_filters(_frame(), validate_filters([flt])).index.tolist() == expected
+
+
+# 2. Kilka filtrów łączy się koniunkcją; kategorie porównywane jak tekst
+def test_filters_combined_and_categorical():
+    df = _frame()
+    df["miasto"] = df["miasto"].astype("category")
+    filters = [
+        {"column": "miasto", "op": ">=", "value": "Kraków"},
+        {"column": "wiek", "op": "<", "value": 50},
+    ]
+    assert apply_filters(df, filters).index.tolist() == [0, 1, 4]
+
+
+# 3. Błędna konfiguracja filtrów jest zgłaszana
+def test_invalid_filters_raise():
+    with pytest.raises(ValueError):
+        validate_filters([{"column": "wiek", "op": "~", "value": 1}])
+    with pytest.raises(ValueError):
+        validate_filters([{"column": "wiek", "op": "between", "value": 1}])
+    with pytest.raises(ValueError):
+        apply_filters(_frame(), [{"column": "brak", "op": "==", "value": 1}])
+
+
+# 4. Filtry z configu działają przy wczytywaniu (w pamięci i strumieniowo)
+def test_config_filters_applied_while_loading():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "dane.csv")
+        pd.concat([_frame()] * 5, ignore_index=True).to_csv(csv_path, index=False)
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache_dir": os.path.join(tmpdir, "cache"),
+            "chunksize": 4,
+            "filters": [{"column": "miasto", "op": "in", "value": ["Kraków"]}],
+        }
+        full = process_csv_file(csv_path, config)
+        streamed = process_csv_file(csv_path, {**config, "streaming": True})
+        assert full["row_count"] == streamed["row_count"] == 10
+        assert set(full["dataframe"]["miasto"]) == {"Kraków"}
+        assert full["table"].index.tolist() == streamed["table"].index.tolist()
+        assert streamed["numerical_summary"]["wiek"]["sum"] == 5 * (35 + 52)
+
+
+# 5. Typ kolumny wg całego pliku, nie pierwszego kawałka; filtr także przy odczycie z cache
+def test_text_filter_on_column_numeric_in_first_chunks():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "kody.csv")
+        pd.DataFrame({"kod": ["1", "2", "3", "A4"], "ilosc": [5, 6, 7, 8]}).to_csv(
+            csv_path, index=False
+        )
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache": True,
+            "cache_dir": os.path.join(tmpdir, "cache"),
+            "chunksize": 2,
+            "filters": [{"column": "kod", "op": "==", "value": "A4"}],
+        }
+        for extra in ({}, {"streaming": True}):
+            summary = process_csv_file(csv_path, {**config, **extra})
+            assert summary["row_count"] == 1
+            assert summary["dataframe"]["ilosc"].tolist() == [8]
+
+        # wpis cache z pełnego pliku, potem filtr przy odczycie z cache
+        process_csv_file(csv_path, {**config, "filters": []})
+        cached = process_csv_file(csv_path, config)
+        assert cached["dataframe"].index.tolist() == [3]
+        assert cached["dataframe"]["kod"].tolist() == ["A4"]
+
+        # kolumna liczbowa w całym pliku: ten sam błąd co bez kawałków
+        pd.DataFrame({"kod": [1, 2, 3, 4]}).to_csv(csv_path, index=False)
+        for extra in ({}, {"streaming": True}):
+            with pytest.raises(ValueError):
+                process_csv_file(csv_path, {**config, **extra, "cache": False})
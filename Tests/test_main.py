@@ -0,0 +1,180 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+
+from main import run_batch
+
+# Import main bez ciężkich zależności trwa ok. 30 ms; limit pilnuje, żeby nie wróciły
+STARTUP_BUDGET_US = 150_000
+
+
+def _batch_config(tmpdir):
+    return {
+        "interactive_filter": False,
+        "interactive_sort": False,
+        "interactive_charts": False,
+        "charts": [{"type": "bar", "columns": ["miasto"]}],
+        "charts_dir": os.path.join(tmpdir, "charts"),
+        "reports_dir": os.path.join(tmpdir, "reports"),
+    }
+
+
+# 1. Tryb wsadowy: równoległe przetwarzanie z izolacją błędów
+def test_run_batch_parallel_isolates_errors():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for name in ("a", "b"):
+            path = os.path.join(tmpdir, f"{name}.csv")
+            pd.DataFrame({"miasto": ["Warszawa", "Kraków"], "wiek": [21, 22]}).to_csv(
+                path, index=False
+            )
+            files.append(path)
+        broken = os.path.join(tmpdir, "pusty.csv")
+        open(broken, "w").close()
+        files.append(broken)
+
+        results = run_batch(files, _batch_config(tmpdir), jobs=2)
+        assert [r["file"] for r in results] == files
+        assert [r["ok"] for r in results] == [True, True, False]
+        assert results[2]["error"]
+        for r in results[:2]:
+            assert os.path.exists(r["report"])
+
+
+def _pdf_content(path):
+    """Treść PDF bez daty utworzenia – jedynej części, która różni się między przebiegami."""
+    with open(path, "rb") as fh:
+        return re.sub(rb"/CreationDate \(D:\d+\)", b"", fh.read())
+
+
+# 2. Wynik równoległy odpowiada szeregowemu: te same raporty, z tą samą treścią
+def test_run_batch_parallel_matches_serial():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for i, name in enumerate(("x", "y", "z")):
+            path = os.path.join(tmpdir, f"{name}.csv")
+            pd.DataFrame(
+                {
+                    "miasto": ["Gdańsk", "Kraków", "Łódź"][: i + 1],
+                    "wiek": [30 + i] * (i + 1),
+                }
+            ).to_csv(path, index=False)
+            files.append(path)
+        results = {}
+        for jobs in (1, 3):
+            config = _batch_config(os.path.join(tmpdir, f"jobs{jobs}"))
+            results[jobs] = run_batch(files, config, jobs=jobs)
+            assert all(r["ok"] for r in results[jobs])
+        serial, parallel = results[1], results[3]
+        assert [os.path.basename(r["report"]) for r in serial] == [
+            os.path.basename(r["report"]) for r in parallel
+        ]
+        for s, p in zip(serial, parallel):
+            assert os.path.getsize(p["report"]) > 0
+            assert _pdf_content(s["report"]) == _pdf_content(p["report"])
+        # różne pliki dają różne raporty – porównanie nie przechodzi przypadkiem
+        assert _pdf_content(serial[0]["report"]) != _pdf_content(serial[1]["report"])
+
+
+# 3. Start programu nie importuje pandas, fpdf ani matplotlib (-X importtime)
+def test_startup_imports_stay_light():
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    for args in (["-c", "import main"], ["main.py", "--help"]):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imported = {}
+        for line in proc.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                _, cumulative, name = line.split("|")
+                if cumulative.strip().isdigit():
+                    imported[name.strip()] = int(cumulative)
+        heavy = [
+            m
+            for m in imported
+            if m.split(".")[0] in ("pandas", "numpy", "fpdf", "matplotlib", "pyarrow")
+        ]
+        assert heavy == []
+        # budżet startu: sam import main (w mikrosekundach, z dużym zapasem)
+        assert imported.get("main", 0) < STARTUP_BUDGET_US
+
+
+# 4. Raport łączony: części z wielu plików dają to samo co jeden sklejony plik
+def test_run_combined_merges_partial_summaries(monkeypatch):
+    import csv_utils
+    from main import run_combined
+
+    frames = [
+        pd.DataFrame({"miasto": ["Łódź", "Kraków"] * (n + 1), "wiek": range(2 * n + 2)})
+        for n in range(3)
+    ]
+    summaries = []
+    original = csv_utils.combined_summary
+
+    def keep(*args):
+        summaries.append(original(*args))
+        return summaries[-1]
+
+    monkeypatch.setattr(csv_utils, "combined_summary", keep)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for i, df in enumerate(frames):
+            files.append(os.path.join(tmpdir, f"dzien_{i}.csv"))
+            df.to_csv(files[-1], index=False)
+        broken = os.path.join(tmpdir, "pusty.csv")
+        open(broken, "w").close()
+
+        config = _batch_config(tmpdir)
+        rpt, failed = run_combined(files + [broken], config, "miesiac", jobs=2)
+        assert os.path.basename(rpt) == "report_miesiac.pdf" and os.path.exists(rpt)
+        assert failed == [broken]
+
+        everything = pd.concat(frames, ignore_index=True)
+        summary = summaries[0]
+        assert summary["row_count"] == len(everything) == 12
+        assert summary["source_files"] == files
+        assert summary["numerical_summary"]["wiek"]["sum"] == everything["wiek"].sum()
+        assert summary["numerical_summary"]["wiek"]["max"] == 5
+        assert summary["value_counts"]["miasto"].to_dict() == {"Łódź": 6, "Kraków": 6}
+        assert summary["table"]["wiek"].tolist() == everything["wiek"].tolist()
+
+
+# 5. Raport łączony z `sort`: pliki o różnych nagłówkach (część bez kolumny sortowania)
+def test_run_combined_with_sort_over_different_headers(monkeypatch):
+    import csv_utils
+    from main import run_combined
+
+    summaries = []
+    original = csv_utils.combined_summary
+    monkeypatch.setattr(
+        csv_utils,
+        "combined_summary",
+        lambda *args: summaries.append(original(*args)) or summaries[-1],
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        frames = [
+            pd.DataFrame({"miasto": ["Łódź", "Kraków"], "wiek": [40, 25]}),
+            pd.DataFrame({"miasto": ["Gdańsk", "Opole"], "ludnosc": [470, 127]}),
+            pd.DataFrame({"miasto": ["Poznań"], "wiek": [33]}),
+        ]
+        files = []
+        for i, df in enumerate(frames):
+            files.append(os.path.join(tmpdir, f"czesc_{i}.csv"))
+            df.to_csv(files[-1], index=False)
+        config = {
+            **_batch_config(tmpdir),
+            "sort": {"column": "wiek", "order": "desc"},
+            "table": {"rows": 4},
+        }
+        for jobs in (1, 2):
+            rpt, failed = run_combined(files, config, "razem", jobs=jobs)
+            assert os.path.exists(rpt) and failed == []
+            table = summaries[-1]["table"]
+            assert table["miasto"].tolist() == ["Łódź", "Poznań", "Kraków", "Gdańsk"]
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+import pandas as pd
+
+import profiling
+from main import run_pipeline
+
+
+# 1. Bez --profile span() nic nie mierzy (współdzielony pusty obiekt)
+def test_span_is_noop_when_disabled():
+    assert not profiling.enabled()
+    with profiling.span("etap", rows=1) as s:
+        s.set(bytes=2)
+    assert profiling.span("inny") is s
+
+
+# 2. Profil przebiegu zawiera etapy z liczbą wierszy, bajtów i pamięcią
+def test_profile_records_pipeline_stages():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "dane.csv")
+        pd.DataFrame({"miasto": ["Łódź", "Kraków"] * 50, "wiek": range(100)}).to_csv(
+            csv_path, index=False
+        )
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "interactive_charts": False,
+            "chart_workers": 2,
+            "charts": [
+                {"type": "bar", "columns": ["miasto"]},
+                {"type": "pie", "columns": ["miasto"]},
+            ],
+            "charts_dir": os.path.join(tmpdir, "charts"),
+            "reports_dir": os.path.join(tmpdir, "reports"),
+            "cache_dir": os.path.join(tmpdir, "cache"),
+        }
+        profiling.enable()
+        try:
+            run_pipeline(csv_path, config)
+        finally:
+            profile_path = os.path.join(tmpdir, "profile.json")
+            profiling.disable().save(profile_path)
+
+        with open(profile_path, encoding="utf-8") as fh:
+            events = json.load(fh)["traceEvents"]
+        spans = {e["name"]: e for e in events if e["ph"] == "X"}
+        for name in (
+            "pipeline",
+            "process_csv_file",
+            "load_csv",
+            "read_csv",
+            "generate_charts",
+            "render_charts",
+            "generate_pdf_report",
+            "pdf_table",
+            "pdf_output",
+        ):
+            assert name in spans
+        assert spans["load_csv"]["args"]["rows"] == 100
+        assert spans["process_csv_file"]["args"]["bytes"] == os.path.getsize(csv_path)
+        assert spans["generate_pdf_report"]["args"]["bytes"] > 0
+        # wykresy rysowane w procesach roboczych też trafiają do profilu
+        renders = [e for e in events if e["name"] == "render_chart"]
+        assert len(renders) == 2 and all(e["pid"] != os.getpid() for e in renders)
+        outer = spans["pipeline"]
+        assert all(
+            outer["ts"] <= e["ts"] and e["ts"] + e["dur"] <= outer["ts"] + outer["dur"]
+            for e in spans.values()
+            if e["pid"] == os.getpid()
+        )
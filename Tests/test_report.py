@@ -61,3 +61,74 @@ def test_generate_pdf_with_chart():
         assert os.path.exists(out_path)
         assert out_path.endswith(".pdf")
         assert os.path.getsize(out_path) > 0
+
+
+def test_add_table_paginates_with_repeated_header():
+    from report import PDFReport, _pdf_text
+
+    df = pd.DataFrame({"miasto": ["Łódź", "Gdańsk (Pomorze)"] * 50, "wiek": range(100)})
+    pdf = PDFReport()
+    pdf.add_page()
+    pdf.add_table(df)
+    assert pdf.page > 1
+    header = _pdf_text("miasto")
+    for n in range(1, pdf.page + 1):
+        assert f"({header}) Tj" in pdf.pages[n]
+    # znaki z tabeli trafiają do podzbioru czcionki tylko raz
+    subset = pdf.current_font["subset"]
+    assert subset.count(ord("Ł")) == 1
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = os.path.join(tmpdir, "tabela.pdf")
+        pdf.output(out)
+        assert os.path.getsize(out) > 0
+
+
+def test_font_parsed_once_per_process_with_per_document_subset(monkeypatch):
+    import report
+
+    first = report.PDFReport()
+    first.add_page()
+    first.add_table(pd.DataFrame({"miasto": ["Łódź"]}))
+    first.output(dest="S")
+
+    # kolejne raporty nie parsują już czcionki ani jej tabel
+    def fail(*args, **kwargs):
+        raise AssertionError("czcionka nie powinna być parsowana ponownie")
+
+    monkeypatch.setattr(report.FPDF, "add_font", fail)
+    monkeypatch.setattr(report.TTFontFile, "getCMAP4", fail)
+    monkeypatch.setattr(report.TTFontFile, "getHMTX", fail)
+    monkeypatch.setattr(report.TTFontFile, "getLOCA", fail)
+    second = report.PDFReport()
+    second.add_page()
+    second.add_table(pd.DataFrame({"miasto": ["Kraków"]}))
+    subset = second.current_font["subset"]
+    assert ord("ó") in subset and ord("Ł") not in subset
+    assert first.fonts is not second.fonts
+    assert second.output(dest="S").startswith("%PDF")
+
+
+def test_font_registered_once_per_document_and_thread_safe(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    import report
+
+    # pierwszy dokument w procesie (add_font) i kolejne mają tę samą czcionkę /F1
+    monkeypatch.setattr(report, "_FONT_TEMPLATES", {})
+
+    def render(text):
+        pdf = report.PDFReport()
+        pdf.add_page()
+        pdf.add_table(pd.DataFrame({"miasto": [text]}))
+        return pdf, pdf.output(dest="S")
+
+    for text in ("Łódź", "Kraków", "Gdańsk"):
+        pdf, out = render(text)
+        assert [f["i"] for f in pdf.fonts.values()] == [1]
+        assert "/F1 " in pdf.pages[1] and "/F2" not in out
+
+    # zapis czcionek z wielu wątków naraz (serwer) nie psuje podmiany TTFontFile
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = [out for _, out in executor.map(render, ["Łódź"] * 8)]
+    assert all(out.startswith("%PDF") for out in outputs)
+    assert report.fpdf_module.TTFontFile is report.TTFontFile
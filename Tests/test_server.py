@@ -0,0 +1,161 @@
+import json
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+import pytest
+
+import server as server_module
+from main import _run_batch_job
+from server import ReportServer
+
+
+def _request(server, path, payload=None):
+    host, port = server.address
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(f"http://{host}:{port}{path}", data=data)
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+# 1. Serwer generuje raport z configu przesłanego w żądaniu i pilnuje kolejki
+def test_report_server_runs_jobs_with_backpressure():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "dane.csv")
+        pd.DataFrame({"miasto": ["Warszawa", "Kraków"], "wiek": [21, 22]}).to_csv(
+            csv_path, index=False
+        )
+        config = {
+            "charts": [{"type": "bar", "columns": ["miasto"]}],
+            "charts_dir": os.path.join(tmpdir, "charts"),
+            "reports_dir": os.path.join(tmpdir, "reports"),
+            "cache_dir": os.path.join(tmpdir, "cache"),
+        }
+        server = ReportServer(port=0, workers=1, max_pending=1)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            status, result = _request(
+                server, "/report", {"config": config, "input_file": csv_path}
+            )
+            assert status == 200 and result["ok"]
+            assert os.path.exists(result["report"])
+
+            status, result = _request(server, "/report", {"config": config})
+            assert status == 400 and "input_file" in result["error"]
+
+            # pełna kolejka: odmowa bez czekania
+            server.slots.acquire()
+            status, result = _request(
+                server, "/report", {"config": config, "input_file": csv_path}
+            )
+            assert status == 503 and not result["ok"]
+            server.slots.release()
+
+            status, health = _request(server, "/health")
+            assert status == 200 and health["in_flight"] == 0
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def _crash_on_marker(path, config):
+    if path.endswith("awaria.csv"):
+        os._exit(1)
+    return _run_batch_job(path, config)
+
+
+# 2. Po awarii procesu roboczego serwer odpowiada 503 i dalej obsługuje zadania
+def test_report_server_recovers_from_broken_pool(monkeypatch):
+    monkeypatch.setattr(server_module, "_run_batch_job", _crash_on_marker)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = {
+            "charts": [],
+            "charts_dir": os.path.join(tmpdir, "charts"),
+            "reports_dir": os.path.join(tmpdir, "reports"),
+        }
+        paths = []
+        for name in ("awaria.csv", "dane.csv"):
+            paths.append(os.path.join(tmpdir, name))
+            pd.DataFrame({"wiek": [21, 22]}).to_csv(paths[-1], index=False)
+        server = ReportServer(port=0, workers=1)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            status, result = _request(
+                server, "/report", {"config": config, "input_file": paths[0]}
+            )
+            assert status == 503 and not result["ok"]
+            status, result = _request(
+                server, "/report", {"config": config, "input_file": paths[1]}
+            )
+            assert status == 200 and result["ok"]
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+# 3. Równoległe zadania dla tego samego pliku mają osobne katalogi wykresów i raportów
+def test_report_server_jobs_for_same_file_do_not_share_outputs():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "dane.csv")
+        pd.DataFrame({"miasto": ["Warszawa", "Kraków"]}).to_csv(csv_path, index=False)
+        config = {
+            "charts": [{"type": "bar", "columns": ["miasto"]}],
+            "charts_dir": os.path.join(tmpdir, "charts"),
+            "reports_dir": os.path.join(tmpdir, "reports"),
+        }
+        server = ReportServer(port=0, workers=1)
+        try:
+            body = {"config": config, "input_file": csv_path}
+            first = server.prepare_job(body)[1]
+            second = server.prepare_job(body)[1]
+            assert first["charts_dir"] != second["charts_dir"]
+            assert first["reports_dir"] != second["reports_dir"]
+            futures = [server.submit(csv_path, cfg) for cfg in (first, second)]
+            reports = [f.result()["report"] for f in futures]
+            assert reports[0] != reports[1]
+            assert all(os.path.getsize(r) > 0 for r in reports)
+        finally:
+            server.close()
+
+
+class _FailingPool:
+    def __init__(self, error):
+        self.error = error
+
+    def submit(self, *args):
+        raise self.error
+
+    def shutdown(self, wait=True):
+        pass
+
+
+# 4. Błąd przekazania zadania do puli (także przy ponownej próbie) zwalnia miejsce w kolejce
+def test_report_server_submit_failure_releases_slot(monkeypatch):
+    server = ReportServer(port=0, workers=1, max_pending=1)
+    try:
+        server.executor.shutdown()
+        server.executor = _FailingPool(RuntimeError("pula zamknięta"))
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                server.submit("dane.csv", {})
+            assert server.in_flight == 0
+
+        server.executor = _FailingPool(BrokenProcessPool("awaria"))
+        monkeypatch.setattr(
+            server, "_new_pool", lambda: _FailingPool(RuntimeError("zamykanie"))
+        )
+        with pytest.raises(RuntimeError, match="zamykanie"):
+            server.submit("dane.csv", {})
+        assert server.in_flight == 0
+        assert server.slots.acquire(blocking=False)
+        server.slots.release()
+    finally:
+        server.close()
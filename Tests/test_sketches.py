@@ -0,0 +1,105 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+
+from charts import column_counts
+from csv_utils import file_aggregates, process_csv_file
+from sketches import ColumnSketches, validate_approximate
+
+
+# 1. Szkice łączone z kawałków: liczba różnych wartości, kwantyle i najczęstsze wartości
+def test_sketches_merged_from_chunks_are_close_to_exact():
+    rng = np.random.default_rng(0)
+    n = 200_000
+    df = pd.DataFrame(
+        {
+            "kwota": rng.lognormal(3, 1, n),
+            "klient": rng.integers(0, 50_000, n).astype(str),
+            "miasto": rng.choice(
+                ["Warszawa", "Kraków", "Łódź", "Gdańsk"], n, p=[0.4, 0.3, 0.2, 0.1]
+            ),
+        }
+    )
+    options = validate_approximate(True)
+    merged = ColumnSketches(options)
+    for start in range(0, n, 30_000):
+        part = ColumnSketches(options)
+        part.update(df.iloc[start : start + 30_000])
+        merged.merge(part)
+
+    distinct = merged.distinct_counts()
+    assert distinct["miasto"] == 4
+    assert distinct["klient"] == pytest.approx(df["klient"].nunique(), rel=0.03)
+    assert distinct["kwota"] == pytest.approx(n, rel=0.03)
+
+    # błąd rangi kwantyla rzędu 1%
+    values = np.sort(df["kwota"].to_numpy())
+    for q, estimate in zip(
+        options["quantiles"], merged.quantile["kwota"].quantiles(options["quantiles"])
+    ):
+        rank = np.searchsorted(values, estimate) / n
+        assert abs(rank - q) < 0.02
+
+    counts = merged.frequent["miasto"].top(4)
+    assert counts.to_dict() == df["miasto"].value_counts().to_dict()
+
+
+# 2. Tryb `approximate`: ten sam wynik w pamięci i strumieniowo; bar/pie z top_k
+#    heavy hitters i "Inne", pie_special z dokładnych liczności samych wybranych wartości
+def test_approximate_mode_summary():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(
+        {
+            "produkt": [f"produkt {i}" for i in rng.zipf(1.6, 5000) % 200],
+            "sprzedaz": rng.integers(0, 1000, 5000),
+        }
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "sprzedaz.csv")
+        df.to_csv(csv_path, index=False)
+        config = {
+            "interactive_filter": False,
+            "interactive_sort": False,
+            "cache": False,
+            "approximate": {"top_k": 5, "quantiles": [0.5, 0.9]},
+            "charts": [
+                {"type": "pie", "columns": ["produkt"]},
+                {"type": "pie_special", "column": "produkt", "values": ["produkt 150"]},
+            ],
+        }
+        expected = df["produkt"].value_counts()
+        # dokładny licznik wartości nie powstaje: zostaje tylko wartość z pie_special
+        aggregates = file_aggregates(csv_path, {**config, "chunksize": 700})
+        counted = aggregates["counter"].result()
+        assert counted["produkt"].index.tolist() == ["produkt 150"]
+        for extra in ({}, {"streaming": True, "chunksize": 700}):
+            summary = process_csv_file(csv_path, {**config, **extra})
+            counts = column_counts(summary, "produkt")
+            assert counts.index.tolist() == [*expected.index[:5], "Inne"]
+            # zaniżone najwyżej o wiersze / (10 × top_k + 1), reszta trafia do "Inne"
+            error = expected.iloc[:5].to_numpy() - counts.iloc[:5].to_numpy()
+            assert ((error >= 0) & (error <= len(df) / 51)).all()
+            assert counts.sum() == len(df)
+            special = summary["special_counts"]["produkt"]
+            assert special.to_dict() == {"produkt 150": expected["produkt 150"]}
+            assert summary["distinct_counts"]["produkt"] == pytest.approx(
+                df["produkt"].nunique(), rel=0.02
+            )
+            stats = summary["numerical_summary"]["sprzedaz"]
+            assert stats["p50"] == pytest.approx(df["sprzedaz"].median(), abs=30)
+            assert stats["p90"] == pytest.approx(df["sprzedaz"].quantile(0.9), abs=30)
+            table = summary["column_stats"]
+            assert table.columns.tolist() == [
+                "Kolumna",
+                "Różnych ≈",
+                "p50",
+                "p90",
+                "Najczęstsza",
+            ]
+            assert table["Kolumna"].tolist() == ["produkt", "sprzedaz"]
+            assert table["Najczęstsza"][0].startswith(f"{expected.index[0]} (")
+
+        with pytest.raises(ValueError):
+            process_csv_file(csv_path, {**config, "approximate": {"precision": 30}})
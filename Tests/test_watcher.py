@@ -0,0 +1,94 @@
+import os
+import sys
+import tempfile
+import threading
+import types
+
+from watcher import DirectoryWatcher, _start_notifier
+
+
+def _fake_run(calls):
+    def run(files, config, jobs):
+        calls.append([os.path.basename(f) for f in files])
+        return [{"file": f, "ok": True} for f in files]
+
+    return run
+
+
+def _write(path, text, mtime):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+# 1. Tylko nowe lub zmienione pliki trafiają do pipeline'u, po ustabilizowaniu
+def test_watcher_processes_only_new_or_changed_files():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_dir = os.path.join(tmpdir, "data")
+        os.makedirs(data_dir)
+        config = {"cache_dir": os.path.join(tmpdir, "cache"), "watch_settle": 1}
+        old = 1_700_000_000
+        _write(os.path.join(data_dir, "a.csv"), "x\n1\n", old)
+        _write(os.path.join(data_dir, "b.csv"), "x\n2\n", old)
+
+        calls = []
+        watcher = DirectoryWatcher(data_dir, config, run=_fake_run(calls))
+        # pierwszy skan tylko zapamiętuje stan plików (debounce)
+        assert watcher.poll() == ([], True)
+        watcher.poll()
+        assert calls == [["a.csv", "b.csv"]]
+
+        # plik w trakcie zapisu (świeży mtime) czeka; sam touch nic nie zmienia
+        _write(os.path.join(data_dir, "c.csv"), "x\n3\n", None)
+        os.utime(os.path.join(data_dir, "a.csv"), (old + 5, old + 5))
+        watcher.poll()
+        watcher.poll()
+        assert calls == [["a.csv", "b.csv"]]
+
+        # zmieniona treść i gotowy nowy plik są przetwarzane
+        _write(os.path.join(data_dir, "b.csv"), "x\n2\n4\n", old + 10)
+        _write(os.path.join(data_dir, "c.csv"), "x\n3\n", old)
+        watcher.poll()
+        watcher.poll()
+        assert calls[1:] == [["b.csv", "c.csv"]]
+
+        # indeks przetworzonych plików przetrwa restart
+        calls.clear()
+        again = DirectoryWatcher(data_dir, config, run=_fake_run(calls))
+        again.poll()
+        again.poll()
+        assert calls == []
+
+
+class _FakeObserver:
+    def __init__(self):
+        self.handlers = []
+        self.started = False
+
+    def schedule(self, handler, directory, recursive=False):
+        self.handlers.append((handler, directory))
+
+    def start(self):
+        self.started = True
+
+
+# 2. Z pakietem watchdog zdarzenie w katalogu budzi pętlę; bez niego zostaje skan okresowy
+def test_notifier_wakes_watcher_and_falls_back_to_polling(monkeypatch):
+    events = types.ModuleType("watchdog.events")
+    events.FileSystemEventHandler = object
+    observers = types.ModuleType("watchdog.observers")
+    observers.Observer = _FakeObserver
+    monkeypatch.setitem(sys.modules, "watchdog", types.ModuleType("watchdog"))
+    monkeypatch.setitem(sys.modules, "watchdog.events", events)
+    monkeypatch.setitem(sys.modules, "watchdog.observers", observers)
+
+    wake = threading.Event()
+    observer = _start_notifier("dane", wake)
+    assert observer.started and observer.handlers[0][1] == "dane"
+    observer.handlers[0][0].on_any_event(object())
+    assert wake.is_set()
+
+    # brak pakietu (import kończy się ImportError)
+    monkeypatch.setitem(sys.modules, "watchdog.events", None)
+    assert _start_notifier("dane", threading.Event()) is None
@@ -0,0 +1,411 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def merge_dtype(current: Optional[str], new: str) -> str:
+    """
+    Łączy typy kolumny z kolejnych kawałków tak, jak zrobiłby to pd.read_csv
+    na całym pliku: liczby są promowane (int64 + float64 -> float64),
+    każda inna niezgodność daje 'object'.
+    """
+    if current is None or current == new:
+        return new
+    a, b = np.dtype(current), np.dtype(new)
+    if a.kind in "iuf" and b.kind in "iuf":
+        return str(np.result_type(a, b))
+    return "object"
+
+
+def check_mergeable(current, other, *attrs: str) -> None:
+    """
+    Agregat łączy się tylko z agregatem tego samego typu i ustawień (*attrs*);
+    inaczej zgłaszany jest czytelny błąd zamiast AttributeError w środku merge.
+    """
+    if type(other) is not type(current):
+        raise TypeError(
+            f"Nie można połączyć agregatu {type(current).__name__} "
+            f"z {type(other).__name__} – części powstały z innych ustawień."
+        )
+    for attr in attrs:
+        mine, theirs = getattr(current, attr), getattr(other, attr)
+        if mine != theirs:
+            raise ValueError(
+                f"Nie można połączyć agregatów {type(current).__name__} "
+                f"o różnym '{attr}': {mine!r} i {theirs!r}."
+            )
+
+
+def _skipna(fn, a, b):
+    """min/max dwóch wartości z pominięciem NaN (jak pandas skipna=True)."""
+    if pd.isna(a):
+        return b
+    if pd.isna(b):
+        return a
+    return fn(a, b)
+
+
+class NumericAccumulator:
+    """
+    Jednoprzebiegowe podsumowanie kolumn: liczba wierszy, typy kolumn
+    oraz bieżące sum/count/min/max dla kolumn liczbowych.
+    Zasilany kolejnymi kawałkami DataFrame (update) lub innym akumulatorem (merge).
+    """
+
+    def __init__(self):
+        self.row_count = 0
+        self.column_types: Dict[str, str] = {}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.row_count += len(chunk)
+        for col, dtype in chunk.dtypes.astype(str).items():
+            self.column_types[col] = merge_dtype(self.column_types.get(col), dtype)
+        numeric = chunk.select_dtypes(include=["number"])
+        if numeric.shape[1]:
+            agg = numeric.agg(["sum", "count", "min", "max"])
+            for col in numeric.columns:
+                self._fold(col, *agg[col].tolist())
+
+    def merge(self, other: "NumericAccumulator") -> None:
+        check_mergeable(self, other)
+        self.row_count += other.row_count
+        for col, dtype in other.column_types.items():
+            self.column_types[col] = merge_dtype(self.column_types.get(col), dtype)
+        for col, s in other.stats.items():
+            self._fold(col, s["sum"], s["count"], s["min"], s["max"])
+
+    def _fold(self, col: str, sum_, count, min_, max_) -> None:
+        s = self.stats.get(col)
+        if s is None:
+            self.stats[col] = {"sum": sum_, "count": count, "min": min_, "max": max_}
+            return
+        s["sum"] += sum_
+        s["count"] += count
+        s["min"] = _skipna(min, s["min"], min_)
+        s["max"] = _skipna(max, s["max"], max_)
+
+    def numerical_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Słownik jak summary['numerical_summary'] ze ścieżki w pamięci."""
+        result: Dict[str, Dict[str, Any]] = {}
+        for col, s in self.stats.items():
+            # kolumna, która w którymś kawałku okazała się tekstowa, nie jest liczbowa
+            if np.dtype(self.column_types[col]).kind not in "iuf":
+                continue
+            result[col] = {
+                "sum": s["sum"],
+                "mean": s["sum"] / s["count"] if s["count"] else np.nan,
+                "min": s["min"],
+                "max": s["max"],
+            }
+        return result
+
+
+def value_counts(series: pd.Series) -> pd.Series:
+    """
+    Liczności wartości kolumny w jednym przebiegu: kody kategorii
+    (gotowe dla typu category, w pozostałych przypadkach z pd.factorize)
+    zliczane przez np.bincount. Wynik jak Series.value_counts() (bez NaN, malejąco).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    result = pd.Series(counts, index=uniques, name="count")
+    result = result[result > 0]
+    return result.sort_values(ascending=False, kind="stable")
+
+
+class ValueCounter:
+    """
+    Bieżące liczności wartości wybranych kolumn, zasilane kawałkami danych.
+    *values* ogranicza liczenie kolumny do podanych wartości (pie_special
+    w trybie approximate) – licznik ma wtedy stały rozmiar.
+    """
+
+    def __init__(
+        self, columns: List[str], values: Optional[Dict[str, List[Any]]] = None
+    ):
+        self.values = values or {}
+        self.counts: Dict[str, pd.Series] = {
+            c: pd.Series(dtype="int64") for c in columns
+        }
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for col in self.counts:
+            if col in chunk.columns:
+                counts = value_counts(chunk[col])
+                if col in self.values:
+                    counts = counts[counts.index.isin(self.values[col])]
+                self._add(col, counts)
+
+    def merge(self, other: "ValueCounter") -> None:
+        check_mergeable(self, other, "values")
+        for col, counts in other.counts.items():
+            if col not in self.counts:
+                self.counts[col] = pd.Series(dtype="int64")
+            self._add(col, counts)
+
+    def _add(self, col: str, counts: pd.Series) -> None:
+        current = self.counts[col]
+        if current.empty:
+            self.counts[col] = counts
+        else:
+            # groupby(sort=False) zachowuje kolejność pierwszego wystąpienia wartości
+            combined = pd.concat([current, counts])
+            self.counts[col] = combined.groupby(level=0, sort=False).sum()
+
+    def result(self) -> Dict[str, pd.Series]:
+        return {
+            col: counts.sort_values(ascending=False, kind="stable").rename("count")
+            for col, counts in self.counts.items()
+        }
+
+
+class HeadRows:
+    """Zachowuje tylko pierwsze *n* wierszy strumienia (podgląd do tabeli w PDF)."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.parts: List[pd.DataFrame] = []
+        self.count = 0
+        self.caption = f"pierwsze {n} wierszy"
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.count < self.n:
+            part = chunk.iloc[: self.n - self.count]
+            self.parts.append(part)
+            self.count += len(part)
+
+    def merge(self, other: "HeadRows") -> None:
+        check_mergeable(self, other)
+        for part in other.parts:
+            self.update(part)
+
+    def result(self, columns: List[str]) -> pd.DataFrame:
+        if not self.parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(self.parts)
+
+
+class TailRows:
+    """Ostatnie *n* wierszy strumienia."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.rows: Optional[pd.DataFrame] = None
+        self.caption = f"ostatnie {n} wierszy"
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        part = chunk.tail(self.n)
+        if self.rows is not None:
+            part = pd.concat([self.rows, part]).tail(self.n)
+        self.rows = part
+
+    def merge(self, other: "TailRows") -> None:
+        check_mergeable(self, other)
+        if other.rows is not None:
+            self.update(other.rows)
+
+    def result(self, columns: List[str]) -> pd.DataFrame:
+        return self.rows if self.rows is not None else pd.DataFrame(columns=columns)
+
+
+class RandomSample:
+    """
+    Losowa próba *n* wierszy bez zwracania, w stałej pamięci: każdy wiersz
+    dostaje losowy klucz i zostaje *n* wierszy z najmniejszymi kluczami
+    (wariant reservoir sampling, który da się łączyć między kawałkami i plikami).
+    """
+
+    def __init__(self, n: int, seed: Optional[int] = None):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.rows: Optional[pd.DataFrame] = None
+        self.keys = np.empty(0)
+        self.pos = np.empty(0, dtype=np.int64)
+        self.seen = 0
+        self.caption = f"losowa próba {n} wierszy"
+
+    def update(self, chunk: pd.DataFrame, pos: Optional[np.ndarray] = None) -> None:
+        if pos is None:
+            pos = np.arange(self.seen, self.seen + len(chunk))
+        self.seen += len(chunk)
+        self._keep(chunk, self.rng.random(len(chunk)), pos)
+
+    def merge(self, other: "RandomSample", offset: Optional[int] = None) -> None:
+        """Dołącza próbę z dalszej części danych (pozycje przesunięte o *offset*)."""
+        check_mergeable(self, other)
+        if offset is None:
+            offset = self.seen
+        if other.rows is not None:
+            self._keep(other.rows, other.keys, other.pos + offset)
+        self.seen += other.seen
+
+    def _keep(self, rows: pd.DataFrame, keys: np.ndarray, pos: np.ndarray) -> None:
+        if self.rows is not None:
+            rows = pd.concat([self.rows, rows])
+            keys = np.concatenate([self.keys, keys])
+            pos = np.concatenate([self.pos, pos])
+        if len(keys) > self.n:
+            idx = np.argpartition(keys, self.n - 1)[: self.n] if self.n else []
+            rows, keys, pos = rows.iloc[idx], keys[idx], pos[idx]
+        self.rows, self.keys, self.pos = rows, keys, pos
+
+    def take(self, k: int) -> Tuple[pd.DataFrame, np.ndarray]:
+        """*k* wierszy z najmniejszymi kluczami (też losowa próba) i ich pozycje."""
+        idx = np.argsort(self.keys, kind="stable")[:k]
+        return self.rows.iloc[idx], self.pos[idx]
+
+    def result(self, columns: List[str]) -> pd.DataFrame:
+        if self.rows is None:
+            return pd.DataFrame(columns=columns)
+        return self.rows.iloc[np.argsort(self.pos)]
+
+
+class StratifiedSample:
+    """
+    Próba warstwowa wg kolumny: każda warstwa trzyma własną próbę losową
+    (najwyżej *n* wierszy), a na końcu *n* miejsc dzieli się proporcjonalnie
+    do liczności warstw (metoda największych reszt).
+    """
+
+    def __init__(self, n: int, column: str, seed: Optional[int] = None):
+        self.n = n
+        self.column = column
+        self.seed = seed
+        self.strata: Dict[Any, RandomSample] = {}
+        self.seen = 0
+        self.caption = f"próba {n} wierszy warstwowana wg '{column}'"
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        pos = np.arange(self.seen, self.seen + len(chunk))
+        self.seen += len(chunk)
+        # plik bez tej kolumny (tryb combine) trafia w całości do warstwy braków
+        column = (
+            chunk[self.column]
+            if self.column in chunk.columns
+            else pd.Series(np.nan, index=chunk.index)
+        )
+        codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        for code, value in enumerate(uniques):
+            mask = codes == code
+            sample = self._stratum(value)
+            sample.update(chunk.iloc[mask], pos[mask])
+
+    def merge(self, other: "StratifiedSample") -> None:
+        check_mergeable(self, other, "column")
+        for value, sample in other.strata.items():
+            self._stratum(value).merge(sample, offset=self.seen)
+        self.seen += other.seen
+
+    def _stratum(self, value) -> RandomSample:
+        key = "NaN" if pd.isna(value) else value
+        if key not in self.strata:
+            seed = None if self.seed is None else self.seed + len(self.strata)
+            self.strata[key] = RandomSample(self.n, seed)
+        return self.strata[key]
+
+    def result(self, columns: List[str]) -> pd.DataFrame:
+        if not self.strata:
+            return pd.DataFrame(columns=columns)
+        values = list(self.strata)
+        counts = np.array([self.strata[v].seen for v in values], dtype=float)
+        quota = self.n * counts / counts.sum()
+        alloc = np.floor(quota).astype(int)
+        for i in np.argsort(-(quota - alloc), kind="stable")[: self.n - alloc.sum()]:
+            alloc[i] += 1
+        picked = [self.strata[v].take(k) for v, k in zip(values, alloc) if k]
+        if not picked:
+            return pd.DataFrame(columns=columns)
+        rows = pd.concat([r for r, _ in picked])
+        pos = np.concatenate([p for _, p in picked])
+        return rows.iloc[np.argsort(pos, kind="stable")]
+
+
+class TopRows:
+    """
+    *n* wierszy z największą (lub najmniejszą) wartością kolumny, bez sortowania
+    całości: nlargest/nsmallest na każdym kawałku, potem na połączonych kandydatach.
+    """
+
+    def __init__(self, n: int, column: str, ascending: bool = False):
+        self.n = n
+        self.column = column
+        self.ascending = ascending
+        self.rows: Optional[pd.DataFrame] = None
+        kind = "najmniejszą" if ascending else "największą"
+        self.caption = f"{n} wierszy z {kind} wartością '{column}'"
+
+    def _top(self, df: pd.DataFrame) -> pd.DataFrame:
+        if pd.api.types.is_numeric_dtype(df[self.column]):
+            pick = df.nsmallest if self.ascending else df.nlargest
+            return pick(self.n, self.column)
+        return df.sort_values(
+            self.column, ascending=self.ascending, kind="stable"
+        ).head(self.n)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.column not in chunk.columns:
+            # plik bez tej kolumny (tryb combine): wiersze z brakiem wartości, na końcu
+            chunk = chunk.assign(**{self.column: np.nan})
+        top = self._top(chunk)
+        self.rows = top if self.rows is None else self._top(pd.concat([self.rows, top]))
+
+    def merge(self, other: "TopRows") -> None:
+        check_mergeable(self, other, "column", "ascending")
+        if other.rows is not None:
+            self.update(other.rows)
+
+    def result(self, columns: List[str]) -> pd.DataFrame:
+        return self.rows if self.rows is not None else pd.DataFrame(columns=columns)
+
+
+TABLE_MODES = ("head", "tail", "sample", "stratified", "top")
+
+
+def table_rows(table: Dict[str, Any], default_rows: int, label: str = "tabeli") -> int:
+    """
+    Liczba wierszy tabeli (`rows` z sekcji `table` albo z grupowania); wartość
+    niebędąca liczbą całkowitą >= 1 daje ostrzeżenie i *default_rows*.
+    """
+    n = table.get("rows", default_rows)
+    try:
+        valid = not isinstance(n, bool) and int(n) == float(n) and int(n) >= 1
+    except (TypeError, ValueError):
+        valid = False
+    if not valid:
+        print(
+            f"[WARN] Nieprawidłowa liczba wierszy {label} '{n}' (wymagana liczba całkowita >= 1), używam {default_rows}."
+        )
+        return default_rows
+    return int(n)
+
+
+def make_table_sampler(table: Dict[str, Any], columns: List[str], default_rows: int):
+    """
+    Tworzy selektor wierszy tabeli wg sekcji `table` configu
+    (mode: head | tail | sample | stratified | top, rows, column, order, seed).
+    Przy błędnej konfiguracji ostrzega i wraca do trybu 'head'
+    (a przy błędnym `rows` – do domyślnej liczby wierszy).
+    """
+    n = table_rows(table, default_rows)
+    mode = table.get("mode", "head")
+    column = table.get("column")
+    seed = table.get("seed", 0)
+    if mode not in TABLE_MODES:
+        print(f"[WARN] Nieznany tryb tabeli '{mode}', używam 'head'.")
+        mode = "head"
+    if mode in ("stratified", "top") and column not in columns:
+        print(f"[WARN] Tryb tabeli '{mode}' wymaga istniejącej kolumny, używam 'head'.")
+        mode = "head"
+    if mode == "tail":
+        return TailRows(n)
+    if mode == "sample":
+        return RandomSample(n, seed)
+    if mode == "stratified":
+        return StratifiedSample(n, column, seed)
+    if mode == "top":
+        return TopRows(n, column, ascending=table.get("order", "desc") == "asc")
+    return HeadRows(n)
@@ -0,0 +1,313 @@
+"""
+Benchmark całego pipeline'u CSV -> wykresy -> PDF na syntetycznych danych.
+
+Dla każdej liczby wierszy generuje plik CSV (liczby, polskie nazwy miast o zadanej
+liczbie różnych wartości, wybrane kodowanie), a następnie mierzy osobno etapy:
+wczytanie, podsumowanie, każdy typ wykresu, rysowanie tabeli i zapis PDF.
+Dla każdego etapu zapisywany jest czas i szczyt pamięci (szczytowy RSS procesu na
+Linuksie, poza nim tracemalloc w osobnym przebiegu). Wynik trafia do pliku JSON,
+który można porównać z wynikiem z innego commita (--compare).
+
+Uruchomienie:
+    python benchmarks/pipeline.py --rows 10000 1000000 10000000 --output bench.json
+    python benchmarks/pipeline.py --rows 10000 --compare bench.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import csv_utils  # noqa: E402
+from charts import plan_charts, render_plan  # noqa: E402
+from profiling import peak_rss_mb, reset_peak_rss  # noqa: E402
+from report import PDFReport, generate_pdf_report  # noqa: E402
+
+CITIES = [
+    "Warszawa",
+    "Kraków",
+    "Łódź",
+    "Wrocław",
+    "Poznań",
+    "Gdańsk",
+    "Szczecin",
+    "Bydgoszcz",
+    "Białystok",
+    "Częstochowa",
+    "Zielona Góra",
+    "Świętochłowice",
+    "Żyrardów",
+    "Bielsko-Biała",
+    "Jelenia Góra",
+    "Gorzów Wielkopolski",
+]
+# Wiersze generowane i zapisywane partiami – 10 mln wierszy bez całej ramki w pamięci
+GENERATE_BATCH = 500_000
+
+
+def _labels(cardinality: int) -> np.ndarray:
+    """*cardinality* różnych polskich etykiet: nazwy miast, dalej z numerem dzielnicy."""
+    return np.array(
+        [
+            CITIES[i % len(CITIES)]
+            + ("" if i < len(CITIES) else f" – dzielnica {i // len(CITIES)}")
+            for i in range(cardinality)
+        ],
+        dtype=object,
+    )
+
+
+def generate_csv(
+    path: str,
+    rows: int,
+    numeric: int = 3,
+    text: int = 2,
+    cardinality: int = 50,
+    encoding: str = "utf-8",
+    seed: int = 0,
+) -> str:
+    """
+    Syntetyczny plik CSV: kolumna `lp`, *numeric* kolumn liczbowych (`wartosc_i`)
+    i *text* kolumn tekstowych (`miasto_i`) o *cardinality* różnych wartościach.
+    """
+    rng = np.random.default_rng(seed)
+    labels = _labels(cardinality)
+    with open(path, "w", encoding=encoding, newline="") as fh:
+        for start in range(0, rows, GENERATE_BATCH):
+            n = min(GENERATE_BATCH, rows - start)
+            batch: Dict[str, Any] = {"lp": np.arange(start, start + n)}
+            for i in range(numeric):
+                batch[f"wartosc_{i}"] = np.round(rng.normal(100, 25, n), 2)
+            for i in range(text):
+                batch[f"miasto_{i}"] = labels[rng.integers(0, cardinality, n)]
+            pd.DataFrame(batch).to_csv(fh, index=False, header=start == 0)
+    return path
+
+
+def _config(workdir: str, encoding: str) -> Dict[str, Any]:
+    return {
+        "encoding": encoding,
+        "cache": False,
+        "interactive_filter": False,
+        "interactive_sort": False,
+        "interactive_charts": False,
+        "chart_workers": 1,
+        "charts_dir": os.path.join(workdir, "charts"),
+        "reports_dir": os.path.join(workdir, "reports"),
+        "charts": [
+            {"type": "bar", "columns": ["miasto_0"]},
+            {"type": "line", "columns": ["lp", "wartosc_0"]},
+            {"type": "pie", "columns": ["miasto_0"]},
+            {"type": "pie_special", "column": "miasto_0", "values": CITIES[:2]},
+        ],
+    }
+
+
+def _measure(fn: Callable[[], Any], memory: bool) -> Dict[str, Any]:
+    """
+    Czas i szczyt pamięci etapu. Na Linuksie szczytowy RSS jest mierzony w tym
+    samym przebiegu; gdzie indziej drugi przebieg pod tracemalloc (tylko alokacje
+    Pythona i NumPy, za to bez wpływu na zmierzony czas).
+    """
+    rss = memory and reset_peak_rss()
+    start = time.perf_counter()
+    result = fn()
+    stage: Dict[str, Any] = {"seconds": round(time.perf_counter() - start, 4)}
+    if rss:
+        stage["peak_mb"] = round(peak_rss_mb(), 2)
+    elif memory:
+        tracemalloc.start()
+        try:
+            fn()
+            stage["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    stage["result"] = result
+    return stage
+
+
+def run_stages(path: str, config: Dict[str, Any], memory: bool = True):
+    """Mierzy kolejne etapy pipeline'u dla jednego pliku; zwraca {etap: pomiar}."""
+    os.makedirs(config["charts_dir"], exist_ok=True)
+    stages: Dict[str, Dict[str, Any]] = {}
+    stages["load"] = _measure(lambda: csv_utils.load_csv(path, config), memory)
+    df = stages["load"]["result"]
+
+    original = csv_utils.load_csv
+    csv_utils.load_csv = lambda *args, **kwargs: df
+    try:
+        stages["summary"] = _measure(
+            lambda: csv_utils.process_csv_file(path, config), memory
+        )
+    finally:
+        csv_utils.load_csv = original
+    summary = stages["summary"]["result"]
+
+    charts: List[str] = []
+    for spec in plan_charts(config):
+
+        def draw(spec=spec):
+            summary.pop("value_counts", None)  # każdy wykres liczy własne agregacje
+            return render_plan([spec], summary, config)
+
+        stages[f"chart_{spec['type']}"] = _measure(draw, memory)
+        charts += stages[f"chart_{spec['type']}"]["result"]
+
+    def table():
+        pdf = PDFReport()
+        pdf.add_page()
+        pdf.add_table(summary["table"])
+
+    stages["table"] = _measure(table, memory)
+    stages["pdf"] = _measure(
+        lambda: generate_pdf_report(summary, charts, config), memory
+    )
+    for stage in stages.values():
+        stage.pop("result")
+    return stages
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _warm_up() -> None:
+    """Import matplotlib/Agg i wczytanie czcionki PDF poza pomiarem pierwszego etapu."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+    from matplotlib.figure import Figure  # noqa: F401
+
+    PDFReport().add_page()
+
+
+def run_suite(args) -> Dict[str, Any]:
+    import matplotlib
+
+    _warm_up()
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_dir = args.data_dir or tmpdir
+        os.makedirs(data_dir, exist_ok=True)
+        for rows in args.rows:
+            name = (
+                f"bench_{rows}_{args.numeric}n_{args.text}t_"
+                f"{args.cardinality}c_{args.encoding}.csv"
+            )
+            path = os.path.join(data_dir, name)
+            if not os.path.exists(path):
+                print(f"[INFO] Generuję {name} ...")
+                generate_csv(
+                    path,
+                    rows,
+                    args.numeric,
+                    args.text,
+                    args.cardinality,
+                    args.encoding,
+                )
+            print(f"[INFO] Pomiar: {rows} wierszy")
+            stages = run_stages(
+                path, _config(tmpdir, args.encoding), memory=not args.no_memory
+            )
+            results.append(
+                {
+                    "rows": rows,
+                    "numeric_columns": args.numeric,
+                    "text_columns": args.text,
+                    "cardinality": args.cardinality,
+                    "encoding": args.encoding,
+                    "file_mb": round(os.path.getsize(path) / 2**20, 2),
+                    "stages": stages,
+                }
+            )
+    return {
+        "commit": _git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": {"pandas": pd.__version__, "matplotlib": matplotlib.__version__},
+        "results": results,
+    }
+
+
+def print_results(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    """Tabela czasów; z *baseline* także stosunek do wyniku z innego commita."""
+    previous = {}
+    for r in (baseline or {}).get("results", []):
+        for name, stage in r["stages"].items():
+            previous[(r["rows"], r["encoding"], name)] = stage["seconds"]
+    print(f"\n{'Wiersze':>10}  {'Etap':<18} {'Czas [s]':>9} {'Pamięć [MB]':>12}")
+    for r in report["results"]:
+        for name, stage in r["stages"].items():
+            peak = f"{stage['peak_mb']:.1f}" if "peak_mb" in stage else "-"
+            line = f"{r['rows']:>10}  {name:<18} {stage['seconds']:>9.3f} {peak:>12}"
+            old = previous.get((r["rows"], r["encoding"], name))
+            if old:
+                line += f"  ({stage['seconds'] / old:.2f}x vs {baseline['commit']})"
+            print(line)
+
+
+def main():
+    p = argparse.ArgumentParser("Benchmark pipeline'u CSV -> wykresy -> PDF")
+    p.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 1_000_000, 10_000_000],
+        help="Liczby wierszy do zmierzenia",
+    )
+    p.add_argument("--numeric", type=int, default=3, help="Kolumny liczbowe")
+    p.add_argument("--text", type=int, default=2, help="Kolumny tekstowe")
+    p.add_argument(
+        "--cardinality",
+        type=int,
+        default=50,
+        help="Różne wartości w kolumnie tekstowej",
+    )
+    p.add_argument("--encoding", default="utf-8", choices=["utf-8", "cp1250"])
+    p.add_argument(
+        "--data-dir",
+        help="Katalog na wygenerowane pliki (ponowne użycie między runami)",
+    )
+    p.add_argument("--output", help="Plik JSON z wynikami")
+    p.add_argument("--compare", help="Plik JSON z wcześniejszego uruchomienia")
+    p.add_argument(
+        "--no-memory", action="store_true", help="Bez pomiaru pamięci (szybciej)"
+    )
+    args = p.parse_args()
+
+    report = run_suite(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    print_results(report, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=1)
+        print(f"[INFO] Wyniki zapisano w {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark kosztu startu raportu PDF: renderuje N małych raportów (domyślnie 500)
+raz tak, jak robi to FPDF sam z siebie (czcionka i jej tabele parsowane dla
+każdego dokumentu), a raz z czcionką wczytaną raz na proces.
+
+Uruchomienie: python benchmarks/report_startup.py [--reports 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd  # noqa: E402
+
+import report  # noqa: E402
+
+
+class _PerDocumentFontReport(report.PDFReport):
+    """Zachowanie sprzed cache: pełne add_font i parsowanie TTF w każdym dokumencie."""
+
+    def _add_unicode_font(self, family, font_path):
+        self.add_font(family, "", font_path, uni=True)
+
+    def _putfonts(self):
+        report.FPDF._putfonts(self)
+
+
+def _summary(i: int):
+    df = pd.DataFrame(
+        {
+            "miasto": ["Warszawa", "Kraków", "Gdańsk", "Łódź", "Poznań"],
+            "wiek": [21 + i % 7, 35, 40, 18, 52],
+            "wynik": [1.5, 2.25, 3.0, -1.0, 0.5],
+        }
+    )
+    return {"filename": f"plik_{i}.csv", "row_count": len(df), "dataframe": df}
+
+
+def run(n_reports: int, report_class) -> float:
+    """Czas [s] wygenerowania *n_reports* raportów klasą *report_class*."""
+    original = report.PDFReport
+    report.PDFReport = report_class
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config = {"reports_dir": tmpdir}
+            start = time.perf_counter()
+            for i in range(n_reports):
+                report.generate_pdf_report(_summary(i), [], config)
+            return time.perf_counter() - start
+    finally:
+        report.PDFReport = original
+
+
+def main():
+    p = argparse.ArgumentParser("Benchmark startu raportu PDF")
+    p.add_argument("--reports", type=int, default=500, help="Liczba raportów")
+    args = p.parse_args()
+
+    baseline = run(args.reports, _PerDocumentFontReport)
+    cached = run(args.reports, report.PDFReport)
+    for name, seconds in (
+        ("czcionka w każdym raporcie", baseline),
+        ("czcionka raz na proces", cached),
+    ):
+        print(
+            f"{name:<28} {seconds:8.2f} s  ({1000 * seconds / args.reports:6.1f} ms/raport)"
+        )
+    print(f"Przyspieszenie: {baseline / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
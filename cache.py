@@ -0,0 +1,544 @@
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_CACHE_DIR = ".pyreport_cache"
+
+
+def cache_enabled(config: Dict[str, Any]) -> bool:
+    """Czy cache danych, kodowań i wykresów jest włączony (`cache: true` w configu, domyślnie nie)."""
+    return bool(config.get("cache", False))
+
+
+def state_enabled(config: Dict[str, Any]) -> bool:
+    """
+    Czy zapisywać stan trybów `incremental` i `--watch`. Bez stanu te tryby
+    nie działają, więc wyłącza go tylko jawne `cache: false` (lub --no-cache).
+    """
+    return bool(config.get("cache", True))
+
+
+def cache_path(config: Dict[str, Any], *parts: str) -> str:
+    """Ścieżka wewnątrz katalogu cache (`cache_dir`, domyślnie .pyreport_cache)."""
+    return os.path.join(config.get("cache_dir", DEFAULT_CACHE_DIR), *parts)
+
+
+def file_fingerprint(path: str) -> Dict[str, Any]:
+    """Klucz pliku: ścieżka bezwzględna, rozmiar i czas modyfikacji (ns)."""
+    st = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def load_json(path: str, default: Any) -> Any:
+    """Wczytuje plik JSON; przy braku lub uszkodzeniu zwraca *default*."""
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: str, data: Any) -> None:
+    """Atomowo zapisuje JSON (plik tymczasowy + os.replace)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Wyłączna blokada pliku *path* między procesami (fcntl / msvcrt)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+b") as fh:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def locked_json(path: str, default: Any):
+    """
+    Odczyt-zmiana-zapis pliku JSON pod blokadą, żeby równoległe procesy
+    (--jobs, serwer) nie gubiły sobie nawzajem zmian.
+    """
+    with _file_lock(f"{path}.lock"):
+        data = load_json(path, default)
+        yield data
+        save_json(path, data)
+
+
+def merge_lru_entries(
+    current: Dict[str, Any], local: Dict[str, Any], exists: Callable[[str], bool]
+) -> None:
+    """
+    Dopisuje do *current* (stan z dysku) wpisy LRU z *local* (kopia wczytana
+    wcześniej przez ten proces): nowszy `last_used` wygrywa, a wpisu, który inny
+    proces w międzyczasie usunął razem z plikiem, nie przywracamy.
+    """
+    for key, entry in local.items():
+        known = current.get(key)
+        if known is None and not exists(key):
+            continue
+        if known is None or entry["last_used"] > known["last_used"]:
+            current[key] = entry
+
+
+# Limit pliku encodings.json (wpisy najdawniej używane są usuwane)
+DEFAULT_ENCODING_CACHE_MAX_MB = 1
+
+
+def _encodings_path(config: Dict[str, Any]) -> str:
+    return cache_path(config, "encodings.json")
+
+
+def _encoding_matches(entry: Optional[Dict[str, Any]], fp: Dict[str, Any]) -> bool:
+    return bool(
+        entry
+        and entry.get("size") == fp["size"]
+        and entry.get("mtime_ns") == fp["mtime_ns"]
+    )
+
+
+def get_cached_encoding(
+    path: str, preferred: Optional[str], config: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Zwraca zapamiętane kodowanie pliku, jeśli plik się nie zmienił
+    (ten sam rozmiar i mtime) i wykrycie odbyło się przy tym samym `encoding` z configu.
+    """
+    if not cache_enabled(config):
+        return None
+    fp = file_fingerprint(path)
+    entry = load_json(_encodings_path(config), {}).get(fp["path"])
+    if not _encoding_matches(entry, fp) or entry.get("preferred") != preferred:
+        return None
+    try:
+        with locked_json(_encodings_path(config), {}) as index:
+            if fp["path"] in index:
+                index[fp["path"]]["last_used"] = time.time()
+    except OSError:
+        pass
+    return entry.get("encoding")
+
+
+def _prune_encodings(index: Dict[str, Any], config: Dict[str, Any]) -> None:
+    """
+    Usuwa wpisy plików usuniętych lub zmienionych od wykrycia, a potem
+    najdawniej używane, aż plik zmieści się w `encoding_cache_max_mb`.
+    """
+    for path in list(index):
+        try:
+            fp = file_fingerprint(path)
+        except OSError:
+            fp = None
+        if fp is None or not _encoding_matches(index[path], fp):
+            del index[path]
+    for entry in index.values():
+        # wpisy sprzed limitu nie miały rozmiaru ani czasu użycia
+        entry.setdefault("last_used", 0)
+        entry.setdefault("bytes", len(json.dumps(entry, ensure_ascii=False)))
+    evict_lru(
+        index,
+        config.get("encoding_cache_max_mb", DEFAULT_ENCODING_CACHE_MAX_MB),
+        lambda path: None,
+    )
+
+
+def store_encoding(
+    path: str, encoding: str, preferred: Optional[str], config: Dict[str, Any]
+) -> None:
+    """Zapamiętuje wykryte kodowanie pliku w `encodings.json` (i przycina plik)."""
+    if not cache_enabled(config):
+        return
+    fp = file_fingerprint(path)
+    entry = {
+        "size": fp["size"],
+        "mtime_ns": fp["mtime_ns"],
+        "preferred": preferred,
+        "encoding": encoding,
+        "last_used": time.time(),
+    }
+    # przybliżony rozmiar wpisu w pliku JSON, dla limitu LRU
+    entry["bytes"] = len(json.dumps({fp["path"]: entry}, ensure_ascii=False))
+    try:
+        with locked_json(_encodings_path(config), {}) as index:
+            index[fp["path"]] = entry
+            _prune_encodings(index, config)
+    except OSError as e:
+        print(f"[WARN] Nie udało się zapisać cache kodowań ({e}).")
+
+
+DEFAULT_CACHE_MAX_MB = 1024
+# Pliki danych nieobecne w indeksie (np. po wyścigu procesów) są usuwane dopiero po tym czasie
+ORPHAN_GRACE_SECONDS = 3600
+
+
+def content_hash(path: str, block_size: int = 1 << 20) -> str:
+    """Skrót BLAKE2b zawartości pliku (czytanie blokami, bez parsowania)."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _data_index_path(config: Dict[str, Any]) -> str:
+    return cache_path(config, "data", "index.json")
+
+
+def _load_data_index(config: Dict[str, Any]) -> Dict[str, Any]:
+    index = load_json(_data_index_path(config), {})
+    index.setdefault("files", {})
+    index.setdefault("entries", {})
+    return index
+
+
+def _lookup_hash(path: str, index: Dict[str, Any]) -> str:
+    """
+    Skrót zawartości pliku. Jeśli rozmiar i mtime się nie zmieniły,
+    bierze go z indeksu bez ponownego czytania pliku.
+    """
+    fp = file_fingerprint(path)
+    known = index["files"].get(fp["path"])
+    if known and known["size"] == fp["size"] and known["mtime_ns"] == fp["mtime_ns"]:
+        return known["hash"]
+    digest = content_hash(path)
+    index["files"][fp["path"]] = {
+        "size": fp["size"],
+        "mtime_ns": fp["mtime_ns"],
+        "hash": digest,
+    }
+    return digest
+
+
+def parse_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ustawienia parsowania, od których zależy zawartość wpisu cache kolumnowego:
+    wymuszone `encoding` i parser CSV (`optimize_dtypes.engine`).
+    """
+    options = config.get("optimize_dtypes")
+    engine = options.get("engine", "c") if isinstance(options, dict) else "c"
+    return {"encoding": config.get("encoding"), "engine": engine}
+
+
+def load_parsed_cache(
+    path: str,
+    config: Dict[str, Any],
+    columns: Optional[List[str]] = None,
+    mask: Optional[Callable] = None,
+    mask_columns: Optional[List[str]] = None,
+):
+    """
+    Zwraca DataFrame z cache kolumnowego (Feather, mapowany w pamięci; przy *columns*
+    tylko te kolumny) albo None, gdy cache jest wyłączony, nieaktualny (inna
+    zawartość pliku, inne `encoding` lub parser CSV), nie ma potrzebnych kolumn
+    lub brak pyarrow.
+    *mask* (funkcja DataFrame -> maska wierszy) liczona jest tylko na kolumnach
+    *mask_columns*; do pandas trafiają wyłącznie wybrane wiersze.
+    """
+    if not cache_enabled(config) or config.get("rebuild_cache"):
+        return None
+    try:
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    index = _load_data_index(config)
+    digest = _lookup_hash(path, index)
+    entry = index["entries"].get(digest)
+    data_file = cache_path(config, "data", f"{digest}.feather")
+    if (
+        not entry
+        # wpis sparsowany z innym kodowaniem lub parserem to inne dane
+        or entry.get("parse") != parse_settings(config)
+        or not os.path.exists(data_file)
+        or (columns is None and entry.get("partial"))
+        or not set(columns or ()) | set(mask_columns or ()) <= set(entry["dtypes"])
+    ):
+        # zapisany skrót oszczędzi ponownego czytania pliku w store_parsed_cache
+        _save_data_index(index, config)
+        return None
+    try:
+        table = feather.read_table(data_file, memory_map=True)
+        if mask is None:
+            df = _entry_frame(table, columns, entry)
+    except Exception as e:
+        print(f"[WARN] Uszkodzony wpis cache {data_file} ({e}), wczytuję CSV.")
+        return None
+    if mask is not None:
+        # filtr liczony na samych kolumnach filtrów, reszta tylko dla trafionych wierszy
+        keep = np.asarray(mask(_entry_frame(table, mask_columns, entry)), dtype=bool)
+        df = _entry_frame(table.filter(pa.array(keep)), columns, entry)
+        df.index = np.flatnonzero(keep)
+    entry["last_used"] = time.time()
+    _save_data_index(index, config)
+    return df
+
+
+def _entry_frame(table, columns: Optional[List[str]], entry: Dict[str, Any]):
+    """Kolumny tabeli Arrow jako DataFrame o typach jak z read_csv."""
+    import numpy as np
+
+    if columns is not None:
+        table = table.select(columns)
+    df = table.to_pandas()
+    # Arrow zamienia brakujące teksty na None; read_csv daje NaN
+    for col, dtype in entry["dtypes"].items():
+        if dtype == "object" and col in df.columns:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def store_parsed_cache(
+    path: str, df, encoding: str, config: Dict[str, Any], partial: bool = False
+) -> None:
+    """
+    Zapisuje sparsowany DataFrame jako Feather (klucz: skrót zawartości pliku)
+    razem z kodowaniem i typami kolumn, po czym przycina cache do `cache_max_mb`.
+    *partial* oznacza, że wczytano tylko część kolumn pliku.
+    """
+    if not cache_enabled(config):
+        return
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("[WARN] Brak pakietu pyarrow – cache kolumnowy jest wyłączony.")
+        return
+    index = _load_data_index(config)
+    digest = _lookup_hash(path, index)
+    data_file = cache_path(config, "data", f"{digest}.feather")
+    os.makedirs(os.path.dirname(data_file), exist_ok=True)
+    tmp = f"{data_file}.{os.getpid()}.tmp"
+    try:
+        # bez kompresji: odczyt z memory_map nie musi dekompresować kolumn
+        df.to_feather(tmp, compression="uncompressed")
+        os.replace(tmp, data_file)
+    except Exception as e:
+        # np. kolumna z mieszanymi typami, której Arrow nie umie zapisać
+        print(f"[WARN] Nie udało się zapisać cache dla {path} ({e}).")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+    index["entries"][digest] = {
+        "source": os.path.abspath(path),
+        "encoding": encoding,
+        "parse": parse_settings(config),
+        "dtypes": df.dtypes.astype(str).to_dict(),
+        "partial": partial,
+        "bytes": os.path.getsize(data_file),
+        "last_used": time.time(),
+    }
+    _save_data_index(index, config, evict=True)
+
+
+def evict_lru(entries: Dict[str, Any], limit_mb: float, remove) -> None:
+    """
+    Usuwa z *entries* ({klucz: {"bytes", "last_used"}}) najdawniej używane wpisy,
+    aż suma rozmiarów zmieści się w *limit_mb*; *remove(klucz)* kasuje plik wpisu.
+    """
+    limit = float(limit_mb) * 1024 * 1024
+    total = sum(e["bytes"] for e in entries.values())
+    for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+        if total <= limit:
+            break
+        total -= entries[key]["bytes"]
+        del entries[key]
+        remove(key)
+
+
+def evict_parsed_cache(index: Dict[str, Any], config: Dict[str, Any]) -> None:
+    """Usuwa najdawniej używane wpisy, aż cache zmieści się w `cache_max_mb`."""
+    entries = index["entries"]
+    evict_lru(
+        entries,
+        config.get("cache_max_mb", DEFAULT_CACHE_MAX_MB),
+        lambda d: _remove_quietly(cache_path(config, "data", f"{d}.feather")),
+    )
+    referenced = set(entries)
+    index["files"] = {
+        p: f for p, f in index["files"].items() if f["hash"] in referenced
+    }
+    data_dir = cache_path(config, "data")
+    now = time.time()
+    for name in os.listdir(data_dir):
+        full = os.path.join(data_dir, name)
+        if (
+            name.endswith(".feather")
+            and name[: -len(".feather")] not in referenced
+            and now - os.path.getmtime(full) > ORPHAN_GRACE_SECONDS
+        ):
+            _remove_quietly(full)
+
+
+def _save_data_index(
+    index: Dict[str, Any], config: Dict[str, Any], evict: bool = False
+) -> None:
+    """
+    Dopisuje zmiany z *index* do indeksu na dysku (pod blokadą);
+    przy *evict* przycina cache do `cache_max_mb`.
+    """
+    try:
+        with locked_json(_data_index_path(config), {}) as current:
+            current.setdefault("files", {}).update(index["files"])
+            merge_lru_entries(
+                current.setdefault("entries", {}),
+                index["entries"],
+                lambda d: os.path.exists(cache_path(config, "data", f"{d}.feather")),
+            )
+            if evict:
+                evict_parsed_cache(current, config)
+    except OSError as e:
+        print(f"[WARN] Nie udało się zapisać indeksu cache ({e}).")
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+DEFAULT_CHART_CACHE_MAX_MB = 256
+
+
+def load_chart_manifest(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Manifest cache wykresów: {klucz: {"bytes", "last_used"}}."""
+    return load_json(cache_path(config, "charts", "manifest.json"), {})
+
+
+def fetch_chart(
+    manifest: Dict[str, Any], key: str, dest: str, config: Dict[str, Any]
+) -> bool:
+    """Kopiuje zapamiętany PNG o kluczu *key* do *dest*; False, gdy go nie ma."""
+    if key not in manifest:
+        return False
+    try:
+        shutil.copyfile(cache_path(config, "charts", f"{key}.png"), dest)
+    except OSError:
+        # brak pliku, także usuniętego przez LRU innego procesu – wykres zostanie narysowany
+        return False
+    manifest[key]["last_used"] = time.time()
+    return True
+
+
+def store_chart(
+    manifest: Dict[str, Any], key: str, src: str, config: Dict[str, Any]
+) -> None:
+    """Zapamiętuje świeżo narysowany PNG pod kluczem *key*."""
+    dest = cache_path(config, "charts", f"{key}.png")
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+    manifest[key] = {"bytes": os.path.getsize(dest), "last_used": time.time()}
+
+
+def save_chart_manifest(manifest: Dict[str, Any], config: Dict[str, Any]) -> None:
+    """
+    Dopisuje zmiany z *manifest* do manifestu na dysku (pod blokadą)
+    i przycina cache wykresów do `chart_cache_max_mb`.
+    """
+    try:
+        with locked_json(cache_path(config, "charts", "manifest.json"), {}) as current:
+            merge_lru_entries(
+                current,
+                manifest,
+                lambda k: os.path.exists(cache_path(config, "charts", f"{k}.png")),
+            )
+            evict_lru(
+                current,
+                config.get("chart_cache_max_mb", DEFAULT_CHART_CACHE_MAX_MB),
+                lambda k: _remove_quietly(cache_path(config, "charts", f"{k}.png")),
+            )
+    except OSError as e:
+        print(f"[WARN] Nie udało się zapisać manifestu cache wykresów ({e}).")
+
+
+# Zmień przy zmianie zawartości stanu trybu przyrostowego – stare pliki stanu są pomijane
+INCREMENTAL_STATE_VERSION = 6
+# Ile bajtów z początku i z końca przetworzonej części pliku sprawdzamy, czy plik nie został nadpisany
+APPEND_CHECK_BYTES = 1 << 16
+
+
+def _incremental_state_path(path: str, config: Dict[str, Any]) -> str:
+    key = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=16)
+    return cache_path(config, "state", f"{key.hexdigest()}.pkl")
+
+
+def appended_prefix_hash(path: str, offset: int) -> str:
+    """
+    Skrót początku i końca pierwszych *offset* bajtów pliku. Jeśli po dopisaniu
+    wierszy skrót się zgadza, przetworzona część pliku nie została nadpisana.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        h.update(fh.read(min(offset, APPEND_CHECK_BYTES)))
+        start = max(0, offset - APPEND_CHECK_BYTES)
+        fh.seek(start)
+        h.update(fh.read(offset - start))
+    return h.hexdigest()
+
+
+def load_incremental_state(
+    path: str, config: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Zapisany stan trybu przyrostowego dla pliku albo None (brak, wyłączony cache, --rebuild-cache)."""
+    if not state_enabled(config) or config.get("rebuild_cache"):
+        return None
+    try:
+        with open(_incremental_state_path(path, config), "rb") as fh:
+            state = pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != INCREMENTAL_STATE_VERSION:
+        return None
+    return state
+
+
+def save_incremental_state(
+    path: str, state: Dict[str, Any], config: Dict[str, Any]
+) -> None:
+    """Atomowo zapisuje stan trybu przyrostowego (offset, agregaty) w `cache_dir/state`."""
+    if not state_enabled(config):
+        return
+    target = _incremental_state_path(path, config)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp, "wb") as fh:
+            pickle.dump(
+                {**state, "version": INCREMENTAL_STATE_VERSION},
+                fh,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, target)
+    except OSError as e:
+        print(f"[WARN] Nie udało się zapisać stanu trybu przyrostowego ({e}).")
+        _remove_quietly(tmp)
@@ -1,105 +1,494 @@
+import functools
+import hashlib
 import os
-import matplotlib.pyplot as plt
-from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
+from aggregation import value_counts
+from profiling import enabled as profiling_enabled, merge, run_profiled, span
+from cache import (
+    cache_enabled,
+    fetch_chart,
+    load_chart_manifest,
+    save_chart_manifest,
+    store_chart,
+)
+
+# Zmień przy każdej zmianie wyglądu wykresów w render_chart – unieważnia cache PNG
+CHART_STYLE_VERSION = 1
+# Szerokość PNG wykresu w pikselach (Figure domyślnie 6.4 cala × 100 dpi)
+CHART_WIDTH_PX = 640
+# Domyślny limit punktów wykresu liniowego: pierwszy, ostatni, min i max na kolumnę pikseli
+DEFAULT_LINE_POINTS = 4 * CHART_WIDTH_PX
+# Domyślnie pula procesów dopiero od tylu wykresów: każdy proces roboczy sam
+# importuje matplotlib (~0.7 s), a typowy wykres rysuje się w ~0.1 s
+PARALLEL_MIN_CHARTS = 16
+
+# Wykresy rysujemy obiektowo (Figure + FigureCanvasAgg), bez globalnego stanu pyplot,
+# więc działa to bez ekranu (cron, EC2) i bezpiecznie w procesach roboczych.
+
+
+def counted_columns(
+    config: Dict[str, Any], types: Tuple[str, ...] = ("bar", "pie", "pie_special")
+) -> List[str]:
+    """Kolumny, których liczności wartości potrzebują wykresy *types* z configu."""
+    columns: List[str] = []
+    for chart in config.get("charts") or []:
+        t = chart.get("type")
+        if t not in types:
+            continue
+        if t in ("bar", "pie") and len(chart.get("columns") or []) == 1:
+            columns.append(chart["columns"][0])
+        elif t == "pie_special" and chart.get("column"):
+            columns.append(chart["column"])
+    return list(dict.fromkeys(columns))
+
+
+def special_values(config: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Wartości wykresów pie_special z configu: {kolumna: [wartości]}."""
+    values: Dict[str, List[Any]] = {}
+    for chart in config.get("charts") or []:
+        if chart.get("type") == "pie_special" and chart.get("column"):
+            values.setdefault(chart["column"], []).extend(chart.get("values") or [])
+    return {col: list(dict.fromkeys(v)) for col, v in values.items()}
+
+
+def chart_columns(config: Dict[str, Any]) -> List[str]:
+    """Wszystkie kolumny, których używają wykresy z configu."""
+    columns: List[str] = []
+    for chart in config.get("charts") or []:
+        columns += chart.get("columns") or []
+        if chart.get("column"):
+            columns.append(chart["column"])
+    return list(dict.fromkeys(columns))
+
+
+def column_counts(summary: Dict[str, Any], column: str) -> pd.Series:
+    """
+    Liczności wartości kolumny, liczone raz na podsumowanie i współdzielone
+    przez wszystkie wykresy (cache w summary['value_counts']; w trybie
+    strumieniowym wypełniany już podczas czytania pliku).
+    """
+    cache = summary.setdefault("value_counts", {})
+    if column not in cache:
+        cache[column] = value_counts(summary["dataframe"][column])
+    return cache[column]
+
+
+def _bar_job(counts: pd.Series, title: str, path: str) -> Dict[str, Any]:
+    return {
+        "kind": "bar",
+        "labels": [str(v) for v in counts.index],
+        "values": counts.tolist(),
+        "title": title,
+        "path": path,
+    }
+
+
+def _pie_job(
+    labels: List[Any], sizes: List[Any], title: str, path: str
+) -> Dict[str, Any]:
+    return {
+        "kind": "pie",
+        "labels": [str(v) for v in labels],
+        "values": list(sizes),
+        "title": title,
+        "path": path,
+    }
+
+
+def downsample_line(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indeksy punktów linii po redukcji do najwyżej *max_points* (min/max na kubełek):
+    punkty dzielone są na max_points // 4 kubełków (kolumn pikseli) i z każdego
+    zostaje pierwszy, ostatni, najmniejszy i największy punkt. Narysowana linia
+    wygląda tak samo jak z wszystkich punktów. Kubełki wg wartości x, gdy oś
+    jest liczbowa i rosnąca, w przeciwnym razie wg pozycji punktu.
+    """
+    n = len(y)
+    # tekstowa oś Y (matplotlib rysuje ją jako kategorie) – bez redukcji
+    if not max_points or n <= max_points or y.dtype.kind not in "iufb":
+        return np.arange(n)
+    buckets = max(max_points // 4, 1)
+    y = np.asarray(y, dtype=np.float64)
+    bucket = None
+    if x.dtype.kind in "iufmM":
+        xs = x.view(np.int64) if x.dtype.kind in "mM" else x.astype(np.float64)
+        span_ = xs[-1] - xs[0]
+        if span_ > 0 and np.all(xs[1:] >= xs[:-1]):
+            bucket = ((xs - xs[0]) / span_ * buckets).astype(np.int64)
+            bucket = np.minimum(bucket, buckets - 1)
+    if bucket is None:
+        bucket = np.arange(n) * buckets // n
+    # kubełki są niemalejące: granice tam, gdzie zmienia się numer kubełka
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    # NaN nie wygrywa min/max (fmin/fmax), więc przerwy w danych nie gubią kubełka
+    lo = np.fmin.reduceat(y, starts)
+    hi = np.fmax.reduceat(y, starts)
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    keep = [starts, ends]
+    for extreme in (lo, hi):
+        hits = np.flatnonzero(y == extreme[segment])
+        # pierwsze trafienie w każdym kubełku
+        first = np.r_[True, segment[hits[1:]] != segment[hits[:-1]]]
+        keep.append(hits[first])
+    return np.unique(np.concatenate(keep))
+
+
+def _line_job(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    title: str,
+    path: str,
+    max_points: int = DEFAULT_LINE_POINTS,
+) -> Dict[str, Any]:
+    xs, ys = df[x].to_numpy(), df[y].to_numpy()
+    idx = downsample_line(xs, ys, max_points)
+    job = {
+        "kind": "line",
+        "x": xs[idx],
+        "y": ys[idx],
+        "xlabel": x,
+        "ylabel": y,
+        "title": title,
+        "path": path,
+    }
+    if xs.dtype.kind not in "iufmM":
+        # oś kategoryczna: pozycje punktów w pełnych danych
+        job["positions"] = idx
+        job["points"] = len(xs)
+    return job
+
+
+def render_chart(job: Dict[str, Any]) -> str:
+    """Rysuje jeden wykres z gotowych (zagregowanych) danych i zapisuje PNG."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(layout="tight")
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    kind = job["kind"]
+    if kind == "bar":
+        positions = range(len(job["values"]))
+        ax.bar(positions, job["values"], width=0.5)
+        ax.set_xticks(list(positions), job["labels"], rotation=90)
+    elif kind == "pie":
+        ax.pie(job["values"], labels=job["labels"], autopct="%1.1f%%")
+    elif kind == "line":
+        x = job["x"]
+        if x.dtype.kind in "iufmM":
+            ax.plot(x, job["y"], label=job["ylabel"])
+        else:
+            # oś kategoryczna jak w DataFrame.plot: pozycje + etykiety
+            positions = job.get("positions", range(len(x)))
+            ax.plot(positions, job["y"], label=job["ylabel"])
+            if job.get("points", len(x)) <= 50:
+                ax.set_xticks(
+                    list(positions), [str(v) for v in x], rotation=45, ha="right"
+                )
+        ax.set_xlabel(job["xlabel"])
+        ax.legend()
+    else:
+        raise ValueError(f"Nieznany rodzaj wykresu: {kind}")
+    ax.set_title(job["title"])
+    fig.savefig(job["path"])
+    return job["path"]
+
+
+def _render_safely(job: Dict[str, Any]) -> Optional[str]:
+    points = len(job.get("x", job.get("values", [])))
+    with span("render_chart", kind=job["kind"], path=job["path"], points=points):
+        try:
+            return render_chart(job)
+        except Exception as e:
+            print(f"[AUTO][WARN] Błąd przy generowaniu wykresu {job['path']}:", e)
+            return None
+
+
+def _render_profiled(job: Dict[str, Any]):
+    """_render_safely w procesie roboczym z profilowaniem (--profile)."""
+    return run_profiled(_render_safely, job)
+
+
+def _available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def chart_workers(config: Dict[str, Any], n_jobs: int) -> int:
+    """
+    Liczba procesów do rysowania. `chart_workers` z configu jest brane wprost;
+    bez niego wykresy rysuje bieżący proces, a pula (proces na dostępny rdzeń)
+    powstaje dopiero od PARALLEL_MIN_CHARTS wykresów.
+    """
+    workers = config.get("chart_workers")
+    if not workers:
+        if n_jobs < PARALLEL_MIN_CHARTS:
+            return 1
+        workers = _available_cpus()
+    return max(1, min(int(workers), n_jobs))
+
+
+@functools.lru_cache(maxsize=None)
+def _matplotlib_version() -> str:
+    """Wersja matplotlib z metadanych pakietu – trafienie w cache wykresów nie importuje matplotlib."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("matplotlib")
+    except PackageNotFoundError:
+        import matplotlib
+
+        return matplotlib.__version__
+
+
+def chart_fingerprint(job: Dict[str, Any]) -> str:
+    """
+    Klucz treści wykresu: zagregowane dane + specyfikacja + styl (wersja
+    matplotlib i CHART_STYLE_VERSION). Ścieżka docelowa nie wchodzi do klucza.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{CHART_STYLE_VERSION}|{_matplotlib_version()}".encode())
+    for name in sorted(job):
+        if name in ("path", "label"):
+            continue
+        value = job[name]
+        h.update(name.encode())
+        if isinstance(value, np.ndarray):
+            h.update(str(value.dtype).encode())
+            h.update(pd.util.hash_array(value).tobytes())
+        else:
+            h.update(repr(value).encode())
+    return h.hexdigest()
+
+
+def render_charts(
+    jobs: List[Dict[str, Any]],
+    workers: int = 1,
+    config: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """
+    Rysuje listę wykresów, przy workers > 1 w puli procesów. Wykresy, których
+    dane i specyfikacja się nie zmieniły, są kopiowane z cache zamiast rysowane.
+    Zwraca ścieżki udanych wykresów w kolejności zadań.
+    """
+    config = config or {}
+    use_cache = cache_enabled(config)
+    keys = [chart_fingerprint(job) if use_cache else None for job in jobs]
+    manifest = load_chart_manifest(config) if use_cache else {}
+    done: Dict[str, Optional[str]] = {}
+    todo = []
+    for job, key in zip(jobs, keys):
+        if key and fetch_chart(manifest, key, job["path"], config):
+            done[job["path"]] = job["path"]
+        else:
+            todo.append((job, key))
+
+    if workers <= 1 or len(todo) <= 1:
+        results = [_render_safely(job) for job, _ in todo]
+    elif profiling_enabled():
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = []
+            for path, events in executor.map(
+                _render_profiled, [job for job, _ in todo]
+            ):
+                results.append(path)
+                merge(events)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_render_safely, [job for job, _ in todo]))
+    for (job, key), path in zip(todo, results):
+        done[job["path"]] = path
+        if key and path:
+            store_chart(manifest, key, path, config)
+    if use_cache and jobs:
+        save_chart_manifest(manifest, config)
+    return [p for p in (done[job["path"]] for job in jobs) if p]
+
+
+def render_cached(job: Dict[str, Any], config: Dict[str, Any]) -> str:
+    """Jeden wykres przez cache PNG; błąd rysowania jest zgłaszany wyjątkiem."""
+    if not cache_enabled(config):
+        return render_chart(job)
+    key = chart_fingerprint(job)
+    manifest = load_chart_manifest(config)
+    if not fetch_chart(manifest, key, job["path"], config):
+        render_chart(job)
+        store_chart(manifest, key, job["path"], config)
+    save_chart_manifest(manifest, config)
+    return job["path"]
+
+
+def _special_pie_job(
+    counts: pd.Series, total: int, column: str, values: List[str], charts_dir: str
+) -> Dict[str, Any]:
+    wybrane_counts = [int(c) for c in counts.reindex(values, fill_value=0)]
+    inne = total - sum(wybrane_counts)
+    return _pie_job(
+        list(values) + ["Inne"],
+        wybrane_counts + [inne],
+        f"Udział wybranych wartości z kolumny '{column}' na tle całości",
+        os.path.join(charts_dir, f"chart_udzial_{column}.png"),
+    )
 
 
 def generate_special_pie_chart(
-    df: pd.DataFrame, column: str, values: List[str], charts_dir: str
+    df: pd.DataFrame,
+    column: str,
+    values: List[str],
+    charts_dir: str,
+    config: Optional[Dict[str, Any]] = None,
 ) -> str:
     """
     Generuje wykres udziału wybranych wartości na tle wszystkich (pie chart z grupą "Inne")
     """
-    wybrane_counts = [(df[column] == v).sum() for v in values]
-    inne = len(df) - sum(wybrane_counts)
-    labels = list(values) + ["Inne"]
-    sizes = wybrane_counts + [inne]
-    plt.figure()
-    plt.pie(sizes, labels=labels, autopct="%1.1f%%")
-    plt.title(f"Udział wybranych wartości z kolumny '{column}' na tle całości")
-    path = os.path.join(charts_dir, f"chart_udzial_{column}.png")
-    plt.savefig(path)
-    plt.close()
+    job = _special_pie_job(
+        value_counts(df[column]), len(df), column, values, charts_dir
+    )
+    path = render_cached(job, config or {})
     print(f"[AUTO] Wygenerowano wykres udziału: {path}")
     return path
 
 
-def generate_charts(summary: Dict[str, Any], config: Dict[str, Any]) -> List[str]:
+def plan_charts(
+    config: Dict[str, Any], types: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Etap planowania: zamienia `charts` z configu na listę wykresów bez duplikatów,
+    kluczowanych (typ, kolumny, wartości). Błędne wpisy są zgłaszane i pomijane;
+    `index` to pozycja pierwszego wystąpienia (używana w nazwie pliku).
+    """
+    plan: List[Dict[str, Any]] = []
+    seen = set()
+    for i, chart in enumerate(config.get("charts") or []):
+        t = chart.get("type")
+        if types is not None and t not in types:
+            continue
+        if t == "pie_special":
+            col, values = chart.get("column"), chart.get("values")
+            if not (col and values):
+                print("[AUTO][WARN] Nieprawidłowa konfiguracja pie_special.")
+                continue
+            spec = {"type": t, "columns": (col,), "values": tuple(values)}
+        elif t in ("bar", "pie") and len(chart.get("columns") or []) == 1:
+            spec = {"type": t, "columns": tuple(chart["columns"]), "values": None}
+        elif t == "line" and len(chart.get("columns") or []) == 2:
+            spec = {"type": t, "columns": tuple(chart["columns"]), "values": None}
+            max_points = chart.get("max_points", DEFAULT_LINE_POINTS)
+            valid = isinstance(max_points, int) and not isinstance(max_points, bool)
+            if not valid or (max_points != 0 and max_points < 4):
+                print(
+                    f"[AUTO][WARN] Nieprawidłowe max_points ({max_points}), "
+                    f"używam {DEFAULT_LINE_POINTS}."
+                )
+                max_points = DEFAULT_LINE_POINTS
+            spec["max_points"] = max_points
+        else:
+            print("[AUTO][WARN] Nieobsługiwany lub błędny typ wykresu.")
+            continue
+        key = (spec["type"], spec["columns"], spec["values"])
+        if key in seen:
+            continue
+        seen.add(key)
+        spec["index"] = i
+        plan.append(spec)
+    return plan
+
+
+def build_chart_job(
+    spec: Dict[str, Any], summary: Dict[str, Any], charts_dir: str
+) -> Optional[Dict[str, Any]]:
+    """Przygotowuje dane (agregacje) dla wykresu z planu; None, gdy brak kolumn."""
     df = summary["dataframe"]
+    t, i = spec["type"], spec["index"]
+    missing = [c for c in spec["columns"] if c not in df.columns]
+    if missing:
+        print(f"[AUTO][WARN] Kolumna '{missing[0]}' nie istnieje w danych.")
+        return None
+    if t == "pie_special":
+        col = spec["columns"][0]
+        # w trybie approximate: dokładne liczności samych wybranych wartości
+        counts = summary.get("special_counts", {}).get(col)
+        if counts is None:
+            counts = column_counts(summary, col)
+        total = summary.get("row_count", len(df))
+        job = _special_pie_job(counts, total, col, list(spec["values"]), charts_dir)
+        job["label"] = "udziału"
+    elif t == "bar":
+        c = spec["columns"][0]
+        p = os.path.join(charts_dir, f"chart_{i}_{c}_bar.png")
+        job = _bar_job(column_counts(summary, c), f"Wykres słupkowy: {c}", p)
+        job["label"] = "słupkowy"
+    elif t == "line":
+        x, y = spec["columns"]
+        p = os.path.join(charts_dir, f"chart_{i}_{y}_line.png")
+        title = f"Wykres liniowy: {y} wg {x}"
+        job = _line_job(df, x, y, title, p, spec.get("max_points", DEFAULT_LINE_POINTS))
+        job["label"] = "liniowy"
+    else:
+        c = spec["columns"][0]
+        counts = column_counts(summary, c)
+        p = os.path.join(charts_dir, f"chart_{i}_{c}_pie.png")
+        job = _pie_job(counts.index.tolist(), counts.tolist(), f"Wykres kołowy: {c}", p)
+        job["label"] = "kołowy"
+    return job
+
+
+def render_plan(
+    plan: List[Dict[str, Any]], summary: Dict[str, Any], config: Dict[str, Any]
+) -> List[str]:
+    """Buduje zadania z planu i rysuje je (w puli procesów); zwraca ścieżki PNG."""
+    charts_dir = config.get("charts_dir", "charts")
+    jobs = []
+    with span("chart_data", charts=len(plan)):
+        for spec in plan:
+            # błąd danych jednego wykresu nie przerywa pozostałych
+            try:
+                job = build_chart_job(spec, summary, charts_dir)
+            except Exception as e:
+                print(
+                    f"[AUTO][WARN] Błąd przy przygotowaniu wykresu {spec['type']} "
+                    f"{list(spec['columns'])}:",
+                    e,
+                )
+                continue
+            if job:
+                jobs.append(job)
+    workers = chart_workers(config, len(jobs))
+    with span("render_charts", charts=len(jobs), workers=workers):
+        rendered = set(render_charts(jobs, workers, config))
     paths: List[str] = []
+    for job in jobs:
+        if job["path"] in rendered:
+            paths.append(job["path"])
+            print(f"[AUTO] Wygenerowano wykres {job['label']}: {job['path']}")
+    return paths
+
+
+def generate_charts(summary: Dict[str, Any], config: Dict[str, Any]) -> List[str]:
+    """
+    Jedyny punkt wejścia do wykresów. Z `interactive_charts: false` rysuje cały
+    plan z configu; w trybie interaktywnym najpierw wykresy pie_special z configu
+    (jeśli są), potem pyta użytkownika.
+    """
+    df = summary["dataframe"]
     charts_dir = config.get("charts_dir", "charts")
     os.makedirs(charts_dir, exist_ok=True)
 
     # AUTOMATYCZNE GENEROWANIE WYKRESÓW Z CONFIG
     if config and "charts" in config and not config.get("interactive_charts", True):
-        for i, chart in enumerate(config["charts"]):
-            t = chart.get("type")
-            if t == "pie_special":
-                # Nowość: specjalny wykres udziału (pie_special)
-                col = chart.get("column")
-                values = chart.get("values")
-                if col and values and col in df.columns:
-                    try:
-                        pie_path = generate_special_pie_chart(
-                            df, col, values, charts_dir
-                        )
-                        if pie_path:
-                            paths.append(pie_path)
-                    except Exception as e:
-                        print("[AUTO][WARN] Błąd przy generowaniu wykresu udziału:", e)
-                else:
-                    print("[AUTO][WARN] Nieprawidłowa konfiguracja pie_special.")
-            elif t == "bar" and "columns" in chart and len(chart["columns"]) == 1:
-                c = chart["columns"][0]
-                if c in df.columns:
-                    try:
-                        plt.figure()
-                        df[c].value_counts().plot(kind="bar")
-                        plt.title(f"Wykres słupkowy: {c}")
-                        p = os.path.join(charts_dir, f"chart_{i}_{c}_bar.png")
-                        plt.savefig(p)
-                        plt.close()
-                        paths.append(p)
-                        print(f"[AUTO] Wygenerowano wykres słupkowy: {p}")
-                    except Exception as e:
-                        print("[AUTO][WARN] Błąd przy generowaniu bar:", e)
-                else:
-                    print(f"[AUTO][WARN] Kolumna '{c}' nie istnieje w danych.")
-            elif t == "line" and "columns" in chart and len(chart["columns"]) == 2:
-                x, y = chart["columns"]
-                if x in df.columns and y in df.columns:
-                    try:
-                        plt.figure()
-                        df.plot(x=x, y=y, kind="line")
-                        plt.title(f"Wykres liniowy: {y} wg {x}")
-                        p = os.path.join(charts_dir, f"chart_{i}_{y}_line.png")
-                        plt.savefig(p)
-                        plt.close()
-                        paths.append(p)
-                        print(f"[AUTO] Wygenerowano wykres liniowy: {p}")
-                    except Exception as e:
-                        print("[AUTO][WARN] Błąd przy generowaniu line:", e)
-                else:
-                    print(f"[AUTO][WARN] Kolumna '{x}' lub '{y}' nie istnieje.")
-            elif t == "pie" and "columns" in chart and len(chart["columns"]) == 1:
-                c = chart["columns"][0]
-                if c in df.columns:
-                    try:
-                        plt.figure()
-                        df[c].value_counts().plot(kind="pie", autopct="%1.1f%%")
-                        plt.title(f"Wykres kołowy: {c}")
-                        p = os.path.join(charts_dir, f"chart_{i}_{c}_pie.png")
-                        plt.savefig(p)
-                        plt.close()
-                        paths.append(p)
-                        print(f"[AUTO] Wygenerowano wykres kołowy: {p}")
-                    except Exception as e:
-                        print("[AUTO][WARN] Błąd przy generowaniu pie:", e)
-                else:
-                    print(f"[AUTO][WARN] Kolumna '{c}' nie istnieje.")
-            else:
-                print("[AUTO][WARN] Nieobsługiwany lub błędny typ wykresu.")
+        with span("generate_charts") as s:
+            paths = render_plan(plan_charts(config), summary, config)
+            s.set(charts=len(paths))
         return paths
+    paths = []
+    if config and "charts" in config:
+        paths = render_plan(plan_charts(config, ["pie_special"]), summary, config)
 
     # === TRYB INTERAKTYWNY ===
     print("\n=== Interaktywne generowanie wykresów ===")
@@ -124,7 +513,7 @@ def generate_charts(summary: Dict[str, Any], config: Dict[str, Any]) -> List[str
                 print("Niepoprawny numer kolumny.")
                 continue
             col_cat = df.columns[idx_cat]
-            unique_vals = sorted(df[col_cat].dropna().unique())
+            unique_vals = sorted(column_counts(summary, col_cat).index)
             if not unique_vals:
                 print("Brak unikalnych wartości w tej kolumnie.")
                 continue
@@ -143,7 +532,11 @@ def generate_charts(summary: Dict[str, Any], config: Dict[str, Any]) -> List[str
                 print("Nie wybrano wartości.")
                 continue
             wybrane = [unique_vals[i] for i in idxs]
-            chart_path = generate_special_pie_chart(df, col_cat, wybrane, charts_dir)
+            job = _special_pie_job(
+                column_counts(summary, col_cat), len(df), col_cat, wybrane, charts_dir
+            )
+            chart_path = render_cached(job, config)
+            print(f"[AUTO] Wygenerowano wykres udziału: {chart_path}")
             paths.append(chart_path)
             break  # domyślnie 1 raz, jeśli chcesz możliwość kilku, usuń break
         except Exception as e:
@@ -167,12 +560,13 @@ def generate_charts(summary: Dict[str, Any], config: Dict[str, Any]) -> List[str
                     print("Niepoprawny numer kolumny.")
                     continue
                 col = df.columns[idx]
-                plt.figure()
-                df[col].value_counts().plot(kind="bar")
-                plt.title(f"Wykres słupkowy: {col}")
                 path = os.path.join(charts_dir, f"chart_{col}_bar.png")
-                plt.savefig(path)
-                plt.close()
+                render_cached(
+                    _bar_job(
+                        column_counts(summary, col), f"Wykres słupkowy: {col}", path
+                    ),
+                    config,
+                )
                 print(f"Wygenerowano wykres słupkowy: {path}")
                 paths.append(path)
             elif chart_type == "line":
@@ -188,12 +582,13 @@ def generate_charts(summary: Dict[str, Any], config: Dict[str, Any]) -> List[str
                     continue
                 col_x = df.columns[idx_x]
                 col_y = df.columns[idx_y]
-                plt.figure()
-                df.plot(x=col_x, y=col_y, kind="line")
-                plt.title(f"Wykres liniowy: {col_y} wg {col_x}")
                 path = os.path.join(charts_dir, f"chart_{col_y}_line.png")
-                plt.savefig(path)
-                plt.close()
+                render_cached(
+                    _line_job(
+                        df, col_x, col_y, f"Wykres liniowy: {col_y} wg {col_x}", path
+                    ),
+                    config,
+                )
                 print(f"Wygenerowano wykres liniowy: {path}")
                 paths.append(path)
             elif chart_type == "pie":
@@ -202,12 +597,17 @@ def generate_charts(summary: Dict[str, Any], config: Dict[str, Any]) -> List[str
                     print("Niepoprawny numer kolumny.")
                     continue
                 col = df.columns[idx]
-                plt.figure()
-                df[col].value_counts().plot(kind="pie", autopct="%1.1f%%")
-                plt.title(f"Wykres kołowy: {col}")
+                counts = column_counts(summary, col)
                 path = os.path.join(charts_dir, f"chart_{col}_pie.png")
-                plt.savefig(path)
-                plt.close()
+                render_cached(
+                    _pie_job(
+                        counts.index.tolist(),
+                        counts.tolist(),
+                        f"Wykres kołowy: {col}",
+                        path,
+                    ),
+                    config,
+                )
                 print(f"Wygenerowano wykres kołowy: {path}")
                 paths.append(path)
             else:
@@ -1,7 +1,52 @@
+import codecs
+import copy
+import io
+import json
 import os
+import numpy as np
 import pandas as pd
 import re
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from aggregation import (
+    NumericAccumulator,
+    TopRows,
+    ValueCounter,
+    make_table_sampler,
+    table_rows,
+)
+from charts import chart_columns, counted_columns, special_values
+from filters import (
+    apply_filters,
+    check_text_filters,
+    condition_mask,
+    filter_mask,
+    text_columns_in,
+    text_filter_columns,
+    validate_filters,
+)
+from grouping import GroupAccumulator, group_columns, group_tables, validate_group_by
+from profiling import span
+from sketches import ColumnSketches, sketch_summary, validate_approximate
+from cache import (
+    appended_prefix_hash,
+    get_cached_encoding,
+    load_incremental_state,
+    load_parsed_cache,
+    save_incremental_state,
+    store_encoding,
+    store_parsed_cache,
+)
+
+T = TypeVar("T")
+
+DEFAULT_ENCODINGS = ["utf-8", "cp1250", "iso-8859-2", "latin2", "latin-1"]
+# Ile bajtów z początku pliku wystarcza do wyboru kodowania jednobajtowego
+ENCODING_SAMPLE_BYTES = 1 << 20
+# Liczba wierszy pokazywanych w tabeli raportu
+DEFAULT_TABLE_ROWS = 20
+DEFAULT_CHUNKSIZE = 100_000
+# Tekst staje się typem category, gdy różnych wartości jest najwyżej tyle (ułamek wierszy)
+DEFAULT_CATEGORY_RATIO = 0.5
 
 
 def discover_csv_files(directory: str) -> List[str]:
@@ -69,15 +114,7 @@ def interactive_filter(df: pd.DataFrame) -> pd.DataFrame:
                 continue
         else:
             val = val_raw
-        expr = {
-            ">": filtered_df[col] > val,
-            "<": filtered_df[col] < val,
-            "==": filtered_df[col] == val,
-            "!=": filtered_df[col] != val,
-            ">=": filtered_df[col] >= val,
-            "<=": filtered_df[col] <= val,
-        }[op]
-        filtered_df = filtered_df.loc[expr]
+        filtered_df = filtered_df.loc[condition_mask(filtered_df[col], op, val)]
         print(f"Liczba wierszy po filtrze: {len(filtered_df)}")
     return filtered_df
 
@@ -98,75 +135,830 @@ def interactive_sort(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def process_csv_file(path: str, config: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Wczytuje plik z obsługą różnych kodowań i zwraca podsumowanie oraz DataFrame.
-    """
+def candidate_encodings(config: Dict[str, Any]) -> List[str]:
+    """Kodowania do sprawdzenia: najpierw to z configu, potem domyślne."""
     encodings: List[str] = []
     if config.get("encoding"):
         encodings.append(config["encoding"])
-    encodings += ["utf-8", "cp1250", "iso-8859-2", "latin2", "latin-1"]
+    encodings += DEFAULT_ENCODINGS
+    return list(dict.fromkeys(encodings))
+
+
+def detect_encoding(
+    path: str, encodings: List[str], sample_bytes: int = ENCODING_SAMPLE_BYTES
+) -> Optional[str]:
+    """
+    Wybiera kodowanie bez parsowania CSV. Próbka z początku pliku jest czytana raz;
+    UTF-8 jest dodatkowo walidowane przyrostowo do końca pliku (sam dekoder, bez pandas),
+    bo błędny bajt może się pojawić daleko za próbką.
+    """
+    with open(path, "rb") as fh:
+        sample = fh.read(sample_bytes)
+        at_eof = len(sample) < sample_bytes
+        for enc in encodings:
+            try:
+                decoder = codecs.getincrementaldecoder(enc)()
+                decoder.decode(sample, final=at_eof)
+                if not at_eof and codecs.lookup(enc).name.startswith("utf-8"):
+                    fh.seek(len(sample))
+                    for block in iter(lambda: fh.read(sample_bytes), b""):
+                        decoder.decode(block)
+                    decoder.decode(b"", final=True)
+                return enc
+            except (UnicodeDecodeError, LookupError):
+                continue
+    return None
+
 
-    df = None
-    for enc in encodings:
+def resolve_encoding(path: str, config: Dict[str, Any]) -> str:
+    """
+    Zwraca kodowanie pliku: z cache (ścieżka + mtime + rozmiar) albo z detect_encoding.
+    """
+    preferred = config.get("encoding")
+    cached = get_cached_encoding(path, preferred, config)
+    if cached:
+        return cached
+    encodings = candidate_encodings(config)
+    with span("detect_encoding", bytes=os.path.getsize(path)) as s:
+        enc = detect_encoding(path, encodings)
+        s.set(encoding=enc)
+    if enc is None:
+        raise ValueError(
+            f"Nie udało się odczytać pliku {path} przy użyciu kodowań: {encodings}"
+        )
+    store_encoding(path, enc, preferred, config)
+    return enc
+
+
+def with_encoding_fallback(
+    path: str, config: Dict[str, Any], read: Callable[[str], T]
+) -> T:
+    """
+    Wywołuje *read(encoding)* raz, z wykrytym kodowaniem. Pozostałe kodowania
+    są próbowane tylko wtedy, gdy wykrycie okazało się błędne.
+    """
+    encodings = candidate_encodings(config)
+    enc = resolve_encoding(path, config)
+    order = [enc] + [e for e in encodings if e != enc]
+    for enc in order:
         try:
-            df = pd.read_csv(path, encoding=enc)
+            result = read(enc)
             if enc != "utf-8":
                 print(f"[INFO] Wczytano plik przy użyciu kodowania '{enc}'.")
-            break
+            if enc != order[0]:
+                store_encoding(path, enc, config.get("encoding"), config)
+            return result
         except UnicodeDecodeError:
             print(f"[WARN] Kodowanie '{enc}' nie zadziałało, próbuję kolejnego.")
-        except Exception as e:
-            print(f"[WARN] Kodowanie '{enc}' nie zadziałało ({e}), próbuję kolejnego.")
-    if df is None:
-        raise UnicodeDecodeError(
-            f"Nie udało się odczytać pliku {path} przy użyciu kodowań: {encodings}"
+    raise ValueError(
+        f"Nie udało się odczytać pliku {path} przy użyciu kodowań: {encodings}"
+    )
+
+
+def read_csv_any_encoding(path: str, config: Dict[str, Any], **kwargs) -> pd.DataFrame:
+    """Jedno pełne parsowanie pliku w wykrytym kodowaniu."""
+    return with_encoding_fallback(
+        path, config, lambda enc: pd.read_csv(path, encoding=enc, **kwargs)
+    )
+
+
+def dtype_options(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Ustawienia optymalizacji typów (`optimize_dtypes` w configu: true albo słownik
+    z `category_ratio`, `engine`, `string_dtype`); None, gdy wyłączona.
+    """
+    options = config.get("optimize_dtypes")
+    if not options:
+        return None
+    return options if isinstance(options, dict) else {}
+
+
+def _read_csv_engine(
+    path: str,
+    enc: str,
+    options: Optional[Dict[str, Any]],
+    usecols: Optional[List[str]] = None,
+):
+    """Pełne parsowanie pliku; przy `engine: pyarrow` wielowątkowym parserem Arrow."""
+    if options and options.get("engine") == "pyarrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("[WARN] Brak pakietu pyarrow – używam domyślnego parsera CSV.")
+        else:
+            df = pd.read_csv(path, encoding=enc, engine="pyarrow", usecols=usecols)
+            # parser Arrow zwraca None dla brakujących tekstów; domyślny daje NaN
+            for col in df.select_dtypes(include=["object"]).columns:
+                df[col] = df[col].where(df[col].notna(), np.nan)
+            return df
+    return pd.read_csv(path, encoding=enc, usecols=usecols)
+
+
+def _downcast(series: pd.Series) -> pd.Series:
+    """Najmniejszy typ liczbowy mieszczący wartości; float32 tylko bez utraty precyzji."""
+    if series.dtype.kind in "iu":
+        return pd.to_numeric(series, downcast="integer")
+    smaller = series.astype("float32")
+    if ((smaller == series) | series.isna()).all():
+        return smaller
+    return series
+
+
+def optimize_dtypes(df: pd.DataFrame, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Zmniejsza pamięć DataFrame: teksty o małej liczbie różnych wartości
+    (najwyżej `category_ratio` wierszy, domyślnie 0.5) stają się typem category,
+    liczby są zawężane (int64 -> int8/16/32, float64 -> float32 bez utraty precyzji),
+    a przy `string_dtype: true` pozostałe teksty dostają typ string[pyarrow].
+    """
+    ratio = float(options.get("category_ratio", DEFAULT_CATEGORY_RATIO))
+    text_dtype = None
+    if options.get("string_dtype"):
+        try:
+            import pyarrow  # noqa: F401
+
+            text_dtype = "string[pyarrow]"
+        except ImportError:
+            print("[WARN] Brak pakietu pyarrow – teksty dostają typ string bez Arrow.")
+            text_dtype = "string"
+    before = df.memory_usage(deep=True).sum()
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype.kind in "iuf":
+            columns[col] = _downcast(series)
+        elif series.dtype == "object":
+            if series.nunique() <= ratio * len(series):
+                columns[col] = series.astype("category")
+            elif text_dtype:
+                columns[col] = series.astype(text_dtype)
+    if columns:
+        df = df.assign(**columns)
+    after = df.memory_usage(deep=True).sum()
+    print(
+        f"[INFO] Optymalizacja typów: pamięć danych {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB."
+    )
+    return df
+
+
+def config_filters(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Sprawdzona lista filtrów z configu (pusta w trybie bez filtrów)."""
+    return validate_filters(config.get("filters"))
+
+
+def config_group_by(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Sprawdzona lista grupowań z sekcji `group_by` configu."""
+    return validate_group_by(config.get("group_by"))
+
+
+def config_approximate(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Ustawienia trybu przybliżonego (opcja `approximate`) albo None."""
+    return validate_approximate(config.get("approximate"))
+
+
+def _read_filtered(
+    path: str, enc: str, usecols: Optional[List[str]], config: Dict[str, Any]
+) -> pd.DataFrame:
+    """Czyta plik kawałkami i zostawia z każdego tylko wiersze spełniające filtry."""
+    filters = config_filters(config)
+    chunksize = int(config.get("chunksize", DEFAULT_CHUNKSIZE))
+    text = text_filter_columns(filters)
+    text_seen, rows, parts = set(), 0, []
+    with pd.read_csv(
+        path,
+        encoding=enc,
+        usecols=usecols,
+        chunksize=chunksize,
+        dtype={col: str for col in text},
+    ) as reader:
+        for chunk in reader:
+            rows += len(chunk)
+            text_seen |= text_columns_in(chunk, text)
+            parts.append(apply_filters(chunk, filters))
+    check_text_filters(text, text_seen, rows)
+    if not parts:
+        return pd.read_csv(path, encoding=enc, usecols=usecols, nrows=0)
+    return pd.concat(parts)
+
+
+def load_csv(
+    path: str, config: Dict[str, Any], usecols: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Wczytuje cały plik (albo tylko kolumny *usecols*): z cache kolumnowego, jeśli
+    zawartość pliku się nie zmieniła, w przeciwnym razie parsuje CSV i zapisuje kopię do cache.
+    Filtry z configu (`filters`) są stosowane na każdym kawałku już przy czytaniu,
+    więc odrzucone wiersze nie trafiają do pamięci (ani do cache); z cache
+    kolumnowego wczytywane są tylko wiersze spełniające filtry.
+    Przy `optimize_dtypes` w configu typy kolumn są zawężane (optimize_dtypes).
+    """
+    options = dtype_options(config)
+    filters = config_filters(config)
+    with span("read_cache"):
+        df = load_parsed_cache(
+            path,
+            config,
+            usecols,
+            mask=(lambda part: filter_mask(part, filters)) if filters else None,
+            mask_columns=[f["column"] for f in filters],
+        )
+    if df is not None:
+        print(f"[INFO] Wczytano {os.path.basename(path)} z cache.")
+    elif filters:
+        with span("read_csv", filtered=True):
+            df = with_encoding_fallback(
+                path, config, lambda enc: _read_filtered(path, enc, usecols, config)
+            )
+    else:
+        with span("read_csv"):
+            df, enc = with_encoding_fallback(
+                path,
+                config,
+                lambda enc: (_read_csv_engine(path, enc, options, usecols), enc),
+            )
+        with span("store_cache"):
+            store_parsed_cache(path, df, enc, config, partial=usecols is not None)
+    if options is not None:
+        with span("optimize_dtypes"):
+            df = optimize_dtypes(df, options)
+    return df
+
+
+def required_columns(config: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Kolumny potrzebne w przebiegu wg configu: `table.columns` i `table.column`,
+    `sort.column`, kolumny z `filters` i ze wszystkich wykresów. None, gdy potrzebne
+    są wszystkie kolumny: tryb interaktywny albo tabela bez listy `table.columns`.
+    """
+    if (
+        not config
+        or config.get("interactive_filter", True)
+        or config.get("interactive_sort", True)
+        or config.get("interactive_charts", True)
+    ):
+        return None
+    table = config.get("table") or {}
+    if not table.get("columns"):
+        return None
+    columns = list(table["columns"])
+    if table.get("column"):
+        columns.append(table["column"])
+    if (config.get("sort") or {}).get("column"):
+        columns.append(config["sort"]["column"])
+    columns += [f["column"] for f in config.get("filters") or [] if f.get("column")]
+    columns += chart_columns(config)
+    columns += group_columns(config_group_by(config))
+    return list(dict.fromkeys(columns))
+
+
+def read_header(path: str, config: Dict[str, Any]) -> List[str]:
+    """Pełna lista kolumn z nagłówka pliku (bez czytania danych)."""
+    return with_encoding_fallback(
+        path, config, lambda enc: pd.read_csv(path, encoding=enc, nrows=0)
+    ).columns.tolist()
+
+
+def project_columns(header: List[str], config: Dict[str, Any]) -> Optional[List[str]]:
+    """Kolumny do wczytania (w kolejności z pliku) albo None = wszystkie."""
+    needed = required_columns(config)
+    if needed is None:
+        return None
+    usecols = [c for c in header if c in set(needed)]
+    return usecols if len(usecols) < len(header) else None
+
+
+def sort_spec(config: Dict[str, Any], columns: List[str]) -> Optional[Tuple[str, bool]]:
+    """Sortowanie z configu (`sort.column`, `sort.order`) jako (kolumna, rosnąco?)."""
+    sort = config.get("sort") or {}
+    column = sort.get("column")
+    if not column:
+        return None
+    if column not in columns:
+        print(f"[WARN] Brak kolumny '{column}' do sortowania, pomijam sortowanie.")
+        return None
+    return column, sort.get("order", "asc") != "desc"
+
+
+def _has_line_charts(config: Dict[str, Any]) -> bool:
+    return any(c.get("type") == "line" for c in config.get("charts") or [])
+
+
+def table_sampler(
+    config: Dict[str, Any],
+    columns: List[str],
+    sort: Optional[Tuple[str, bool]] = None,
+):
+    """
+    Selektor wierszy do tabeli raportu wg sekcji `table` configu. Przy sortowaniu
+    *sort* pierwsze/ostatnie wiersze posortowanych danych wybiera TopRows
+    (top-k, bez sortowania całości).
+    """
+    table = config.get("table") or {}
+    mode = table.get("mode", "head")
+    if sort and mode in ("head", "tail"):
+        column, ascending = sort
+        n = table_rows(table, DEFAULT_TABLE_ROWS)
+        return TopRows(n, column, ascending=ascending == (mode == "head"))
+    return make_table_sampler(table, columns, DEFAULT_TABLE_ROWS)
+
+
+def table_view(
+    table: pd.DataFrame,
+    config: Dict[str, Any],
+    sort: Optional[Tuple[str, bool]] = None,
+) -> pd.DataFrame:
+    """
+    Tabela raportu: wiersze w kolejności sortowania *sort* (sortowane są tylko
+    wybrane wiersze) i kolumny z `table.columns` (domyślnie wszystkie).
+    """
+    if sort and sort[0] in table.columns:
+        table = table.sort_values(sort[0], ascending=sort[1], kind="stable")
+    columns = (config.get("table") or {}).get("columns")
+    if not columns:
+        return table
+    return table[[c for c in columns if c in table.columns]]
+
+
+def select_table_rows(
+    df: pd.DataFrame,
+    config: Dict[str, Any],
+    sort: Optional[Tuple[str, bool]] = None,
+):
+    """Wiersze tabeli raportu i jej opis dla DataFrame w pamięci."""
+    sampler = table_sampler(config, df.columns.tolist(), sort)
+    sampler.update(df)
+    table = sampler.result(df.columns.tolist())
+    return table_view(table, config, sort), sampler.caption
+
+
+class _ByteRange(io.RawIOBase):
+    """Fragment pliku [start, end) jako strumień bajtów do odczytu przez pd.read_csv."""
+
+    def __init__(self, path: str, start: int, end: int):
+        self._fh = open(path, "rb")
+        self._fh.seek(start)
+        self._left = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._fh.readinto(memoryview(buffer)[: min(len(buffer), self._left)])
+        self._left -= n
+        return n
+
+    def close(self) -> None:
+        self._fh.close()
+        super().close()
+
+
+def _read_range(path: str, start: int, end: int, enc: str, **kwargs):
+    return pd.read_csv(
+        io.BufferedReader(_ByteRange(path, start, end)), encoding=enc, **kwargs
+    )
+
+
+def _new_aggregates(
+    path: str,
+    end: int,
+    enc: str,
+    config: Dict[str, Any],
+    all_columns: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Puste agregaty trybu strumieniowego; kolumny z nagłówka pliku.
+    *all_columns* (tryb combine) to kolumny wszystkich łączonych plików – od nich,
+    a nie od nagłówka jednego pliku, zależy sortowanie i wybór wierszy tabeli,
+    więc części z różnych plików mają ten sam typ selektora i dają się połączyć.
+    """
+    columns = _read_range(path, 0, end, enc, nrows=0).columns.tolist()
+    usecols = project_columns(columns, config)
+    if all_columns is None:
+        table_columns = usecols or columns
+    else:
+        table_columns = project_columns(all_columns, config) or all_columns
+    sort = sort_spec(config, table_columns)
+    approximate = config_approximate(config)
+    if approximate:
+        # bar/pie z heavy hitters; dokładnie liczone są tylko wartości pie_special
+        special = special_values(config)
+        counter = ValueCounter(list(special), special)
+        top = counted_columns(config, ("bar", "pie"))
+    else:
+        counter = ValueCounter(counted_columns(config))
+    return {
+        "columns": columns,
+        "usecols": usecols,
+        "sort": sort,
+        # wiersze przeczytane z pliku (przed filtrami)
+        "rows_read": 0,
+        "acc": NumericAccumulator(),
+        "counter": counter,
+        "sampler": table_sampler(config, table_columns, sort),
+        "groups": [GroupAccumulator(spec) for spec in config_group_by(config)],
+        "sketches": ColumnSketches(approximate, top) if approximate else None,
+        # kolumny filtrowane tekstem, w których pojawiła się wartość nieliczbowa
+        "filter_text": set(),
+    }
+
+
+def _feed_range(
+    path: str,
+    start: int,
+    end: int,
+    enc: str,
+    aggregates: Dict[str, Any],
+    config: Dict[str, Any],
+) -> None:
+    """Dolicza do agregatów wiersze z bajtów [start, end) pliku (kawałkami po `chunksize`)."""
+    if start >= end:
+        return
+    chunksize = int(config.get("chunksize", DEFAULT_CHUNKSIZE))
+    # dalsza część pliku nie ma nagłówka – nazwy kolumn są już znane
+    header = {} if start == 0 else {"header": None, "names": aggregates["columns"]}
+    # numeracja wierszy ciągła z wcześniej przetworzoną częścią pliku
+    first_row = aggregates["rows_read"]
+    usecols = aggregates["usecols"]
+    filters = config_filters(config)
+    text = text_filter_columns(filters)
+    with (
+        span("read_range", bytes=end - start) as s,
+        _read_range(
+            path,
+            start,
+            end,
+            enc,
+            chunksize=chunksize,
+            usecols=usecols,
+            dtype={col: str for col in text},
+            **header,
+        ) as reader,
+    ):
+        for chunk in reader:
+            chunk.index += first_row
+            aggregates["rows_read"] += len(chunk)
+            aggregates["filter_text"] |= text_columns_in(chunk, text)
+            chunk = apply_filters(chunk, filters)
+            aggregates["acc"].update(chunk)
+            aggregates["counter"].update(chunk)
+            aggregates["sampler"].update(chunk)
+            for group in aggregates["groups"]:
+                group.update(chunk)
+            if aggregates["sketches"] is not None:
+                aggregates["sketches"].update(chunk)
+        s.set(rows=aggregates["rows_read"] - first_row)
+
+
+def _streamed_summary(
+    path: str, aggregates: Dict[str, Any], config: Dict[str, Any], mode: str
+) -> Dict[str, Any]:
+    """Słownik podsumowania (jak z process_csv_file) z agregatów strumieniowych."""
+    acc, sampler = aggregates["acc"], aggregates["sampler"]
+    check_text_filters(
+        text_filter_columns(config_filters(config)),
+        aggregates["filter_text"],
+        aggregates["rows_read"],
+    )
+    columns = aggregates["columns"]
+    loaded = aggregates["usecols"] or columns
+    table = sampler.result(loaded)
+    print(
+        f"\nŁaduję plik ({mode}): {os.path.basename(path)} | wiersze: {acc.row_count} | kolumny: {columns}"
+    )
+    _report_projection(columns, aggregates["usecols"])
+    if config.get("interactive_filter", True) or config.get("interactive_sort", True):
+        print("[WARN] Tryb strumieniowy pomija interaktywne filtrowanie i sortowanie.")
+    if _has_line_charts(config):
+        print(
+            "[WARN] W trybie strumieniowym wykresy liniowe powstają tylko z wierszy tabeli."
+        )
+    summary = {
+        "filename": path,
+        "columns": columns,
+        "row_count": acc.row_count,
+        "column_types": {c: acc.column_types.get(c, "object") for c in loaded},
+        "numerical_summary": acc.numerical_summary(),
+        "dataframe": table,
+        "table": table_view(table, config, aggregates["sort"]),
+        "table_caption": sampler.caption,
+        "group_by": [g.report_table() for g in aggregates["groups"]],
+    }
+    if aggregates["sketches"] is None:
+        summary["value_counts"] = aggregates["counter"].result()
+    else:
+        summary["special_counts"] = aggregates["counter"].result()
+        sketch_summary(aggregates["sketches"], loaded, summary)
+    return summary
+
+
+def _report_projection(header: List[str], usecols: Optional[List[str]]) -> None:
+    if usecols is not None:
+        print(
+            f"[INFO] Wczytano tylko kolumny potrzebne wg configu ({len(usecols)} z {len(header)}): {usecols}"
         )
 
+
+def stream_csv_summary(path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Tryb strumieniowy: czyta plik kawałkami (`chunksize`) i w jednym przebiegu
+    zbiera sum/count/min/max kolumn liczbowych, liczności wartości kolumn
+    z wykresów bar/pie oraz wiersze do tabeli (sekcja `table`).
+    Pamięć nie zależy od rozmiaru pliku; zwraca słownik jak process_csv_file,
+    ale `dataframe` zawiera tylko wiersze tabeli.
+    """
+    return _streamed_summary(
+        path, file_aggregates(path, config), config, "strumieniowo"
+    )
+
+
+def file_aggregates(
+    path: str, config: Dict[str, Any], all_columns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Agregaty trybu strumieniowego dla całego pliku (sum/count/min/max, liczności
+    wartości, wiersze tabeli). Agregaty wielu plików łączy merge_aggregates;
+    wtedy *all_columns* to kolumny wszystkich plików (patrz combined_columns).
+    """
+    size = os.path.getsize(path)
+
+    def read(enc: str) -> Dict[str, Any]:
+        aggregates = _new_aggregates(path, size, enc, config, all_columns)
+        _feed_range(path, 0, size, enc, aggregates, config)
+        return aggregates
+
+    return with_encoding_fallback(path, config, read)
+
+
+def combined_columns(files: List[str], config: Dict[str, Any]) -> List[str]:
+    """
+    Suma nagłówków łączonych plików (w kolejności pierwszego wystąpienia).
+    Pliki, których nagłówka nie da się odczytać, są pomijane – ich błąd
+    zgłosi później file_aggregates.
+    """
+    columns: List[str] = []
+    for path in files:
+        try:
+            header = read_header(path, config)
+        except Exception:
+            continue
+        columns += [c for c in header if c not in columns]
+    return columns
+
+
+def merge_aggregates(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Łączy agregaty kolejnych plików (w tej kolejności) w jeden zestaw, tak jakby
+    pliki były jednym strumieniem. Kolumny to suma nagłówków; wynik powstaje
+    w miejscu pierwszego elementu listy.
+    """
+    merged = parts[0]
+    for part in parts[1:]:
+        merged["columns"] += [c for c in part["columns"] if c not in merged["columns"]]
+        if merged["usecols"] is not None and part["usecols"] is not None:
+            merged["usecols"] += [
+                c for c in part["usecols"] if c not in merged["usecols"]
+            ]
+        else:
+            merged["usecols"] = None
+        merged["rows_read"] += part["rows_read"]
+        merged["filter_text"] |= part["filter_text"]
+        merged["acc"].merge(part["acc"])
+        merged["counter"].merge(part["counter"])
+        merged["sampler"].merge(part["sampler"])
+        for group, other in zip(merged["groups"], part["groups"]):
+            group.merge(other)
+        if merged["sketches"] is not None:
+            merged["sketches"].merge(part["sketches"])
+    return merged
+
+
+def combined_summary(
+    name: str, parts: List[Dict[str, Any]], files: List[str], config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Jedno podsumowanie (jak z process_csv_file) z agregatów wielu plików."""
+    summary = _streamed_summary(
+        name, merge_aggregates(parts), config, f"łącznie, plików: {len(files)}"
+    )
+    summary["source_files"] = files
+    return summary
+
+
+def _complete_lines_end(path: str, block_size: int = 1 << 16) -> int:
+    """Offset tuż za ostatnim znakiem nowej linii w pliku (0, gdy go nie ma)."""
+    with open(path, "rb") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(block_size, pos)
+            fh.seek(pos - step)
+            i = fh.read(step).rfind(b"\n")
+            if i >= 0:
+                return pos - step + i + 1
+            pos -= step
+    return 0
+
+
+def _aggregates_key(config: Dict[str, Any]) -> str:
+    """Opis ustawień, od których zależą agregaty; ich zmiana wymusza przeliczenie."""
+    return json.dumps(
+        {
+            "counted": counted_columns(config),
+            "table": config.get("table") or {},
+            "columns": required_columns(config),
+            "filters": config_filters(config),
+            "sort": config.get("sort") or {},
+            "group_by": config_group_by(config),
+            "approximate": config_approximate(config),
+        },
+        sort_keys=True,
+        default=str,
+    )
+
+
+def _stale_reason(
+    path: str, state: Dict[str, Any], config: Dict[str, Any], end: int
+) -> Optional[str]:
+    if state["key"] != _aggregates_key(config):
+        return "zmieniła się konfiguracja tabeli lub wykresów"
+    if end < state["offset"]:
+        return "plik został skrócony"
+    if appended_prefix_hash(path, state["offset"]) != state["prefix_hash"]:
+        return "plik został nadpisany"
+    return None
+
+
+def incremental_csv_summary(path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Tryb przyrostowy dla plików, do których tylko dopisywane są wiersze.
+    Stan w `cache_dir/state` (offset w bajtach, agregaty trybu strumieniowego)
+    pozwala sparsować tylko nowy koniec pliku i dołączyć go do zapisanych agregatów.
+    Skrócony lub nadpisany plik (albo zmiana configu tabeli/wykresów) jest przeliczany od nowa.
+    Niedokończony ostatni wiersz wchodzi do raportu, ale nie do zapisanego stanu.
+    """
+    end = _complete_lines_end(path)
+    if end == 0:
+        return stream_csv_summary(path, config)
+
+    state = load_incremental_state(path, config)
+    reason = _stale_reason(path, state, config, end) if state else None
+    if reason:
+        print(f"[INFO] Tryb przyrostowy: {reason}, przeliczam plik od nowa.")
+        state = None
+    if state:
+        before = state["aggregates"]["rows_read"]
+        try:
+            _feed_range(
+                path,
+                state["offset"],
+                end,
+                state["encoding"],
+                state["aggregates"],
+                config,
+            )
+            added = state["aggregates"]["rows_read"] - before
+            print(
+                f"[INFO] Tryb przyrostowy: {added} nowych wierszy dołączono do {before} zapisanych."
+            )
+        except UnicodeDecodeError:
+            print("[WARN] Nowe wiersze mają inne kodowanie, przeliczam plik od nowa.")
+            state = None
+    if state is None:
+
+        def read(enc: str) -> Dict[str, Any]:
+            aggregates = _new_aggregates(path, end, enc, config)
+            _feed_range(path, 0, end, enc, aggregates, config)
+            return {"encoding": enc, "aggregates": aggregates}
+
+        state = with_encoding_fallback(path, config, read)
+
+    state.update(
+        offset=end,
+        prefix_hash=appended_prefix_hash(path, end),
+        key=_aggregates_key(config),
+    )
+    save_incremental_state(path, state, config)
+
+    aggregates = state["aggregates"]
+    size = os.path.getsize(path)
+    if size > end:
+        aggregates = copy.deepcopy(aggregates)
+        _feed_range(path, end, size, state["encoding"], aggregates, config)
+    return _streamed_summary(path, aggregates, config, "przyrostowo")
+
+
+def process_csv_file(path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wczytuje plik z obsługą różnych kodowań i zwraca podsumowanie oraz DataFrame.
+    Przy `streaming: true` w configu plik jest agregowany kawałkami (stream_csv_summary),
+    a przy `incremental: true` – tylko jego nowo dopisana część (incremental_csv_summary).
+    """
+    with span("process_csv_file", file=path, bytes=os.path.getsize(path)) as s:
+        summary = _process_csv_file(path, config)
+        s.set(rows=summary["row_count"])
+    return summary
+
+
+def _process_csv_file(path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    if config.get("incremental"):
+        return incremental_csv_summary(path, config)
+    if config.get("streaming"):
+        return stream_csv_summary(path, config)
+    header, usecols = None, None
+    if required_columns(config) is not None:
+        header = read_header(path, config)
+        usecols = project_columns(header, config)
+    with span("load_csv", bytes=os.path.getsize(path)) as s:
+        df = load_csv(path, config, usecols)
+        s.set(rows=len(df), columns=len(df.columns))
+    header = header or df.columns.tolist()
+
     print(
-        f"\nŁaduję plik: {os.path.basename(path)} | wiersze: {len(df)} | kolumny: {list(df.columns)}"
+        f"\nŁaduję plik: {os.path.basename(path)} | wiersze: {len(df)} | kolumny: {header}"
     )
+    _report_projection(header, usecols)
     if config.get("interactive_filter", True):
         df = interactive_filter(df)
+    sort = sort_spec(config, df.columns.tolist())
+    if sort and (config.get("interactive_sort", True) or _has_line_charts(config)):
+        # kolejność całej ramki jest potrzebna (wykres liniowy, dalsze sortowanie)
+        with span("sort", column=sort[0], rows=len(df)):
+            df = df.sort_values(sort[0], ascending=sort[1], kind="stable")
+        sort = None
     if config.get("interactive_sort", True):
         df = interactive_sort(df)
 
     summary: Dict[str, Any] = {
         "filename": path,
-        "columns": df.columns.tolist(),
+        "columns": header,
         "row_count": len(df),
         "column_types": df.dtypes.astype(str).to_dict(),
         "numerical_summary": {},
         "dataframe": df,
     }
-    for col in df.select_dtypes(include=["number"]).columns:
-        summary["numerical_summary"][col] = {
-            "sum": df[col].sum(),
-            "mean": df[col].mean(),
-            "min": df[col].min(),
-            "max": df[col].max(),
-        }
+    # bez wykresów liniowych sortowanie dotyczy tylko tabeli: top-k zamiast sort_values
+    with span("table_rows", rows=len(df)):
+        summary["table"], summary["table_caption"] = select_table_rows(df, config, sort)
+    with span("numerical_summary", rows=len(df)):
+        for col in df.select_dtypes(include=["number"]).columns:
+            values = df[col]
+            if values.dtype == "float32":
+                # float32 po optimize_dtypes – suma i średnia w pełnej precyzji
+                values = values.astype("float64")
+            summary["numerical_summary"][col] = {
+                "sum": values.sum(),
+                "mean": values.mean(),
+                "min": values.min(),
+                "max": values.max(),
+            }
+    specs = config_group_by(config)
+    if specs:
+        with span("group_by", rows=len(df), groupings=len(specs)):
+            summary["group_by"] = group_tables(df, specs)
+    approximate = config_approximate(config)
+    if approximate:
+        with span("sketches", rows=len(df)):
+            sketches = ColumnSketches(
+                approximate, counted_columns(config, ("bar", "pie"))
+            )
+            sketches.update(df)
+            sketch_summary(sketches, df.columns.tolist(), summary)
+            special = special_values(config)
+            counter = ValueCounter(list(special), special)
+            counter.update(df)
+            summary["special_counts"] = counter.result()
     return summary
 
 
+def _is_text(series: pd.Series) -> bool:
+    """Kolumna tekstowa: object, category albo string (po optimize_dtypes)."""
+    return series.dtype == "object" or isinstance(
+        series.dtype, (pd.CategoricalDtype, pd.StringDtype)
+    )
+
+
 def interactive_choose_charts(df: pd.DataFrame) -> List[Dict[str, Any]]:
     """
     Idiotoodporny kreator wykresów: pozwala wybrać tylko sensowne kolumny.
+    Liczba różnych wartości każdej kolumny jest liczona raz.
     """
     charts: List[Dict[str, Any]] = []
+    distinct: Dict[str, int] = {}
+
+    def nunique(col: str) -> int:
+        if col not in distinct:
+            distinct[col] = df[col].nunique()
+        return distinct[col]
+
     print("\n=== Interaktywny wybór wykresów ===")
 
     # Sensowne kolumny dla wykresu słupkowego: kategoryczne o małej liczbie wartości
-    bar_candidates = [
-        c for c in df.columns if df[c].dtype == "object" and df[c].nunique() <= 30
-    ]
+    bar_candidates = [c for c in df.columns if _is_text(df[c]) and nunique(c) <= 30]
     # Sensowne kolumny na X do wykresu liniowego: liczby, daty, ewentualnie krótkie kategorie
     line_x_candidates = [
         c
         for c in df.columns
         if pd.api.types.is_numeric_dtype(df[c])
         or pd.api.types.is_datetime64_any_dtype(df[c])
-        or (df[c].dtype == "object" and df[c].nunique() <= 20)
+        or (_is_text(df[c]) and nunique(c) <= 20)
     ]
     # Sensowne kolumny na Y do wykresu liniowego: liczby!
     line_y_candidates = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
@@ -207,7 +999,7 @@ def interactive_choose_charts(df: pd.DataFrame) -> List[Dict[str, Any]]:
                 continue
             print("Dostępne kolumny do wykresu słupkowego:")
             for idx, col in enumerate(bar_candidates):
-                print(f"  {idx}: {col} (unikalne: {df[col].nunique()})")
+                print(f"  {idx}: {col} (unikalne: {nunique(col)})")
             try:
                 idx = int(input("Numer kolumny: "))
                 c = bar_candidates[idx]
@@ -222,7 +1014,7 @@ def interactive_choose_charts(df: pd.DataFrame) -> List[Dict[str, Any]]:
             print("Dostępne kolumny na oś X (pozioma):")
             for idx, col in enumerate(line_x_candidates):
                 print(
-                    f"  {idx}: {col} (typ: {df[col].dtype}, unikalnych: {df[col].nunique()})"
+                    f"  {idx}: {col} (typ: {df[col].dtype}, unikalnych: {nunique(col)})"
                 )
             try:
                 x_idx = int(input("Numer kolumny X: "))
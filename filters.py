@@ -0,0 +1,150 @@
+import operator
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+FILTER_OPS = (*COMPARISONS, "in", "not_in", "between", "regex", "is_null", "not_null")
+# Operatory bez wartości
+NULL_OPS = ("is_null", "not_null")
+
+
+def validate_filters(filters: Any) -> List[Dict[str, Any]]:
+    """
+    Sprawdza sekcję `filters` configu (lista {column, op, value}) i zwraca ją
+    jako listę. Błędny wpis kończy się ValueError – lepiej przerwać niż
+    po cichu wygenerować raport z innych danych.
+    """
+    if not filters:
+        return []
+    if not isinstance(filters, list):
+        raise ValueError("Sekcja 'filters' musi być listą warunków.")
+    for i, f in enumerate(filters):
+        if not isinstance(f, dict) or not f.get("column"):
+            raise ValueError(f"Filtr #{i}: brak nazwy kolumny ('column').")
+        op = f.get("op", "==")
+        if op not in FILTER_OPS:
+            raise ValueError(
+                f"Filtr #{i}: nieznany operator '{op}' (dostępne: {', '.join(FILTER_OPS)})."
+            )
+        if op not in NULL_OPS and "value" not in f:
+            raise ValueError(f"Filtr #{i}: operator '{op}' wymaga wartości ('value').")
+        if op in ("in", "not_in") and not isinstance(f["value"], list):
+            raise ValueError(f"Filtr #{i}: operator '{op}' wymaga listy wartości.")
+        if op == "between" and (
+            not isinstance(f["value"], list) or len(f["value"]) != 2
+        ):
+            raise ValueError(f"Filtr #{i}: 'between' wymaga listy [od, do].")
+    return filters
+
+
+def _coerce(series: pd.Series, value: Any) -> Any:
+    """Dopasowuje wartość z configu do typu kolumny (liczba/tekst)."""
+    if series.dtype.kind in "iuf" and isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(
+                f"Kolumna '{series.name}' jest liczbowa, a wartość filtra '{value}' nie."
+            )
+    if series.dtype.kind == "O" and isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _is_number(value: Any) -> bool:
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def text_filter_columns(filters: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Kolumny porównywane w filtrach z tekstem, który nie jest liczbą: {kolumna: wartość}.
+    Przy czytaniu kawałkami typ kolumny wykryty w jednym kawałku może różnić się
+    od typu całego pliku (np. "1", "2", a dalej "A4"), więc takie kolumny są
+    czytane jako tekst, a ich typ sprawdza na końcu check_text_filters.
+    """
+    columns: Dict[str, Any] = {}
+    for f in filters:
+        op = f.get("op", "==")
+        if op in NULL_OPS or op == "regex":
+            continue
+        values = f["value"] if op in ("in", "not_in", "between") else [f["value"]]
+        for v in values:
+            if isinstance(v, str) and not _is_number(v):
+                columns.setdefault(f["column"], v)
+    return columns
+
+
+def text_columns_in(chunk: pd.DataFrame, columns) -> set:
+    """Kolumny (spośród *columns*), w których kawałek ma wartość niebędącą liczbą."""
+    found = set()
+    for col in columns:
+        if col in chunk.columns:
+            values = chunk[col].dropna()
+            if pd.to_numeric(values, errors="coerce").isna().any():
+                found.add(col)
+    return found
+
+
+def check_text_filters(columns: Dict[str, Any], text_seen: set, rows: int) -> None:
+    """
+    Kolumna filtrowana tekstem, w której cały plik nie miał ani jednej wartości
+    nieliczbowej, jest liczbowa – ten sam błąd co przy czytaniu pliku naraz.
+    """
+    if not rows:
+        return
+    for col, value in columns.items():
+        if col not in text_seen:
+            raise ValueError(
+                f"Kolumna '{col}' jest liczbowa, a wartość filtra '{value}' nie."
+            )
+
+
+def condition_mask(series: pd.Series, op: str, value: Any = None) -> np.ndarray:
+    """Maska logiczna jednego warunku na kolumnie (NaN nie spełnia porównań)."""
+    if op == "is_null":
+        return series.isna().to_numpy()
+    if op == "not_null":
+        return series.notna().to_numpy()
+    if op == "regex":
+        matches = series.astype("string").str.contains(str(value), regex=True)
+        return matches.fillna(False).to_numpy(dtype=bool)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # porównania < i > na kategoriach nieuporządkowanych są niedozwolone
+        series = series.astype(object)
+    if op in ("in", "not_in"):
+        mask = series.isin([_coerce(series, v) for v in value]).to_numpy()
+        return mask if op == "in" else ~mask
+    if op == "between":
+        low, high = (_coerce(series, v) for v in value)
+        return series.between(low, high).to_numpy()
+    return COMPARISONS[op](series, _coerce(series, value)).to_numpy()
+
+
+def filter_mask(df: pd.DataFrame, filters: List[Dict[str, Any]]) -> np.ndarray:
+    """Jedna maska dla wszystkich warunków (koniunkcja), liczona wektorowo."""
+    mask = np.ones(len(df), dtype=bool)
+    for f in filters:
+        col = f["column"]
+        if col not in df.columns:
+            raise ValueError(f"Filtr: brak kolumny '{col}' w danych.")
+        mask &= condition_mask(df[col], f.get("op", "=="), f.get("value"))
+    return mask
+
+
+def apply_filters(df: pd.DataFrame, filters: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Wiersze spełniające wszystkie filtry (bez kopii, gdy filtrów brak)."""
+    if not filters:
+        return df
+    return df.loc[filter_mask(df, filters)]
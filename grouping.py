@@ -0,0 +1,257 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from aggregation import check_mergeable, table_rows
+
+# Agregacje sekcji `group_by`; kwantyle jako "median" albo "pNN" (np. p90, p99.9)
+GROUP_AGGS = ("sum", "mean", "count", "min", "max", "median")
+_PERCENTILE = re.compile(r"^p(\d{1,2}(\.\d+)?|100)$")
+DEFAULT_GROUP_ROWS = 50
+
+
+def _quantile_of(agg: str) -> Optional[float]:
+    """Kwantyl (0-1) dla agregacji "median"/"pNN" albo None dla pozostałych."""
+    if agg == "median":
+        return 0.5
+    match = _PERCENTILE.match(agg)
+    return float(match.group(1)) / 100 if match else None
+
+
+def validate_group_by(section: Any) -> List[Dict[str, Any]]:
+    """
+    Sprawdza sekcję `group_by` configu (lista {by, values, aggs, rows}) i zwraca
+    ją w postaci znormalizowanej: `by` i `values` jako listy. Błędny wpis kończy
+    się ValueError, tak jak błędny filtr; błędne `rows` daje tylko ostrzeżenie
+    i domyślne 50 wierszy.
+    """
+    if not section:
+        return []
+    if isinstance(section, dict):
+        section = [section]
+    if not isinstance(section, list):
+        raise ValueError("Sekcja 'group_by' musi być listą grupowań.")
+    specs = []
+    for i, g in enumerate(section):
+        if not isinstance(g, dict) or not g.get("by") or not g.get("values"):
+            raise ValueError(f"Grupowanie #{i}: wymagane pola 'by' i 'values'.")
+        by = [g["by"]] if isinstance(g["by"], str) else list(g["by"])
+        values = [g["values"]] if isinstance(g["values"], str) else list(g["values"])
+        aggs = g.get("aggs") or ["sum", "mean", "count"]
+        for agg in aggs:
+            if agg not in GROUP_AGGS and _quantile_of(agg) is None:
+                raise ValueError(
+                    f"Grupowanie #{i}: nieznana agregacja '{agg}' "
+                    f"(dostępne: {', '.join(GROUP_AGGS)}, pNN)."
+                )
+        specs.append(
+            {
+                "by": by,
+                "values": values,
+                "aggs": list(aggs),
+                "rows": table_rows(g, DEFAULT_GROUP_ROWS, f"grupowania #{i}"),
+            }
+        )
+    return specs
+
+
+def group_columns(specs: List[Dict[str, Any]]) -> List[str]:
+    """Kolumny potrzebne do grupowań (klucze i wartości)."""
+    columns: List[str] = []
+    for spec in specs:
+        columns += spec["by"] + spec["values"]
+    return list(dict.fromkeys(columns))
+
+
+def _grow(array: np.ndarray, size: int, fill: float) -> np.ndarray:
+    if array.shape[-1] >= size:
+        return array
+    extra = np.full(array.shape[:-1] + (size - array.shape[-1],), fill)
+    return np.concatenate([array, extra], axis=-1)
+
+
+class GroupAccumulator:
+    """
+    Grupowanie z wieloma agregacjami w jednym przebiegu na kodach kategorii:
+    klucze grup są zamieniane na liczby całkowite (pd.factorize), a sum/count
+    liczone przez np.bincount i min/max przez np.minimum.at/np.maximum.at –
+    bez pętli po grupach w Pythonie. Zasilany kawałkami danych (update)
+    albo innym akumulatorem (merge), więc działa też strumieniowo i między plikami.
+    Kwantyle są dokładne: zachowywane są tylko (kod grupy, wartość) kolumn,
+    dla których zamówiono kwantyle.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        # klucze grup w kolejności pojawienia się; pozycja w indeksie = numer grupy
+        self.keys: Optional[pd.Index] = None
+        n = len(spec["values"])
+        self.sums = np.zeros((n, 0))
+        self.counts = np.zeros((n, 0), dtype=np.int64)
+        self.mins = np.zeros((n, 0))
+        self.maxs = np.zeros((n, 0))
+        self.quantiles = [q for q in map(_quantile_of, spec["aggs"]) if q is not None]
+        # kolumna -> lista (numery grup, wartości) do policzenia kwantyli na końcu
+        self.samples: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {
+            c: [] for c in spec["values"]
+        }
+
+    @property
+    def size(self) -> int:
+        return 0 if self.keys is None else len(self.keys)
+
+    def _lookup(self, keys: pd.Index) -> np.ndarray:
+        """Numery grup dla kluczy (nowe klucze dostają kolejne numery)."""
+        if self.keys is None:
+            self.keys = keys
+            return np.arange(len(keys), dtype=np.int64)
+        ids = self.keys.get_indexer(keys).astype(np.int64)
+        new = ids < 0
+        if new.any():
+            ids[new] = np.arange(len(self.keys), len(self.keys) + new.sum())
+            self.keys = self.keys.append(keys[new])
+        return ids
+
+    def _group_ids(self, chunk: pd.DataFrame) -> np.ndarray:
+        """Numery grup wierszy kawałka (-1 dla braków w kluczu)."""
+        codes = np.zeros(len(chunk), dtype=np.int64)
+        uniques = []
+        valid = np.ones(len(chunk), dtype=bool)
+        for col in self.spec["by"]:
+            c, u = pd.factorize(chunk[col])
+            if isinstance(u, pd.Categorical):
+                u = u.astype(object)
+            valid &= c >= 0
+            codes = codes * max(len(u), 1) + c
+            uniques.append(np.asarray(u))
+        local, combined = pd.factorize(codes[valid])
+        # kod złożony -> kody poszczególnych kolumn klucza (wektorowo)
+        levels = []
+        rest = np.asarray(combined, dtype=np.int64)
+        for u in reversed(uniques):
+            rest, digit = np.divmod(rest, max(len(u), 1))
+            levels.append(u.take(digit) if len(u) else np.empty(0, dtype=object))
+        levels.reverse()
+        if len(levels) == 1:
+            keys = pd.Index(levels[0], name=self.spec["by"][0])
+        else:
+            keys = pd.MultiIndex.from_arrays(levels, names=self.spec["by"])
+        ids = np.full(len(chunk), -1, dtype=np.int64)
+        ids[valid] = self._lookup(keys)[local]
+        return ids
+
+    def _reserve(self) -> None:
+        size = self.size
+        self.sums = _grow(self.sums, size, 0.0)
+        self.counts = _grow(self.counts, size, 0).astype(np.int64)
+        self.mins = _grow(self.mins, size, np.inf)
+        self.maxs = _grow(self.maxs, size, -np.inf)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for col in self.spec["by"] + self.spec["values"]:
+            if col not in chunk.columns:
+                raise ValueError(f"Grupowanie: brak kolumny '{col}' w danych.")
+        ids = self._group_ids(chunk)
+        self._reserve()
+        size = self.size
+        for j, col in enumerate(self.spec["values"]):
+            if not pd.api.types.is_numeric_dtype(chunk[col]):
+                raise ValueError(f"Grupowanie: kolumna '{col}' nie jest liczbowa.")
+            values = chunk[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            ok = (ids >= 0) & ~np.isnan(values)
+            g, v = ids[ok], values[ok]
+            self.sums[j] += np.bincount(g, weights=v, minlength=size)
+            self.counts[j] += np.bincount(g, minlength=size)
+            np.minimum.at(self.mins[j], g, v)
+            np.maximum.at(self.maxs[j], g, v)
+            if self.quantiles:
+                self.samples[col].append((g, v))
+
+    def merge(self, other: "GroupAccumulator") -> None:
+        check_mergeable(self, other, "spec")
+        if other.keys is None:
+            return
+        remap = self._lookup(other.keys)
+        self._reserve()
+        size = self.size
+        for j, col in enumerate(self.spec["values"]):
+            self.sums[j] += np.bincount(remap, weights=other.sums[j], minlength=size)
+            self.counts[j] += np.bincount(
+                remap, weights=other.counts[j], minlength=size
+            ).astype(np.int64)
+            np.minimum.at(self.mins[j], remap, other.mins[j])
+            np.maximum.at(self.maxs[j], remap, other.maxs[j])
+            self.samples[col] += [(remap[g], v) for g, v in other.samples[col]]
+
+    def _group_quantiles(self, col: str) -> np.ndarray:
+        """Macierz [kwantyl, grupa] z interpolacją liniową (jak Series.quantile)."""
+        size = self.size
+        parts = self.samples[col]
+        g = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, np.int64)
+        v = np.concatenate([p[1] for p in parts]) if parts else np.empty(0)
+        # sortowanie po wartości, potem stabilne po grupie (radix dla małych typów)
+        order = np.argsort(v)
+        g, v = g[order], v[order]
+        narrow = np.uint16 if size <= np.iinfo(np.uint16).max else np.uint32
+        order = np.argsort(g.astype(narrow), kind="stable")
+        g, v = g[order], v[order]
+        n = np.bincount(g, minlength=size)
+        start = np.concatenate([[0], np.cumsum(n)[:-1]])
+        result = np.full((len(self.quantiles), size), np.nan)
+        has = n > 0
+        for i, q in enumerate(self.quantiles):
+            pos = q * (n[has] - 1)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.ceil(pos).astype(np.int64)
+            a, b = v[start[has] + lo], v[start[has] + hi]
+            result[i, has] = a + (b - a) * (pos - lo)
+        return result
+
+    def result(self) -> pd.DataFrame:
+        """Tabela grup posortowana wg klucza: kolumny `by` + "<kolumna> <agregacja>"."""
+        by, aggs = self.spec["by"], self.spec["aggs"]
+        if self.keys is None:
+            return pd.DataFrame(columns=by)
+        table = self.keys.set_names(by).to_frame(index=False)
+        for j, col in enumerate(self.spec["values"]):
+            count = self.counts[j]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                computed = {
+                    "sum": self.sums[j],
+                    "count": count,
+                    "mean": np.where(count > 0, self.sums[j] / count, np.nan),
+                    "min": np.where(count > 0, self.mins[j], np.nan),
+                    "max": np.where(count > 0, self.maxs[j], np.nan),
+                }
+            if self.quantiles:
+                qs = self._group_quantiles(col)
+            q_index = 0
+            for agg in aggs:
+                if agg in computed:
+                    table[f"{col} {agg}"] = computed[agg]
+                else:
+                    table[f"{col} {agg}"] = qs[q_index]
+                    q_index += 1
+        return table.sort_values(by, kind="stable").reset_index(drop=True)
+
+    def report_table(self) -> Tuple[str, pd.DataFrame]:
+        """(podpis, tabela) do raportu: najwyżej `rows` grup, liczby zaokrąglone."""
+        table = self.result()
+        caption = f"{', '.join(self.spec['values'])} wg {', '.join(self.spec['by'])}"
+        rows = self.spec["rows"]
+        if len(table) > rows:
+            caption += f" – pierwsze {rows} z {len(table)} grup"
+            table = table.head(rows)
+        return caption, table.round(2)
+
+
+def group_tables(
+    df: pd.DataFrame, specs: List[Dict[str, Any]]
+) -> List[Tuple[str, pd.DataFrame]]:
+    """Grupowania z configu policzone na całej ramce: [(podpis, tabela), ...]."""
+    result = []
+    for spec in specs:
+        acc = GroupAccumulator(spec)
+        acc.update(df)
+        result.append(acc.report_table())
+    return result
@@ -1,15 +1,247 @@
 import argparse
 import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from config import load_config
-from csv_utils import (
-    discover_csv_files,
-    process_csv_file,
-)
-from charts import (
-    generate_charts,
-    generate_special_pie_chart,
-)  # Dodano import specjalnej funkcji!
-from report import generate_pdf_report
+from profiling import enabled as profiling_enabled, merge, run_profiled, span
+
+# Ciężkie moduły (pandas przez csv_utils, fpdf przez report, matplotlib przez charts)
+# są importowane dopiero w etapach, które ich potrzebują – `--help` i start
+# procesu z CRON-a nie płacą za nie z góry.
+
+
+def run_pipeline(path: str, config: Dict[str, Any]) -> str:
+    """
+    Przetwarza jeden plik CSV: wczytanie, wykresy, raport PDF.
+    Zwraca ścieżkę wygenerowanego raportu.
+    """
+    with span("pipeline", file=path):
+        with span("import csv_utils"):
+            from csv_utils import process_csv_file
+
+        print(f"\n=== Przetwarzanie: {path} ===")
+        summary = process_csv_file(path, config)
+
+        # Jeden etap planowania wykresów (bez duplikatów) dla wszystkich trybów
+        with span("import charts"):
+            from charts import generate_charts
+
+        charts = generate_charts(summary, config)
+
+        with span("import report"):
+            from report import generate_pdf_report
+
+        rpt = generate_pdf_report(summary, charts, config)
+    print(f"Generated: {rpt}")
+    return rpt
+
+
+def is_interactive(config: Dict[str, Any]) -> bool:
+    """Czy konfiguracja wymaga pytań do użytkownika (input())?"""
+    return (
+        not config
+        or config.get("interactive_filter", True)
+        or config.get("interactive_sort", True)
+        or config.get("interactive_charts", True)
+    )
+
+
+def _run_batch_job(path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Uruchamia pipeline dla jednego pliku, izolując ewentualny błąd."""
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"file": path, "ok": False, "report": None, "error": None}
+    try:
+        result["report"] = run_pipeline(path, config)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        print(f"[ERROR] Nie udało się przetworzyć pliku {path}: {result['error']}")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _run_profiled_job(path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """_run_batch_job w procesie roboczym z profilowaniem (--profile)."""
+    result, events = run_profiled(_run_batch_job, path, config)
+    result["trace_events"] = events
+    return result
+
+
+def _worker_config(config: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """
+    Kopia konfiguracji dla procesu roboczego. Każdy plik dostaje własny
+    podkatalog na wykresy, żeby równoległe zadania nie nadpisywały sobie PNG.
+    """
+    cfg = dict(config)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cfg["charts_dir"] = os.path.join(config.get("charts_dir", "charts"), stem)
+    # rdzenie są już zajęte przez równoległe pliki – wykresy rysujemy w procesie pliku
+    cfg["chart_workers"] = 1
+    return cfg
+
+
+def run_batch(
+    files: List[str], config: Dict[str, Any], jobs: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Przetwarza listę plików szeregowo (jobs=1) lub w puli procesów (jobs>1).
+    Błąd w jednym pliku nie przerywa pozostałych. Wyniki są w kolejności plików.
+    """
+    if jobs > 1 and is_interactive(config):
+        print(
+            "[WARN] Tryb interaktywny nie działa w puli procesów, przetwarzam szeregowo."
+        )
+        jobs = 1
+    jobs = min(jobs, len(files)) if files else 1
+
+    if jobs <= 1:
+        return [_run_batch_job(f, config) for f in files]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    results: List[Dict[str, Any]] = []
+    job = _run_profiled_job if profiling_enabled() else _run_batch_job
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(job, f, _worker_config(config, f)) for f in files]
+        for f, future in zip(files, futures):
+            try:
+                results.append(future.result())
+                merge(results[-1].pop("trace_events", None))
+            except Exception as e:
+                # np. awaria procesu roboczego (BrokenProcessPool)
+                results.append(
+                    {
+                        "file": f,
+                        "ok": False,
+                        "report": None,
+                        "error": f"{type(e).__name__}: {e}",
+                        "seconds": 0.0,
+                    }
+                )
+    return results
+
+
+def _part_config(config: Dict[str, Any], i: int) -> Dict[str, Any]:
+    """
+    Config dla i-tego pliku w trybie łączonym: inne ziarno losowania tabeli,
+    żeby próby z kolejnych plików nie wybierały tych samych pozycji wierszy.
+    """
+    table = config.get("table")
+    if not isinstance(table, dict):
+        return config
+    return {**config, "table": {**table, "seed": table.get("seed", 0) + i}}
+
+
+def _aggregate_job(
+    path: str,
+    config: Dict[str, Any],
+    profile: bool = False,
+    columns: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Agregaty jednego pliku dla trybu łączonego; błąd jest zwracany, nie zgłaszany."""
+    from csv_utils import file_aggregates
+
+    result: Dict[str, Any] = {"file": path, "aggregates": None, "error": None}
+    try:
+        if profile:
+            result["aggregates"], result["trace_events"] = run_profiled(
+                file_aggregates, path, config, columns
+            )
+        else:
+            result["aggregates"] = file_aggregates(path, config, columns)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        print(f"[ERROR] Nie udało się przetworzyć pliku {path}: {result['error']}")
+    return result
+
+
+def run_combined(
+    files: List[str], config: Dict[str, Any], name: str, jobs: int = 1
+) -> Tuple[Optional[str], List[str]]:
+    """
+    Jeden raport dla wielu plików. Każdy plik jest agregowany osobno (w puli
+    procesów przy jobs > 1) do częściowego podsumowania: sum/count/min/max kolumn
+    liczbowych, liczności wartości, wiersze tabeli. Części są łączone w jedno
+    podsumowanie – pliki nigdy nie są sklejane w jeden DataFrame.
+    Zwraca (ścieżka raportu lub None, gdy żaden plik się nie wczytał; pliki z błędem).
+    """
+    if jobs > 1 and is_interactive(config):
+        print(
+            "[WARN] Tryb interaktywny nie działa w puli procesów, przetwarzam szeregowo."
+        )
+        jobs = 1
+    jobs = min(jobs, len(files)) if files else 1
+    configs = [_part_config(config, i) for i in range(len(files))]
+    from csv_utils import combined_columns
+
+    # sortowanie i wybór wierszy tabeli ustalane raz, z kolumn wszystkich plików
+    columns = combined_columns(files, config)
+
+    with span("aggregate_files", files=len(files), workers=jobs):
+        if jobs <= 1:
+            results = [
+                _aggregate_job(f, c, columns=columns) for f, c in zip(files, configs)
+            ]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            results = []
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = [
+                    executor.submit(_aggregate_job, f, c, profiling_enabled(), columns)
+                    for f, c in zip(files, configs)
+                ]
+                for f, future in zip(files, futures):
+                    try:
+                        results.append(future.result())
+                        merge(results[-1].pop("trace_events", None))
+                    except Exception as e:
+                        # np. awaria procesu roboczego (BrokenProcessPool)
+                        print(f"[ERROR] Nie udało się przetworzyć pliku {f}: {e}")
+                        results.append({"file": f, "aggregates": None})
+
+    ok = [r for r in results if r["aggregates"] is not None]
+    failed = [r["file"] for r in results if r["aggregates"] is None]
+    if not ok:
+        return None, failed
+    from csv_utils import combined_summary
+
+    with span("merge_aggregates", files=len(ok)):
+        summary = combined_summary(
+            name, [r["aggregates"] for r in ok], [r["file"] for r in ok], config
+        )
+
+    from charts import generate_charts
+
+    charts = generate_charts(summary, config)
+
+    from report import generate_pdf_report
+
+    rpt = generate_pdf_report(summary, charts, config)
+    print(f"Generated: {rpt} (plików: {len(ok)} z {len(files)})")
+    return rpt, failed
+
+
+def print_batch_summary(results: List[Dict[str, Any]]) -> None:
+    """Wypisuje tabelę podsumowania: plik, status, czas, raport lub błąd."""
+    if not results:
+        return
+    name_w = max(len(os.path.basename(r["file"])) for r in results)
+    name_w = max(name_w, len("Plik"))
+    print("\n=== Podsumowanie przetwarzania ===")
+    print(f"{'Plik':<{name_w}}  {'Status':<6}  {'Czas [s]':>8}  Wynik")
+    for r in results:
+        status = "OK" if r["ok"] else "BŁĄD"
+        outcome = r["report"] if r["ok"] else r["error"]
+        print(
+            f"{os.path.basename(r['file']):<{name_w}}  {status:<6}  "
+            f"{r['seconds']:>8.2f}  {outcome}"
+        )
+    ok = sum(1 for r in results if r["ok"])
+    total = sum(r["seconds"] for r in results)
+    print(
+        f"Sukcesy: {ok}, błędy: {len(results) - ok}, łączny czas plików: {total:.2f} s"
+    )
 
 
 def main():
@@ -17,10 +249,101 @@ def main():
     p.add_argument(
         "-c", "--config", default="config.yaml", help="Plik konfiguracyjny YAML"
     )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Liczba procesów do równoległego przetwarzania plików (0 = liczba rdzeni)",
+    )
+    p.add_argument(
+        "--no-cache", action="store_true", help="Nie używaj cache (kodowania, dane)"
+    )
+    p.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Zignoruj istniejący cache danych i zbuduj go od nowa",
+    )
+    p.add_argument(
+        "--serve",
+        action="store_true",
+        help="Tryb serwera: przyjmuj zadania raportów przez HTTP na localhost",
+    )
+    p.add_argument("--host", default="127.0.0.1", help="Adres serwera (--serve)")
+    p.add_argument("--port", type=int, default=8765, help="Port serwera (--serve)")
+    p.add_argument(
+        "--watch",
+        action="store_true",
+        help="Obserwuj input_dir i generuj raporty dla nowych lub zmienionych plików",
+    )
+    p.add_argument(
+        "--combine",
+        action="store_true",
+        help="Jeden raport z wszystkich plików input_dir (jak `combine: true` w configu)",
+    )
+    p.add_argument(
+        "--profile",
+        nargs="?",
+        const="profile.json",
+        metavar="PLIK",
+        help="Zapisz profil etapów (czas, wiersze, bajty, pamięć) jako trace-event JSON "
+        "(domyślnie profile.json; podgląd w chrome://tracing lub ui.perfetto.dev)",
+    )
     args = p.parse_args()
+    if not args.profile:
+        run_cli(args)
+        return
+    from profiling import disable, enable
+
+    enable()
+    try:
+        with span("main"):
+            run_cli(args)
+    finally:
+        disable().save(args.profile)
+        print(f"[INFO] Zapisano profil przebiegu: {args.profile}")
+
+
+def run_cli(args: argparse.Namespace) -> None:
+    """Wykonuje tryb wybrany flagami wiersza poleceń."""
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    if args.serve:
+        from server import serve
+
+        overrides: Dict[str, Any] = {}
+        if args.no_cache:
+            overrides["cache"] = False
+        if args.rebuild_cache:
+            overrides["rebuild_cache"] = True
+        serve(args.host, args.port, jobs, overrides)
+        return
+
+    from csv_utils import discover_csv_files
 
     # Sprawdź, czy config istnieje i go wczytaj
-    config = load_config(args.config) if os.path.exists(args.config) else {}
+    with span("load_config", file=args.config):
+        config = load_config(args.config) if os.path.exists(args.config) else {}
+
+    if args.watch:
+        if is_interactive(config) or "input_file" in config:
+            print(
+                "[ERROR] Tryb --watch wymaga configu bez trybu interaktywnego "
+                "i bez `input_file`."
+            )
+            raise SystemExit(2)
+        from watcher import DirectoryWatcher
+
+        if args.no_cache:
+            config = {**config, "cache": False}
+        if args.rebuild_cache:
+            config = {**config, "rebuild_cache": True}
+        watcher = DirectoryWatcher(config.get("input_dir", "test_data"), config, jobs)
+        try:
+            watcher.watch()
+        except KeyboardInterrupt:
+            print("\n[INFO] Zakończono obserwowanie katalogu.")
+        return
 
     # Przygotuj listę plików do przetworzenia
     files = []
@@ -50,40 +373,33 @@ def main():
             print("Niepoprawny wybór, przerywam.")
             return
 
-    # Przetwarzanie wybranego pliku/pliku z configa
-    for f in files:
-        print(f"\n=== Przetwarzanie: {f} ===")
-        summary = process_csv_file(f, config)
-
-        charts = []
-        # --- NOWOŚĆ: automatyczne wykresy typu pie_special z config.yaml ---
-        if config and "charts" in config:
-            for chart in config["charts"]:
-                if chart.get("type") == "pie_special":
-                    # Potrzebne klucze: column oraz values (lista wartości!)
-                    charts_dir = config.get("charts_dir", "charts")
-                    os.makedirs(charts_dir, exist_ok=True)
-                    df = summary["dataframe"]
-                    column = chart.get("column")
-                    values = chart.get("values")
-                    if column and values and column in df.columns:
-                        pie_path = generate_special_pie_chart(
-                            df, column, values, charts_dir
-                        )
-                        if pie_path:
-                            charts.append(pie_path)
-                    else:
-                        print(
-                            "[WARN] Brak kolumny lub wartości do automatycznego wykresu udziału."
-                        )
-            # Wygeneruj również klasyczne wykresy z config.yaml (bar, line, pie)
-            charts += generate_charts(summary, config)
-        else:
-            # Tryb interaktywny: generuj wykresy przez zapytania do użytkownika
-            charts = generate_charts(summary, config)
+    # Przełączniki cache dopisujemy dopiero po wyborze trybu (pusty config = interaktywny)
+    if args.no_cache:
+        config = {**config, "cache": False}
+    if args.rebuild_cache:
+        config = {**config, "rebuild_cache": True}
 
-        rpt = generate_pdf_report(summary, charts, config)
-        print(f"Generated: {rpt}")
+    if (args.combine or config.get("combine")) and "input_file" not in config:
+        if not files:
+            print("[ERROR] Brak plików CSV do połączenia.")
+            raise SystemExit(1)
+        input_dir = config.get("input_dir", "test_data")
+        # kolejność nazw plików (np. dzienne CSV) wyznacza kolejność wierszy
+        files = sorted(files)
+        rpt, failed = run_combined(files, config, os.path.normpath(input_dir), jobs)
+        if rpt is None or failed:
+            raise SystemExit(1)
+        return
+
+    # Przetwarzanie wybranego pliku/plików z configa
+    if len(files) == 1:
+        run_pipeline(files[0], config)
+        return
+
+    results = run_batch(files, config, jobs)
+    print_batch_summary(results)
+    if not all(r["ok"] for r in results):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
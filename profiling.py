@@ -0,0 +1,182 @@
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Profil przebiegu (`--profile`): odcinki czasu etapów pipeline'u zapisywane jako
+# plik trace-event (JSON), który otwiera chrome://tracing albo https://ui.perfetto.dev.
+# Bez --profile span() zwraca jeden współdzielony pusty obiekt – koszt to wywołanie
+# funkcji i sprawdzenie zmiennej globalnej.
+
+_PROFILER: Optional["Profiler"] = None
+
+
+def reset_peak_rss() -> bool:
+    """Zeruje licznik szczytowego RSS procesu (Linux: /proc/self/clear_refs)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Szczytowy RSS procesu w MB: od ostatniego reset_peak_rss() (Linux, VmHWM),
+    a gdzie indziej od startu procesu (getrusage). None, gdy niedostępny.
+    """
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss: kB na Linuksie, bajty na macOS
+    scale = 2**20 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class _NullSpan:
+    """Span przy wyłączonym profilowaniu: nic nie mierzy."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler: "Profiler", name: str, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.peak: float = 0.0
+
+    def set(self, **args) -> None:
+        """Dopisuje argumenty odcinka, np. liczbę wierszy i bajtów."""
+        self.args.update(args)
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        if stack:
+            # szczyt rodzica do tej chwili, zanim licznik zostanie wyzerowany
+            stack[-1].peak = max(stack[-1].peak, peak_rss_mb() or 0.0)
+        reset_peak_rss()
+        stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        stack = self.profiler._stack()
+        stack.pop()
+        self.peak = max(self.peak, peak_rss_mb() or 0.0)
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+        if self.peak:
+            self.args["peak_rss_mb"] = round(self.peak, 1)
+        self.profiler.events.append(
+            {
+                "name": self.name,
+                "ph": "X",
+                "ts": self.start // 1000,
+                "dur": (end - self.start) // 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": self.args,
+            }
+        )
+        return False
+
+
+class Profiler:
+    """Zbiera odcinki (trace events typu "X") bieżącego procesu."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self._local = threading.local()
+
+    def _stack(self) -> List[_Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def save(self, path: str) -> None:
+        """Zapisuje profil w formacie trace-event (JSON)."""
+        names = {
+            e["pid"]: ("pyreport" if e["pid"] == os.getpid() else f"worker {e['pid']}")
+            for e in self.events
+        }
+        meta = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}}
+            for pid, name in names.items()
+        ]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"traceEvents": meta + self.events, "displayTimeUnit": "ms"},
+                fh,
+                ensure_ascii=False,
+                default=str,
+            )
+
+
+def enable() -> Profiler:
+    """Włącza profilowanie w bieżącym procesie."""
+    global _PROFILER
+    _PROFILER = Profiler()
+    return _PROFILER
+
+
+def disable() -> Optional[Profiler]:
+    """Wyłącza profilowanie; zwraca zebrany profil."""
+    global _PROFILER
+    profiler, _PROFILER = _PROFILER, None
+    return profiler
+
+
+def enabled() -> bool:
+    return _PROFILER is not None
+
+
+def span(name: str, **args):
+    """
+    Odcinek czasu etapu (`with span("read_csv", bytes=n) as s: ... s.set(rows=k)`).
+    Zapisuje czas, argumenty i szczytowy RSS w trakcie etapu.
+    """
+    if _PROFILER is None:
+        return _NULL_SPAN
+    return _Span(_PROFILER, name, args)
+
+
+def merge(events: Optional[List[Dict[str, Any]]]) -> None:
+    """Dołącza odcinki zebrane w procesie roboczym do profilu bieżącego procesu."""
+    if _PROFILER is not None and events:
+        _PROFILER.events.extend(events)
+
+
+def run_profiled(fn: Callable, *args) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Wywołanie w procesie roboczym z profilowaniem; zwraca (wynik, odcinki),
+    które proces główny dołącza przez merge().
+    """
+    enable()
+    try:
+        return fn(*args), _PROFILER.events
+    finally:
+        disable()
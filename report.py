@@ -1,42 +1,354 @@
 import os
+import struct
+import threading
+import numpy as np
+import pandas as pd
+import fpdf.fpdf as fpdf_module
 from fpdf import FPDF
-from typing import Any, Dict, List
+from fpdf.ttfonts import TTFontFile, sub32
+from typing import Any, Dict, List, Tuple
+from csv_utils import DEFAULT_TABLE_ROWS
+from profiling import span
+
+# Ile najdłuższych napisów kolumny mierzyć przy ustalaniu jej szerokości
+TABLE_MEASURE_CANDIDATES = 50
+_PDF_ESCAPE = str.maketrans({"\\": "\\\\", "(": "\\(", ")": "\\)", "\r": "\\r"})
+
+
+def _pdf_text(text: str) -> str:
+    """Tekst w postaci dla operatora Tj czcionki Unicode (UTF-16BE, z escapowaniem)."""
+    return text.encode("utf-16-be").decode("latin1").translate(_PDF_ESCAPE)
+
+
+def _char_width(cw, char: str) -> int:
+    code = ord(char)
+    return cw[code] if code < len(cw) else 500
+
+
+class _PDFBuffer:
+    """
+    Bufor dokumentu dla FPDF. FPDF dokleja każdą linię do jednego str
+    (`self.buffer += ...`), co przy tysiącach stron jest kwadratowe;
+    tu dopisywanie jest O(1), a sklejenie następuje raz, przy zapisie.
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.length = 0
+
+    def __iadd__(self, s: str) -> "_PDFBuffer":
+        self.parts.append(s)
+        self.length += len(s)
+        return self
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
+
+    def encode(self, *args) -> bytes:
+        return str(self).encode(*args)
+
+
+class _GlyphSubset(list):
+    """
+    Lista znaków podzbioru czcionki (font['subset'] w FPDF) bez powtórzeń
+    i z szybkim `in` – FPDF sprawdza ją przy zapisie dla każdego z 65 tys. znaków.
+    """
+
+    def __init__(self, codes=()):
+        super().__init__()
+        self._seen = set()
+        self.extend(codes)
+
+    def append(self, code: int) -> None:
+        if code not in self._seen:
+            self._seen.add(code)
+            super().append(code)
+
+    def extend(self, codes) -> None:
+        for code in codes:
+            self.append(code)
+
+    def __contains__(self, code) -> bool:
+        return code in self._seen
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._seen = set(self)
+
+
+def _checksum(data: bytes) -> Tuple[int, int]:
+    """Suma kontrolna tabeli TrueType (jak fpdf.ttfonts.calcChecksum, ale w NumPy)."""
+    padded = data + b"\0" * (-len(data) % 4)
+    total = int(np.frombuffer(padded, dtype=">u4").sum(dtype=np.uint64)) & 0xFFFFFFFF
+    return total >> 16, total & 0xFFFF
+
+
+# Tabele czcionek sparsowane w tym procesie: {(plik, tabela, argumenty): wynik}
+_PARSED_FONT_TABLES: Dict[Tuple, Any] = {}
+
+
+class _FontFile(TTFontFile):
+    """
+    TTFontFile, który przy osadzaniu podzbioru czcionki parsuje tabele cmap,
+    hmtx i loca raz na proces (są takie same dla każdego raportu), a sumy
+    kontrolne liczy wektorowo. Sam podzbiór nadal powstaje dla każdego dokumentu.
+    """
+
+    def _parsed(self, table: str, args: Tuple, parse):
+        key = (self.filename, table, args)
+        if key not in _PARSED_FONT_TABLES:
+            _PARSED_FONT_TABLES[key] = parse()
+        return _PARSED_FONT_TABLES[key]
+
+    def getCMAP4(self, unicode_cmap_offset, glyphToChar, charToGlyph):
+        def parse():
+            g2c: Dict[int, List[int]] = {}
+            c2g: Dict[int, int] = {}
+            super(_FontFile, self).getCMAP4(unicode_cmap_offset, g2c, c2g)
+            return g2c, c2g, self.maxUniChar
+
+        g2c, c2g, self.maxUniChar = self._parsed("cmap4", (unicode_cmap_offset,), parse)
+        glyphToChar.update(g2c)
+        charToGlyph.update(c2g)
+
+    def getHMTX(self, numberOfHMetrics, numGlyphs, glyphToChar, scale):
+        def parse():
+            super(_FontFile, self).getHMTX(
+                numberOfHMetrics, numGlyphs, glyphToChar, scale
+            )
+            return self.charWidths, self.defaultWidth
+
+        self.charWidths, self.defaultWidth = self._parsed(
+            "hmtx", (numberOfHMetrics, numGlyphs, scale), parse
+        )
+
+    def getLOCA(self, indexToLocFormat, numGlyphs):
+        def parse():
+            super(_FontFile, self).getLOCA(indexToLocFormat, numGlyphs)
+            return self.glyphPos
+
+        self.glyphPos = self._parsed("loca", (indexToLocFormat, numGlyphs), parse)
+
+    def endTTFile(self, stm):
+        """Składa plik TTF z tabel (jak w fpdf, z szybszą sumą kontrolną)."""
+        tables = sorted(self.otables.items())
+        num_tables = len(tables)
+        search_range, entry_selector = 1, 0
+        while search_range * 2 <= num_tables:
+            search_range *= 2
+            entry_selector += 1
+        search_range *= 16
+        parts = [
+            struct.pack(
+                ">LHHHH",
+                0x00010000,
+                num_tables,
+                search_range,
+                entry_selector,
+                num_tables * 16 - search_range,
+            )
+        ]
+        offset = 12 + num_tables * 16
+        head_start = 0
+        for tag, data in tables:
+            if tag == "head":
+                head_start = offset
+            parts.append(tag.encode("latin1"))
+            parts.append(struct.pack(">HH", *_checksum(data)))
+            parts.append(struct.pack(">LL", offset, len(data)))
+            offset += (len(data) + 3) & ~3
+        for _, data in tables:
+            parts.append(data + b"\0" * (-len(data) % 4))
+        stm = b"".join(parts)
+        hi, lo = sub32((0xB1B0, 0xAFBA), _checksum(stm))
+        return self.splice(stm, head_start + 8, struct.pack(">HH", hi, lo))
+
+
+# Słownik czcionki (metryki z DejaVuSans.pkl) wczytany raz na proces: {ścieżka: (fonts, font_files)}
+_FONT_TEMPLATES: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+_PUTFONTS_LOCK = threading.Lock()
 
 
 class PDFReport(FPDF):
     def __init__(self):
         super().__init__()
+        self.buffer = _PDFBuffer()
         # Dynamiczna lokalizacja pliku czcionki obok modułu
         current_dir = os.path.abspath(os.path.dirname(__file__))
         font_path = os.path.join(current_dir, "DejaVuSans.ttf")
-        if not os.path.isfile(font_path):
+        if font_path not in _FONT_TEMPLATES and not os.path.isfile(font_path):
             raise FileNotFoundError(
                 f"Nie znaleziono pliku czcionki: {font_path}. "
                 "Upewnij się, że DejaVuSans.ttf jest obok report.py"
             )
         # Rejestrujemy TrueType font z unikalną nazwą i obsługą Unicode
-        self.add_font("DejaVuSansLocal", "", font_path, uni=True)
+        self._add_unicode_font("DejaVuSansLocal", font_path)
         self.set_font("DejaVuSansLocal", "", 12)
 
+    def _add_unicode_font(self, family: str, font_path: str) -> None:
+        """
+        add_font(uni=True) z metrykami wczytanymi raz na proces; każdy dokument
+        dostaje własną kopię wpisu czcionki z pustym podzbiorem znaków.
+        """
+        if font_path not in _FONT_TEMPLATES:
+            self.add_font(family, "", font_path, uni=True)
+            _FONT_TEMPLATES[font_path] = (
+                {k: {**v, "subset": list(v["subset"])} for k, v in self.fonts.items()},
+                {k: dict(v) for k, v in self.font_files.items()},
+            )
+            # czcionka już zarejestrowana przez add_font – tylko szybszy podzbiór znaków
+            for font in self.fonts.values():
+                font["subset"] = _GlyphSubset(font["subset"])
+            return
+        fonts, font_files = _FONT_TEMPLATES[font_path]
+        for key, font in fonts.items():
+            self.fonts[key] = {
+                **font,
+                "i": len(self.fonts) + 1,
+                "subset": _GlyphSubset(font["subset"]),
+            }
+        self.font_files.update({k: dict(v) for k, v in font_files.items()})
+
+    def _putfonts(self):
+        # FPDF tworzy TTFontFile wewnątrz _putfonts; na czas zapisu podstawiamy _FontFile.
+        # Podmiana dotyczy całego modułu fpdf, więc zapis czcionek wątków (serwer) idzie po kolei.
+        with _PUTFONTS_LOCK:
+            original = fpdf_module.TTFontFile
+            fpdf_module.TTFontFile = _FontFile
+            try:
+                super()._putfonts()
+            finally:
+                fpdf_module.TTFontFile = original
+
     def header(self):
         # Nagłówek raportu
         self.set_font("DejaVuSansLocal", "", 16)
         self.cell(0, 10, "Raport danych CSV", ln=True, align="C")
         self.ln(10)
 
-    def add_table(self, df):
-        # Tabela danych: nagłówki + pierwsze 20 wierszy
+    def add_table(self, df, row_height: float = 10):
+        """
+        Tabela danych z nagłówkiem powtarzanym na każdej stronie.
+        Kolumny są zamieniane na tekst w całości (astype(str)), szerokości liczone
+        z rzeczywistej szerokości tekstu, a komórki strony trafiają do PDF jednym zapisem.
+        """
         self.set_font("DejaVuSansLocal", "", 10)
-        col_width = self.w / (len(df.columns) + 1)
-        # Nagłówki kolumn
-        for col in df.columns:
-            self.cell(col_width, 10, str(col), border=1)
-        self.ln()
-        # Wiersze danych
-        for _, row in df.iterrows():
-            for item in row:
-                self.cell(col_width, 10, str(item), border=1)
-            self.ln()
+        headers = [str(col) for col in df.columns]
+        if not headers:
+            return
+        columns = [df[col].astype(str).tolist() for col in df.columns]
+        widths = self._column_widths(headers, columns)
+        columns = [self._clip_column(c, w) for c, w in zip(columns, widths)]
+        headers = [self._clip_text(t, w) for t, w in zip(headers, widths)]
+        self._register_glyphs(headers, columns)
+
+        k, h = self.k, row_height
+        xs = [self.l_margin]
+        for w in widths[:-1]:
+            xs.append(xs[-1] + w)
+        cell_fmt = [
+            f"{x * k:.2f} {{y:.2f}} {w * k:.2f} {-h * k:.2f} re S "
+            f"BT {(x + self.c_margin) * k:.2f} {{ty:.2f}} Td ({{t}}) Tj ET"
+            for x, w in zip(xs, widths)
+        ]
+        text_offset = 0.5 * h + 0.3 * self.font_size
+        encoded_headers = [_pdf_text(t) for t in headers]
+        encoded = [[_pdf_text(t) for t in col] for col in columns]
+
+        def row_ops(cells: List[str]) -> str:
+            y = (self.h - self.y) * k
+            ty = (self.h - (self.y + text_offset)) * k
+            self.y += h
+            return " ".join(f.format(y=y, ty=ty, t=t) for f, t in zip(cell_fmt, cells))
+
+        if self.y + 2 * h > self.page_break_trigger:
+            self.add_page()
+        ops = [row_ops(encoded_headers)]
+        for cells in zip(*encoded):
+            if self.y + h > self.page_break_trigger:
+                self._out("\n".join(ops))
+                self.add_page()
+                ops = [row_ops(encoded_headers)]
+            ops.append(row_ops(cells))
+        self._out("\n".join(ops))
+        self.x = self.l_margin
+
+    def _column_widths(
+        self, headers: List[str], columns: List[List[str]]
+    ) -> List[float]:
+        """
+        Szerokości kolumn z najszerszego tekstu w kolumnie (mierzone są tylko
+        najdłuższe napisy). Gdy tabela się nie mieści, szerokie kolumny są zwężane.
+        """
+        available = self.w - self.l_margin - self.r_margin
+        natural = []
+        for header, col in zip(headers, columns):
+            lengths = pd.Series(col, dtype=object).str.len()
+            longest = {col[i] for i in lengths.nlargest(TABLE_MEASURE_CANDIDATES).index}
+            text_w = max(self.get_string_width(t) for t in longest | {header})
+            natural.append(text_w + 2 * self.c_margin)
+        total = sum(natural)
+        if total <= available:
+            extra = (available - total) / len(natural)
+            return [w + extra for w in natural]
+        # Zwężanie: kolumny węższe niż równy udział zostają, resztę dzielą szerokie
+        widths = list(natural)
+        wide = set(range(len(widths)))
+        while wide:
+            share = (
+                available - sum(widths[i] for i in range(len(widths)) if i not in wide)
+            ) / len(wide)
+            narrow = {i for i in wide if natural[i] <= share}
+            if not narrow:
+                for i in wide:
+                    widths[i] = share
+                break
+            wide -= narrow
+        return widths
+
+    def _clip_text(self, text: str, width: float) -> str:
+        """Przycina napis do szerokości kolumny, dodając wielokropek."""
+        inner = width - 2 * self.c_margin
+        text_w = self.get_string_width(text)
+        if text_w <= inner:
+            return text
+        text = text[: max(int(len(text) * inner / text_w), 1)]
+        while text and self.get_string_width(text + "…") > inner:
+            text = text[:-1]
+        return text + "…"
+
+    def _clip_column(self, col: List[str], width: float) -> List[str]:
+        """
+        Przycina napisy kolumny. Napisy nie dłuższe niż `safe` znaków (liczone
+        dla najszerszego znaku w kolumnie) na pewno się mieszczą i nie są mierzone.
+        """
+        chars = set("".join(col))
+        if not chars:
+            return col
+        cw = self.current_font["cw"]
+        widest = max(_char_width(cw, c) for c in chars) * self.font_size / 1000.0
+        safe = int((width - 2 * self.c_margin) // widest) if widest else 0
+        clipped = {t: self._clip_text(t, width) for t in set(col) if len(t) > safe}
+        if not clipped:
+            return col
+        return [clipped.get(t, t) for t in col]
+
+    def _register_glyphs(self, headers: List[str], columns: List[List[str]]) -> None:
+        """Dopisuje użyte znaki do podzbioru czcionki osadzanego w PDF (każdy raz)."""
+        used = set("".join(headers))
+        for col in columns:
+            used.update("".join(col))
+        used.add("…")
+        self.current_font["subset"].extend(map(ord, used))
+
+    def output(self, name="", dest=""):
+        result = super().output(name, dest)
+        return str(result) if isinstance(result, _PDFBuffer) else result
 
     def add_images(self, paths: List[str]):
         # Dodanie wykresów
@@ -49,20 +361,57 @@ class PDFReport(FPDF):
 def generate_pdf_report(
     summary: Dict[str, Any], chart_paths: List[str], config: Dict[str, Any]
 ) -> str:
-    pdf = PDFReport()
-    pdf.add_page()
+    with span("generate_pdf_report") as s:
+        out = _generate_pdf_report(summary, chart_paths, config)
+        s.set(bytes=os.path.getsize(out))
+    return out
+
+
+def _generate_pdf_report(
+    summary: Dict[str, Any], chart_paths: List[str], config: Dict[str, Any]
+) -> str:
+    with span("pdf_init"):
+        pdf = PDFReport()
+        pdf.add_page()
 
     # Informacje o pliku
-    pdf.cell(0, 10, f"Plik: {os.path.basename(summary['filename'])}", ln=True)
+    name = os.path.basename(summary["filename"])
+    if summary.get("source_files"):
+        # raport łączony (combine): wiele plików z jednego katalogu
+        pdf.cell(0, 10, f"Katalog: {name}", ln=True)
+        pdf.cell(0, 10, f"Pliki: {len(summary['source_files'])}", ln=True)
+    else:
+        pdf.cell(0, 10, f"Plik: {name}", ln=True)
     pdf.cell(0, 10, f"Wiersze: {summary['row_count']}", ln=True)
 
-    # Tabela danych (pierwsze 20 wierszy)
+    # Tabela danych (domyślnie pierwsze 20 wierszy, patrz sekcja `table` configu)
+    table = summary.get("table")
+    if table is None:
+        table = summary["dataframe"].head(DEFAULT_TABLE_ROWS)
+    caption = summary.get("table_caption", f"pierwsze {DEFAULT_TABLE_ROWS} wierszy")
     pdf.ln(5)
-    pdf.cell(0, 10, "Tabela danych (pierwsze 20 wierszy):", ln=True)
-    pdf.add_table(summary["dataframe"].head(20))
+    pdf.cell(0, 10, f"Tabela danych ({caption}):", ln=True)
+    with span("pdf_table", rows=len(table), columns=len(table.columns)):
+        pdf.add_table(table)
+
+    # Tabele grupowań (sekcja `group_by` configu)
+    for caption, grouped in summary.get("group_by") or []:
+        pdf.ln(5)
+        pdf.cell(0, 10, f"Grupowanie: {caption}", ln=True)
+        with span("pdf_group_table", rows=len(grouped)):
+            pdf.add_table(grouped)
+
+    # Statystyki kolumn z trybu przybliżonego (opcja `approximate`)
+    stats = summary.get("column_stats")
+    if stats is not None:
+        pdf.ln(5)
+        pdf.cell(0, 10, "Statystyki kolumn (przybliżone):", ln=True)
+        with span("pdf_stats_table", rows=len(stats)):
+            pdf.add_table(stats)
 
     # Wykresy
-    pdf.add_images(chart_paths)
+    with span("pdf_images", images=len(chart_paths)):
+        pdf.add_images(chart_paths)
 
     # Zapis raportu
     rd = config.get("reports_dir", "reports")
@@ -71,5 +420,6 @@ def generate_pdf_report(
         rd,
         f"report_{os.path.splitext(os.path.basename(summary['filename']))[0]}.pdf",
     )
-    pdf.output(out)
+    with span("pdf_output"):
+        pdf.output(out)
     return out
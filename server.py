@@ -0,0 +1,278 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from config import load_config
+from main import _run_batch_job, _worker_config, is_interactive
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Ile zadań na jeden proces roboczy może czekać w kolejce, zanim serwer odpowie 503
+QUEUE_PER_WORKER = 2
+
+
+def _warm_worker() -> None:
+    """
+    Inicjalizacja procesu roboczego: import pandas/matplotlib/fpdf i wczytanie
+    czcionki raportu raz, zanim przyjdzie pierwsze zadanie.
+    """
+    import csv_utils  # noqa: F401
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+    from report import PDFReport
+
+    pdf = PDFReport()
+    pdf.add_page()
+    pdf.output(dest="S")
+
+
+class ReportServer:
+    """
+    Serwer raportów na localhost: przyjmuje zadania przez HTTP (POST /report)
+    i wykonuje je w puli rozgrzanych procesów. Liczba zadań w toku jest ograniczona
+    (`max_pending`); po jej przekroczeniu serwer od razu odpowiada 503.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        workers: int = 1,
+        max_pending: Optional[int] = None,
+        overrides: Optional[Dict[str, Any]] = None,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending or QUEUE_PER_WORKER * workers
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self.overrides = overrides or {}
+        self.configs: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self.executor = self._new_pool()
+        self.httpd = ThreadingHTTPServer((host, port), _ReportHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+
+    def replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Pula z procesem roboczym zabitym w trakcie pracy (np. przez OOM) nie przyjmuje
+        już zadań (BrokenProcessPool) – na jej miejsce powstaje nowa, rozgrzana pula.
+        """
+        with self._lock:
+            if self.executor is not broken:
+                # inny wątek już ją odtworzył
+                return
+            self.executor = self._new_pool()
+        print(
+            "[WARN] Proces roboczy serwera przerwał pracę – tworzę nową pulę procesów."
+        )
+        broken.shutdown(wait=False)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    def _config_file(self, path: str) -> Dict[str, Any]:
+        """Config z pliku YAML, parsowany ponownie tylko po zmianie pliku."""
+        if not os.path.isfile(path):
+            raise ValueError(f"Nie znaleziono pliku konfiguracyjnego: {path}")
+        mtime = os.stat(path).st_mtime_ns
+        cached = self.configs.get(path)
+        if not cached or cached[0] != mtime:
+            cached = (mtime, load_config(path))
+            self.configs[path] = cached
+        return cached[1]
+
+    def prepare_job(self, body: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Zamienia treść żądania na (plik CSV, config). `config` to ścieżka do YAML
+        albo słownik; `input_file` (opcjonalnie) wskazuje plik wprost.
+        Każde zadanie dostaje własny podkatalog (identyfikator zadania) na wykresy
+        i raport, więc równoległe zadania dla tego samego pliku nie nadpisują
+        sobie PNG ani PDF. Zgłasza ValueError przy błędnym zadaniu.
+        """
+        source = body.get("config")
+        if isinstance(source, str):
+            config = dict(self._config_file(source))
+        elif isinstance(source, dict):
+            config = dict(source)
+        else:
+            raise ValueError(
+                "Pole 'config' musi być ścieżką do pliku YAML lub słownikiem."
+            )
+        # serwer nie zada pytań – brakujące przełączniki oznaczają tryb automatyczny
+        for key in ("interactive_filter", "interactive_sort", "interactive_charts"):
+            config.setdefault(key, False)
+        if is_interactive(config):
+            raise ValueError(
+                "Serwer obsługuje tylko konfiguracje bez trybu interaktywnego."
+            )
+        config.update(self.overrides)
+
+        path = body.get("input_file")
+        if not path and "input_file" in config:
+            path = os.path.join(config.get("input_dir", "."), config["input_file"])
+        if not path:
+            raise ValueError("Brak pliku wejściowego ('input_file').")
+        if not os.path.isfile(path):
+            raise ValueError(f"Nie znaleziono pliku: {path}")
+        config = _worker_config(config, path)
+        job_id = uuid.uuid4().hex[:12]
+        config["charts_dir"] = os.path.join(config["charts_dir"], job_id)
+        config["reports_dir"] = os.path.join(
+            config.get("reports_dir", "reports"), job_id
+        )
+        return path, config
+
+    def submit(self, path: str, config: Dict[str, Any]):
+        """
+        Przekazuje zadanie do puli; None, gdy kolejka jest pełna.
+        Future ma atrybut `pool` – pulę, która wykonuje zadanie. Gdy puli nie
+        udało się przekazać zadania (np. RuntimeError w trakcie zamykania),
+        miejsce w kolejce jest zwalniane, a wyjątek przekazywany dalej.
+        """
+        if not self.slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            self.in_flight += 1
+            executor = self.executor
+        try:
+            try:
+                future = executor.submit(_run_batch_job, path, config)
+            except BrokenProcessPool:
+                self.replace_pool(executor)
+                executor = self.executor
+                future = executor.submit(_run_batch_job, path, config)
+        except BaseException:
+            self._finished(None)
+            raise
+        future.pool = executor
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def serve_forever(self) -> None:
+        host, port = self.address
+        print(
+            f"[INFO] Serwer raportów nasłuchuje na http://{host}:{port} "
+            f"(procesy: {self.workers}, kolejka: {self.max_pending})"
+        )
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """Zatrzymuje pętlę serve_forever (wywoływane z innego wątku)."""
+        self.httpd.shutdown()
+
+    def close(self) -> None:
+        self.httpd.server_close()
+        self.executor.shutdown(wait=True)
+
+
+class _ReportHandler(BaseHTTPRequestHandler):
+    server_version = "PyReport"
+
+    def _reply(self, status: int, payload: Dict[str, Any], **headers) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        app: ReportServer = self.server.app
+        if self.path != "/health":
+            self._reply(404, {"error": "Nieznany adres."})
+            return
+        self._reply(
+            200,
+            {
+                "ok": True,
+                "workers": app.workers,
+                "max_pending": app.max_pending,
+                "in_flight": app.in_flight,
+            },
+        )
+
+    def do_POST(self):
+        app: ReportServer = self.server.app
+        if self.path != "/report":
+            self._reply(404, {"error": "Nieznany adres."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Treść żądania musi być obiektem JSON.")
+            path, config = app.prepare_job(body)
+        except ValueError as e:
+            self._reply(400, {"ok": False, "error": str(e)})
+            return
+        start = time.perf_counter()
+        try:
+            future = app.submit(path, config)
+        except Exception as e:
+            self._reply(
+                503,
+                {"ok": False, "error": f"Nie udało się przyjąć zadania: {e}"},
+                Retry_After="1",
+            )
+            return
+        if future is None:
+            self._reply(
+                503,
+                {"ok": False, "error": "Kolejka zadań jest pełna, spróbuj ponownie."},
+                Retry_After="1",
+            )
+            return
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            # zadania nie powtarzamy – mogło samo zabić proces (np. brakiem pamięci)
+            app.replace_pool(future.pool)
+            self._reply(
+                503,
+                {
+                    "ok": False,
+                    "error": "Proces roboczy przerwał pracę; pula została odtworzona, spróbuj ponownie.",
+                },
+                Retry_After="1",
+            )
+            return
+        except Exception as e:
+            result = {"file": path, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        result["seconds"] = time.perf_counter() - start
+        self._reply(200 if result["ok"] else 500, result)
+
+    def log_message(self, format, *args):
+        print(f"[SERVER] {self.address_string()} {format % args}")
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = 1,
+    overrides: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Uruchamia serwer raportów do przerwania (Ctrl+C)."""
+    server = ReportServer(host, port, workers, overrides=overrides)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] Zatrzymano serwer raportów.")
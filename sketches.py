@@ -0,0 +1,340 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from aggregation import check_mergeable, value_counts
+
+# Tryb przybliżony (`approximate` w configu): szkice danych o stałym rozmiarze
+# liczone w jednym przebiegu i łączone między kawałkami i plikami (merge):
+# liczba różnych wartości (HyperLogLog), kwantyle (KLL) i najczęstsze wartości
+# (Misra-Gries). Każdy szkic jest zasilany całym kawałkiem naraz (NumPy).
+
+APPROXIMATE_DEFAULTS: Dict[str, Any] = {
+    # HyperLogLog: 2^precision rejestrów, błąd względny ~1.04 / sqrt(2^precision)
+    "precision": 14,
+    # KLL: pojemność najwyższego poziomu, błąd rangi kwantyla ~1.7 / k
+    "k": 200,
+    # heavy hitters: ile najczęstszych wartości śledzić i pokazać na wykresach bar/pie
+    "top_k": 20,
+    "quantiles": [0.5, 0.9, 0.99],
+}
+# Heavy hitters trzymają więcej liczników niż pokazują: błąd ≤ wiersze / (pojemność + 1)
+TOP_K_CAPACITY_FACTOR = 10
+# etykieta reszty wartości spoza top_k na wykresach bar/pie
+OTHER_LABEL = "Inne"
+
+
+def validate_approximate(section: Any) -> Optional[Dict[str, Any]]:
+    """
+    Sprawdza opcję `approximate` configu (`true` albo słownik ustawień)
+    i zwraca pełne ustawienia albo None, gdy tryb jest wyłączony.
+    """
+    if not section:
+        return None
+    options = dict(APPROXIMATE_DEFAULTS)
+    if isinstance(section, dict):
+        unknown = set(section) - set(APPROXIMATE_DEFAULTS)
+        if unknown:
+            raise ValueError(
+                f"Opcja 'approximate': nieznane ustawienia {sorted(unknown)}."
+            )
+        options.update(section)
+    elif section is not True:
+        raise ValueError("Opcja 'approximate' musi być true albo słownikiem ustawień.")
+    # dokładność float64 przy liczeniu zer wiodących wymaga co najmniej 11 bitów indeksu
+    if not 11 <= int(options["precision"]) <= 18:
+        raise ValueError("approximate.precision: dozwolone wartości 11-18.")
+    if int(options["k"]) < 8 or int(options["top_k"]) < 1:
+        raise ValueError("approximate: k musi być >= 8, a top_k >= 1.")
+    quantiles = [float(q) for q in options["quantiles"]]
+    if not all(0 <= q <= 1 for q in quantiles):
+        raise ValueError("approximate.quantiles: kwantyle z przedziału 0-1.")
+    options.update(
+        precision=int(options["precision"]),
+        k=int(options["k"]),
+        top_k=int(options["top_k"]),
+        quantiles=quantiles,
+    )
+    return options
+
+
+def quantile_label(q: float) -> str:
+    """Nazwa kwantyla w podsumowaniu, np. 0.5 -> "p50", 0.999 -> "p99.9"."""
+    return f"p{round(q * 100, 6):g}"
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """
+    64-bitowe skróty wartości kolumny (bez braków). Liczby są zamieniane na float64,
+    żeby kolumna int w jednym kawałku i float w drugim dawała te same skróty;
+    kategorie mają skróty jak ich wartości tekstowe.
+    """
+    series = series.dropna()
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        series = series.astype("float64")
+    # categorize=False: dla tekstu HyperLogLog dostaje już różne wartości kawałka
+    return pd.util.hash_pandas_object(series, index=False, categorize=False).to_numpy()
+
+
+class HyperLogLog:
+    """Liczba różnych wartości w stałej pamięci (2^precision bajtów)."""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # pozycja pierwszej jedynki = bits - długość bitowa reszty + 1 (frexp: wykładnik)
+        rank = bits - np.frexp(rest.astype(np.float64))[1] + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        check_mergeable(self, other, "precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # małe liczności: linear counting na pustych rejestrach
+            raw = m * np.log(m / zeros)
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    Szkic kwantyli KLL: poziomy buforów, element na poziomie h waży 2^h.
+    Przepełniony poziom jest sortowany, a co drugi element (losowe przesunięcie)
+    przechodzi wyżej – pamięć rośnie tylko logarytmicznie z liczbą wartości.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        check_mergeable(self, other, "k")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # przy nieparzystej liczbie największy element zostaje na poziomie
+                kept, items = (
+                    items[len(items) - len(items) % 2 :],
+                    items[: len(items) - len(items) % 2],
+                )
+                promoted = items[self.rng.integers(2) :: 2]
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], promoted]
+                )
+                self.levels[level] = kept
+            level += 1
+
+    def quantiles(self, qs: List[float]) -> List[float]:
+        if not self.count:
+            return [np.nan] * len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(len(lvl), 2**h, dtype=np.int64)
+                for h, lvl in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        # najmniejsza wartość, której ranga obejmuje q * n (jak kwantyl "lower")
+        targets = np.maximum(np.asarray(qs) * self.count, 1)
+        idx = np.searchsorted(cumulative, targets, side="left")
+        return items[np.minimum(idx, len(items) - 1)].tolist()
+
+
+class HeavyHitters:
+    """
+    Najczęstsze wartości kolumny (Misra-Gries w wersji łączonej): najwyżej
+    `capacity` liczników; przy przepełnieniu od wszystkich odejmowany jest
+    (capacity+1)-szy licznik. Liczności są zaniżone najwyżej o `error`.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.error = 0
+        # liczba wszystkich zliczonych wartości (reszta poza top_k to "Inne")
+        self.total = 0
+
+    def update(self, counts: pd.Series) -> None:
+        """Dolicza liczności wartości kawałka (wynik value_counts)."""
+        self.total += int(counts.sum())
+        self._add(counts)
+
+    def _add(self, counts: pd.Series) -> None:
+        if not self.counts.empty:
+            # groupby(sort=False) zachowuje kolejność pierwszego wystąpienia wartości
+            counts = pd.concat([self.counts, counts]).groupby(level=0, sort=False).sum()
+        if len(counts) > self.capacity:
+            cut = int(counts.nlargest(self.capacity + 1).iloc[-1])
+            counts = counts[counts > cut] - cut
+            self.error += cut
+        self.counts = counts
+
+    def merge(self, other: "HeavyHitters") -> None:
+        check_mergeable(self, other, "capacity")
+        self.error += other.error
+        self.total += other.total
+        self._add(other.counts)
+
+    def top(self, k: int) -> pd.Series:
+        return (
+            self.counts.sort_values(ascending=False, kind="stable")
+            .head(k)
+            .rename("count")
+        )
+
+
+class ColumnSketches:
+    """
+    Szkice wszystkich kolumn: HyperLogLog każdej kolumny, KLL kolumn liczbowych
+    i heavy hitters kolumn tekstowych oraz kolumn z wykresów bar/pie (`counted`).
+    Zasilany kawałkami danych (update) albo innym zestawem szkiców (merge).
+    """
+
+    def __init__(self, options: Dict[str, Any], counted: Optional[List[str]] = None):
+        self.options = options
+        self.counted = list(counted or [])
+        self.distinct: Dict[str, HyperLogLog] = {}
+        self.quantile: Dict[str, QuantileSketch] = {}
+        self.frequent: Dict[str, HeavyHitters] = {}
+
+    def _sketch(self, kind: str, col: str):
+        sketches = getattr(self, kind)
+        if col not in sketches:
+            if kind == "distinct":
+                sketches[col] = HyperLogLog(self.options["precision"])
+            elif kind == "quantile":
+                sketches[col] = QuantileSketch(self.options["k"])
+            else:
+                capacity = self.options["top_k"] * TOP_K_CAPACITY_FACTOR
+                sketches[col] = HeavyHitters(capacity)
+        return sketches[col]
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for col in chunk.columns:
+            series = chunk[col]
+            numeric = pd.api.types.is_numeric_dtype(
+                series
+            ) and not pd.api.types.is_bool_dtype(series)
+            if numeric:
+                self._sketch("quantile", col).update(
+                    series.to_numpy(dtype=np.float64, na_value=np.nan)
+                )
+            if numeric and col not in self.counted:
+                self._sketch("distinct", col).update(hash_values(series))
+                continue
+            # kolumna tekstowa lub zliczana: HyperLogLog dostaje tylko różne wartości kawałka
+            counts = value_counts(series)
+            self._sketch("frequent", col).update(counts)
+            self._sketch("distinct", col).update(hash_values(counts.index.to_series()))
+
+    def merge(self, other: "ColumnSketches") -> None:
+        check_mergeable(self, other, "options", "counted")
+        for kind in ("distinct", "quantile", "frequent"):
+            for col, sketch in getattr(other, kind).items():
+                self._sketch(kind, col).merge(sketch)
+
+    def top_counts(self) -> Dict[str, pd.Series]:
+        """
+        Liczności do wykresów bar/pie kolumn `counted`: `top_k` najczęstszych
+        wartości i "Inne" z resztą, żeby udziały na wykresie kołowym liczyły się
+        od wszystkich wierszy, a nie tylko od najczęstszych wartości.
+        """
+        result = {}
+        for col in self.counted:
+            frequent = self.frequent.get(col)
+            if frequent is None:
+                continue
+            top = frequent.top(self.options["top_k"])
+            rest = frequent.total - int(top.sum())
+            if rest > 0:
+                if OTHER_LABEL in top.index:
+                    top[OTHER_LABEL] += rest
+                else:
+                    top = pd.concat([top, pd.Series({OTHER_LABEL: rest})])
+            result[col] = top.rename("count")
+        return result
+
+    def distinct_counts(self) -> Dict[str, int]:
+        return {col: hll.estimate() for col, hll in self.distinct.items()}
+
+    def column_quantiles(self, columns: List[str]) -> Dict[str, Dict[str, float]]:
+        """Kwantyle z ustawień dla podanych kolumn liczbowych: {kolumna: {"p50": ...}}."""
+        qs = self.options["quantiles"]
+        return {
+            col: dict(zip(map(quantile_label, qs), self.quantile[col].quantiles(qs)))
+            for col in columns
+            if col in self.quantile
+        }
+
+    def report_table(self, columns: List[str], numeric: List[str]) -> pd.DataFrame:
+        """Tabela do raportu: liczba różnych wartości, kwantyle i najczęstsza wartość."""
+        distinct = self.distinct_counts()
+        quantiles = self.column_quantiles(numeric)
+        labels = list(map(quantile_label, self.options["quantiles"]))
+        rows = []
+        for col in columns:
+            if col not in distinct:
+                continue
+            row: Dict[str, Any] = {"Kolumna": col, "Różnych ≈": distinct[col]}
+            for label in labels:
+                value = quantiles.get(col, {}).get(label)
+                row[label] = "" if value is None else round(value, 2)
+            row["Najczęstsza"] = ""
+            frequent = self.frequent.get(col)
+            top = frequent.top(1) if frequent is not None else None
+            # przy dużym błędzie licznika "najczęstsza" wartość byłaby przypadkowa
+            if top is not None and len(top) and top.iloc[0] > frequent.error:
+                row["Najczęstsza"] = f"{top.index[0]} ({int(top.iloc[0])})"
+            rows.append(row)
+        return pd.DataFrame(
+            rows, columns=["Kolumna", "Różnych ≈", *labels, "Najczęstsza"]
+        )
+
+
+def sketch_summary(
+    sketches: ColumnSketches, columns: List[str], summary: Dict[str, Any]
+) -> None:
+    """Dopisuje do podsumowania wyniki szkiców (oba tryby: w pamięci i strumieniowy)."""
+    numeric = list(summary["numerical_summary"])
+    for col, quantiles in sketches.column_quantiles(numeric).items():
+        summary["numerical_summary"][col].update(quantiles)
+    summary["distinct_counts"] = sketches.distinct_counts()
+    summary.setdefault("value_counts", {}).update(sketches.top_counts())
+    summary["column_stats"] = sketches.report_table(columns, numeric)
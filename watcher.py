@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from cache import cache_path, content_hash, load_json, save_json, state_enabled
+from main import print_batch_summary, run_batch
+
+# Co ile sekund skanować katalog, gdy nie przychodzą powiadomienia systemowe
+DEFAULT_WATCH_INTERVAL = 5.0
+# Ile sekund plik musi pozostać niezmieniony, zanim uznamy go za zapisany do końca
+DEFAULT_WATCH_SETTLE = 2.0
+
+
+def scan_directory(directory: str) -> Dict[str, Tuple[int, int]]:
+    """Migawka plików CSV w katalogu: ścieżka -> (rozmiar, mtime w ns)."""
+    snapshot: Dict[str, Tuple[int, int]] = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".csv") and entry.is_file():
+                st = entry.stat()
+                snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+def _config_key(config: Dict[str, Any]) -> str:
+    """Skrót configu – jego zmiana oznacza, że raporty trzeba wygenerować ponownie."""
+    text = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ProcessedIndex:
+    """
+    Indeks przetworzonych plików (ścieżka, rozmiar, mtime, skrót zawartości)
+    zapisywany w `cache_dir/watch/processed.json`. Plik jest pomijany, jeśli jego
+    zawartość i config się nie zmieniły. Przy wyłączonym cache indeks żyje tylko
+    w pamięci bieżącego procesu.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.persistent = state_enabled(config)
+        self.path = cache_path(config, "watch", "processed.json")
+        self.config_key = _config_key(config)
+        data = load_json(self.path, {}) if self.persistent else {}
+        if data.get("config") != self.config_key or config.get("rebuild_cache"):
+            data = {}
+        self.files: Dict[str, Dict[str, Any]] = data.get("files", {})
+
+    def changed(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """
+        Skrót zawartości, jeśli plik jest nowy lub zmieniony, albo None.
+        Sam `touch` (nowy mtime, ta sama treść) nie wymaga ponownego raportu.
+        """
+        known = self.files.get(os.path.abspath(path))
+        if known and known["size"] == size and known["mtime_ns"] == mtime_ns:
+            return None
+        digest = content_hash(path)
+        if known and known["hash"] == digest:
+            known["mtime_ns"] = mtime_ns
+            return None
+        return digest
+
+    def record(self, path: str, size: int, mtime_ns: int, digest: str, ok: bool):
+        # błędny plik też jest zapamiętywany – kolejna próba dopiero po jego zmianie
+        self.files[os.path.abspath(path)] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "hash": digest,
+            "ok": ok,
+        }
+
+    def save(self) -> None:
+        if not self.persistent:
+            return
+        try:
+            save_json(self.path, {"config": self.config_key, "files": self.files})
+        except OSError as e:
+            print(f"[WARN] Nie udało się zapisać indeksu przetworzonych plików ({e}).")
+
+
+def _start_notifier(directory: str, wake: threading.Event):
+    """
+    Powiadomienia o zmianach w katalogu przez opcjonalny pakiet watchdog
+    (inotify/FSEvents/ReadDirectoryChangesW). Zwraca obserwatora albo None, gdy
+    pakietu brak lub nie da się go uruchomić – wtedy katalog jest tylko
+    skanowany co `watch_interval` sekund.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class _Wake(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wake.set()
+
+    try:
+        observer = Observer()
+        observer.schedule(_Wake(), directory, recursive=False)
+        observer.start()
+    except Exception as e:
+        print(
+            f"[WARN] Powiadomienia systemowe niedostępne ({e}) – skanuję katalog okresowo."
+        )
+        return None
+    return observer
+
+
+class DirectoryWatcher:
+    """
+    Obserwuje `input_dir` i przekazuje do pipeline'u tylko nowe lub zmienione
+    pliki CSV. Plik jest brany dopiero, gdy jego rozmiar i mtime nie zmieniły się
+    między skanami i od ostatniego zapisu minęło `watch_settle` sekund
+    (ochrona przed plikami w trakcie kopiowania).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        config: Dict[str, Any],
+        jobs: int = 1,
+        run: Callable[..., List[Dict[str, Any]]] = run_batch,
+    ):
+        self.directory = directory
+        self.config = config
+        self.jobs = jobs
+        self.run = run
+        self.interval = float(config.get("watch_interval", DEFAULT_WATCH_INTERVAL))
+        self.settle = float(config.get("watch_settle", DEFAULT_WATCH_SETTLE))
+        self.index = ProcessedIndex(config)
+        self.previous: Dict[str, Tuple[int, int]] = {}
+        self.wake = threading.Event()
+
+    def ready_files(self) -> Tuple[List[Tuple[str, int, int, str]], bool]:
+        """
+        Skanuje katalog. Zwraca (pliki do przetworzenia, czy są pliki wciąż
+        zapisywane); pliki to krotki (ścieżka, rozmiar, mtime, skrót).
+        """
+        snapshot = scan_directory(self.directory)
+        now_ns = time.time_ns()
+        ready, unsettled = [], False
+        for path in sorted(snapshot):
+            size, mtime_ns = snapshot[path]
+            if (
+                self.previous.get(path) != (size, mtime_ns)
+                or now_ns - mtime_ns < self.settle * 1e9
+            ):
+                unsettled = True
+                continue
+            digest = self.index.changed(path, size, mtime_ns)
+            if digest:
+                ready.append((path, size, mtime_ns, digest))
+        self.previous = snapshot
+        return ready, unsettled
+
+    def poll(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Jeden cykl: skan, przetworzenie gotowych plików, zapis indeksu."""
+        ready, unsettled = self.ready_files()
+        if not ready:
+            return [], unsettled
+        print(f"\n[INFO] Nowe lub zmienione pliki: {len(ready)}")
+        results = self.run([r[0] for r in ready], self.config, self.jobs)
+        for (path, size, mtime_ns, digest), result in zip(ready, results):
+            self.index.record(path, size, mtime_ns, digest, result["ok"])
+        self.index.save()
+        return results, unsettled
+
+    def watch(self) -> None:
+        """
+        Pętla obserwacji katalogu do przerwania (Ctrl+C). Z pakietem watchdog
+        skan rusza od razu po powiadomieniu systemu; bez niego (albo gdy
+        powiadomienie zginie) katalog jest skanowany co `watch_interval` sekund.
+        Skan to tylko stat plików, bez czytania treści.
+        """
+        observer = _start_notifier(self.directory, self.wake)
+        source = "powiadomienia systemowe" if observer else "skanowanie okresowe"
+        print(
+            f"[INFO] Obserwuję katalog {self.directory} ({source}, "
+            f"skan co {self.interval:g} s)"
+        )
+        try:
+            while True:
+                self.wake.clear()
+                results, unsettled = self.poll()
+                print_batch_summary(results)
+                # pliki w trakcie zapisu sprawdzamy ponownie po czasie stabilizacji
+                timeout = (
+                    min(self.interval, self.settle) if unsettled else self.interval
+                )
+                if self.wake.wait(timeout):
+                    # seria zdarzeń przy kopiowaniu pliku – odczekaj, aż ucichnie
+                    time.sleep(self.settle)
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()